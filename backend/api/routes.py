@@ -1,15 +1,42 @@
-from typing import Optional, List
-from fastapi import APIRouter, HTTPException, Query
+import hmac
+import json
+import os
+import weakref
+from typing import Callable, Optional, List
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
 from classes.pkd_data_service import PKDDataService
+from classes.pkd_data_loader import COMPONENTS
 from classes.pkd_classification import PKDVersion, PKDLevel
 from classes.industry_index import IndustryIndexCalculator
 
 # Inicjalizacja serwisu
-service = PKDDataService()
+# PKD_SHARED_DATA_DIR: katalog zbudowany przez `python build_shared_data.py <katalog>`,
+# mapowany w pamięć przez wszystkie workery zamiast wczytywania CSV w każdym z nich
+# PKD_PRELOAD: komponenty ładowane przy starcie ("all" albo np. "hierarchy_2025,financial_data");
+# domyślnie każdy komponent wczytywany jest przy pierwszym zapytaniu, które go potrzebuje
+# PKD_CACHE_SIZE, PKD_CACHE_TTL: liczba wpisów i czas życia (s) cache wyników get_data
+# (PKD_CACHE_SIZE=0 wyłącza cache, PKD_CACHE_TTL=0 - wpisy bez wygasania)
+_preload = os.environ.get("PKD_PRELOAD", "").strip()
+_cache_ttl = float(os.environ.get("PKD_CACHE_TTL", "300"))
+service = PKDDataService(
+	shared_dir=os.environ.get("PKD_SHARED_DATA_DIR") or None,
+	preload=COMPONENTS if _preload == "all" else [name.strip() for name in _preload.split(",") if name.strip()],
+	cache_size=int(os.environ.get("PKD_CACHE_SIZE", "256")),
+	cache_ttl=_cache_ttl if _cache_ttl > 0 else None
+)
 index_calculator = IndustryIndexCalculator()
 
+# PKD_DATA_WATCH_INTERVAL: co ile sekund sprawdzać pliki danych i przeładować je po zmianie
+if os.environ.get("PKD_DATA_WATCH_INTERVAL"):
+	service.start_watching(float(os.environ["PKD_DATA_WATCH_INTERVAL"]))
+
+# PKD_ADMIN_TOKEN: token wymagany w nagłówku X-Admin-Token przez endpointy /admin/*
+# (bez niego endpointy administracyjne są wyłączone)
+_admin_token = os.environ.get("PKD_ADMIN_TOKEN") or None
+
 router = APIRouter()
 
 
@@ -103,6 +130,52 @@ class ClassificationGroupResponse(BaseModel):
 	branches: List[dict]
 
 
+class TranslateBatchRequest(BaseModel):
+	"""Zapytanie o tłumaczenie wielu kodów PKD naraz"""
+	codes: List[str] = Field(..., max_length=100000, description="Kody PKD do przetłumaczenia")
+	from_version: str = Field(..., description="Wersja źródłowa (2007 lub 2025)")
+	to_version: str = Field(..., description="Wersja docelowa (2007 lub 2025)")
+
+
+# ==================== Helpers ====================
+
+# Gotowe odpowiedzi JSON endpointów nawigacji: hierarchia → klucz zapytania → treść.
+# Klucz słabej referencji - po przeładowaniu danych stara hierarchia i jej odpowiedzi znikają.
+_navigation_responses: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _serialized_response(hierarchy, key: tuple, build: Callable[[], dict], cache: bool = True) -> Response:
+	"""Zwróć odpowiedź JSON zserializowaną raz na hierarchię (cache=False dla nieznanych kluczy)"""
+	responses = _navigation_responses.setdefault(hierarchy, {})
+	body = responses.get(key)
+	if body is None:
+		body = json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+		if cache:
+			responses[key] = body
+	return Response(content=body, media_type="application/json")
+
+
+# Wskaźniki sumowane przy agregacji całej branży (rankingi, klasyfikacje, snapshot)
+AGGREGATED_FIELDS = (
+	"unit_count",
+	"profitable_units",
+	"revenue",
+	"net_income",
+	"operating_income",
+	"total_costs",
+	"long_term_debt",
+	"short_term_debt",
+)
+
+
+def _rollup_node(rollup, level, key, metric_fields=AGGREGATED_FIELDS, year_from=None, year_to=None):
+	"""Zagregowane dane finansowe i upadłości węzła (sekcja/dział/grupa) z kostki - rok po roku"""
+	return (
+		rollup.financials(level, key, metric_fields, year_from=year_from, year_to=year_to),
+		rollup.bankruptcies(level, key, year_from=year_from, year_to=year_to)
+	)
+
+
 # ==================== Endpoints ====================
 
 @router.get("/health")
@@ -111,6 +184,58 @@ async def health_check():
 	return {"status": "ok", "message": "PKD Data Service is running"}
 
 
+def _require_admin(token: Optional[str]) -> None:
+	"""Sprawdź token administratora (PKD_ADMIN_TOKEN) z nagłówka X-Admin-Token"""
+	if _admin_token is None:
+		raise HTTPException(status_code=403, detail="Endpoint administracyjny wyłączony - ustaw PKD_ADMIN_TOKEN")
+	if token is None or not hmac.compare_digest(token.encode(), _admin_token.encode()):
+		raise HTTPException(status_code=401, detail="Nieprawidłowy token administratora")
+
+
+@router.post("/admin/reload")
+async def reload_data(
+	wait: bool = Query(False, description="Czekaj na zakończenie przeładowania"),
+	x_admin_token: Optional[str] = Header(None, description="Token administratora (PKD_ADMIN_TOKEN)")
+):
+	"""
+	Przeładuj dane z katalogu data/ bez restartu procesu.
+	Wymaga nagłówka X-Admin-Token zgodnego z PKD_ADMIN_TOKEN.
+	
+	Nowy zbiór budowany jest w tle i podmieniany atomowo; zapytania w trakcie
+	kończą się na poprzednim zbiorze.
+	"""
+	_require_admin(x_admin_token)
+	
+	if service.is_reloading:
+		status = "already_running"
+	elif wait:
+		status = "reloaded" if await run_in_threadpool(service.reload) else "failed"
+	else:
+		status = "started" if service.reload_async() else "already_running"
+	
+	return {
+		"status": status,
+		"dataset_version": service.dataset_version,
+		"error": service.last_reload_error,
+	}
+
+
+@router.get("/admin/cache")
+async def cache_stats(
+	x_admin_token: Optional[str] = Header(None, description="Token administratora (PKD_ADMIN_TOKEN)")
+):
+	"""
+	Liczniki cache wyników get_data (trafienia, chybienia, usunięcia) do monitoringu.
+	Wymaga nagłówka X-Admin-Token zgodnego z PKD_ADMIN_TOKEN.
+	"""
+	_require_admin(x_admin_token)
+	
+	return {
+		"dataset_version": service.dataset_version,
+		"get_data": service.result_cache.stats(),
+	}
+
+
 @router.get("/industry")
 async def get_industry_data(
 	section: Optional[str] = Query(None, description="Sekcja PKD (A-U)"),
@@ -120,6 +245,7 @@ async def get_industry_data(
 	version: Optional[str] = Query("2025", description="Wersja PKD (2007 lub 2025)"),
 	year_from: Optional[int] = Query(None, description="Rok początkowy (np. 2015)"),
 	year_to: Optional[int] = Query(None, description="Rok końcowy (np. 2024)"),
+	summary_per_year: bool = Query(False, description="Dołącz do podsumowania rozbicie na lata"),
 ) -> IndustryDataResponse:
 	"""
 	Pobierz dane dla wybranej branży.
@@ -136,6 +262,7 @@ async def get_industry_data(
 	- /industry?section=G&division=46&group=11 → grupa 46.11
 	- /industry?section=G&division=46&group=11&subclass=A → kod 46.11.A
 	- /industry?section=G&division=46&year_from=2015&year_to=2024 → dane tylko dla lat 2015-2024
+	- /industry?section=G&division=46&summary_per_year=true → podsumowanie z rozbiciem na lata
 	
 	Uwaga: Użyj /sections aby pobrać listę sekcji
 	"""
@@ -196,7 +323,7 @@ async def get_industry_data(
 			}
         
 		# Pobierz statystyki podsumowania
-		summary = industry_data.get_summary_statistics()
+		summary = industry_data.get_summary_statistics(per_year=summary_per_year)
         
 		return IndustryDataResponse(
 			pkd_codes=codes_response,
@@ -221,16 +348,13 @@ async def get_sections(version: Optional[str] = Query("2025", description="Wersj
 	try:
 		pkd_version = PKDVersion.VERSION_2025 if version == "2025" else PKDVersion.VERSION_2007
 		hierarchy = service.loader.get_hierarchy(pkd_version)
-        
-		sections = set()
-		for code in hierarchy.codes.values():
-			if code.section:
-				sections.add(code.section)
-        
-		return {
+		items = hierarchy.get_navigation("sections")
+		
+		return _serialized_response(hierarchy, ("sections",), lambda: {
 			"version": pkd_version.value,
-			"sections": sorted(list(sections))
-		}
+			"sections": [item["symbol"] for item in items],
+			"items": items
+		})
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=str(e))
 
@@ -245,18 +369,15 @@ async def get_divisions(
 	"""
 	try:
 		pkd_version = PKDVersion.VERSION_2025 if version == "2025" else PKDVersion.VERSION_2007
-		codes = service.get_codes_for_section(section, version=pkd_version)
-        
-		divisions = set()
-		for code in codes:
-			if code.division:
-				divisions.add(code.division)
-        
-		return {
+		hierarchy = service.loader.get_hierarchy(pkd_version)
+		items = hierarchy.get_navigation("divisions", section)
+		
+		return _serialized_response(hierarchy, ("divisions", section), lambda: {
 			"section": section,
 			"version": pkd_version.value,
-			"divisions": sorted(list(divisions))
-		}
+			"divisions": [item["symbol"] for item in items or []],
+			"items": items or []
+		}, cache=items is not None)
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=str(e))
 
@@ -272,18 +393,89 @@ async def get_groups(
 	"""
 	try:
 		pkd_version = PKDVersion.VERSION_2025 if version == "2025" else PKDVersion.VERSION_2007
-		codes = service.get_codes_for_division(section, division, version=pkd_version)
-        
-		groups = set()
-		for code in codes:
-			if code.group:
-				groups.add(code.group)
-        
-		return {
+		hierarchy = service.loader.get_hierarchy(pkd_version)
+		items = hierarchy.get_navigation("groups", division)
+		# Zapamiętujemy tylko istniejące pary sekcja/dział - dowolne parametry nie zapełnią cache
+		section_divisions = hierarchy.get_navigation("divisions", section) or []
+		known = items is not None and any(item["symbol"] == division for item in section_divisions)
+		
+		return _serialized_response(hierarchy, ("groups", section, division), lambda: {
 			"section": section,
 			"division": division,
 			"version": pkd_version.value,
-			"groups": sorted(list(groups))
+			"groups": [item["symbol"] for item in items or []],
+			"items": items or []
+		}, cache=known)
+	except Exception as e:
+		raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/search")
+async def search_industries(
+	q: str = Query(..., min_length=1, description="Opis działalności, np. handel hurtowy"),
+	limit: int = Query(20, ge=1, le=100, description="Maksymalna liczba wyników"),
+	version: Optional[str] = Query("2025", description="Wersja PKD")
+):
+	"""
+	Wyszukaj kody PKD po nazwie działalności (bez polskich znaków i wielkości liter, ranking BM25)
+	"""
+	try:
+		pkd_version = PKDVersion.VERSION_2025 if version == "2025" else PKDVersion.VERSION_2007
+		hierarchy = service.loader.get_hierarchy(pkd_version)
+		results = hierarchy.search_text(q, limit)
+		
+		return {
+			"query": q,
+			"version": pkd_version.value,
+			"count": len(results),
+			"results": [
+				{
+					"symbol": code.symbol,
+					"name": code.name,
+					"level": code.level.value,
+					"section": code.section,
+					"division": code.division,
+					"group": code.group,
+					"subclass": code.subclass,
+					"score": round(score, 4)
+				}
+				for code, score in results
+			]
+		}
+	except Exception as e:
+		raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/search/codes")
+async def search_codes(
+	prefix: str = Query(..., min_length=1, description="Początek symbolu PKD, np. 46.1 albo C29"),
+	limit: int = Query(10, ge=1, le=100, description="Maksymalna liczba podpowiedzi"),
+	version: Optional[str] = Query("2025", description="Wersja PKD")
+):
+	"""
+	Podpowiedzi kodów PKD po początku symbolu (autouzupełnianie w formularzu)
+	"""
+	try:
+		pkd_version = PKDVersion.VERSION_2025 if version == "2025" else PKDVersion.VERSION_2007
+		hierarchy = service.loader.get_hierarchy(pkd_version)
+		codes = hierarchy.search_prefix(prefix, limit)
+		
+		return {
+			"prefix": prefix,
+			"version": pkd_version.value,
+			"count": len(codes),
+			"results": [
+				PKDCodeResponse(
+					symbol=code.symbol,
+					name=code.name,
+					level=code.level.value,
+					section=code.section,
+					division=code.division,
+					group=code.group,
+					subclass=code.subclass
+				)
+				for code in codes
+			]
 		}
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=str(e))
@@ -322,6 +514,38 @@ async def translate_code(
 		raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/translate/batch")
+async def translate_codes_batch(request: TranslateBatchRequest):
+	"""
+	Przetłumacz wiele kodów PKD między wersjami jednym zapytaniem.
+	Wyniki w kolejności wejścia; translated_codes zawiera wszystkie odpowiedniki
+	(mapowania jeden-do-wielu), translated_code - główny, jak w /translate.
+	"""
+	try:
+		from_v = PKDVersion.VERSION_2025 if request.from_version == "2025" else PKDVersion.VERSION_2007
+		to_v = PKDVersion.VERSION_2025 if request.to_version == "2025" else PKDVersion.VERSION_2007
+		
+		codes = [code.strip() for code in request.codes]
+		translated = service.translate_many(codes, from_v, to_v)
+		
+		return {
+			"from_version": from_v.value,
+			"to_version": to_v.value,
+			"total": len(codes),
+			"results": [
+				{
+					"original_code": code,
+					"translated_code": translated[code][0] if translated[code] else None,
+					"translated_codes": translated[code]
+				}
+				for code in codes
+			],
+			"unmapped": [code for code, targets in translated.items() if not targets]
+		}
+	except Exception as e:
+		raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/index")
 async def get_industry_index(
 	section: Optional[str] = Query(None, description="Sekcja PKD (A-U)"),
@@ -526,7 +750,9 @@ async def compare_branches(
 	"""
 	try:
 		pkd_version = PKDVersion.VERSION_2025 if version == "2025" else PKDVersion.VERSION_2007
-		hierarchy = service.loader.get_hierarchy(pkd_version)
+		# Jeden loader na całe zapytanie - przeładowanie w trakcie nie miesza zbiorów
+		loader = service.loader
+		hierarchy = loader.get_hierarchy(pkd_version)
 		
 		code_list = [c.strip() for c in codes.split(",") if c.strip()]
 		results = []
@@ -542,104 +768,35 @@ async def compare_branches(
 			except:
 				pass
 		
+		rep_codes = []
 		for code_str in code_list:
-			# Usuń kropki z końca (dane mają "46.", API przyjmuje "46")
-			code_clean = code_str.rstrip('.')
-			
-			rep_code = None
-			extracted_section = None
-			numeric_part = code_clean
-			
-			# Parsowanie niestandardowych formatów (C29.10, 29.10C, E38.18, 38.18E)
-			import re
-			# Próbuj wyodrębnić literę sekcji na początku lub końcu
-			match_start = re.match(r'^([A-U])(.+)$', code_clean, re.IGNORECASE)
-			match_end = re.match(r'^(.+?)([A-U])$', code_clean, re.IGNORECASE)
-			
-			if match_start:
-				# Format: C29.10 lub E38.18
-				extracted_section = match_start.group(1).upper()
-				numeric_part = match_start.group(2)
-			elif match_end:
-				# Format: 29.10C lub 38.18E
-				numeric_part = match_end.group(1)
-				extracted_section = match_end.group(2).upper()
-			
-			# 1. Sprawdź czy to litera sekcji (A-U)
-			if len(code_clean) == 1 and code_clean.isalpha():
-				sec_codes = hierarchy.get_by_section(code_clean.upper())
-				rep_code = sec_codes[0] if sec_codes else None
-			# 2. Sprawdź bezpośrednie dopasowanie w codes (dla standardowych formatów)
-			elif code_clean in hierarchy.codes:
-				rep_code = hierarchy.codes[code_clean]
-			# 3. Jeśli wyodrębniono sekcję i część numeryczną
-			elif extracted_section and numeric_part:
-				# Próbuj numeric_part bezpośrednio jako symbol
-				if numeric_part in hierarchy.codes:
-					candidate = hierarchy.codes[numeric_part]
-					if candidate.section == extracted_section:
-						rep_code = candidate
-				
-				# Jeśli nie znaleziono, szukaj w indeksach działów/grup dla danej sekcji
-				if not rep_code:
-					# Sprawdź czy numeric_part to dział
-					if numeric_part in hierarchy.division_index:
-						div_codes = [hierarchy.codes[s] for s in hierarchy.division_index[numeric_part]]
-						for candidate in div_codes:
-							if candidate.section == extracted_section:
-								rep_code = candidate
-								break
-					
-					# Sprawdź czy numeric_part to grupa
-					if not rep_code and numeric_part in hierarchy.group_index:
-						grp_codes = [hierarchy.codes[s] for s in hierarchy.group_index[numeric_part]]
-						for candidate in grp_codes:
-							if candidate.section == extracted_section:
-								rep_code = candidate
-								break
-			# 4. Sprawdź w indeksie działów
-			elif code_clean in hierarchy.division_index:
-				div_codes = hierarchy.get_by_division(code_clean)
-				rep_code = div_codes[0] if div_codes else None
-			# 5. Sprawdź w indeksie grup
-			elif code_clean in hierarchy.group_index:
-				grp_codes = hierarchy.get_by_group(code_clean)
-				rep_code = grp_codes[0] if grp_codes else None
-			# 6. Fallback: próbuj sekcję
-			else:
-				sec_codes = hierarchy.get_by_section(code_clean.upper())
-				rep_code = sec_codes[0] if sec_codes else None
+			# Jeden słownik aliasów: 46, 46., C29.10, 29.10C, SEK_G, 4611Z...
+			rep_code = hierarchy.resolve(code_str)
 			
 			if rep_code is None:
 				print(f"Warning: code {code_str} not found")
 				continue
-			
-			# Pobierz dane dla znalezionego reprezentatywnego kodu
-			industry_data = service.get_data(
-				section=rep_code.section,
-				division=rep_code.division,
-				group=rep_code.group,
-				subclass=rep_code.subclass,
-				version=pkd_version
-			)
-			
+			rep_codes.append(rep_code)
+		
+		# Dane wszystkich znalezionych kodów w jednym przebiegu (wspólne poddrzewa liczone raz)
+		selectors = [
+			{
+				"section": rep_code.section,
+				"division": rep_code.division,
+				"group": rep_code.group,
+				"subclass": rep_code.subclass
+			}
+			for rep_code in rep_codes
+		]
+		
+		for rep_code, industry_data in zip(rep_codes, service.get_many(selectors, version=pkd_version, loader=loader)):
 			if industry_data and industry_data.financial_data:
-				# Aggregate financial data
-				years_set = industry_data.get_all_years()
-				aggregated_values = {} # year -> { revenue, net_income, ... }
-				
-				for year in years_set:
-					if not (start_year <= year <= end_year):
-						continue
-						
-					agg = {"revenue": 0.0, "net_income": 0.0, "unit_count": 0}
-					for symbol, history in industry_data.financial_data.items():
-						if year in history:
-							m = history[year]
-							if m.revenue: agg["revenue"] += m.revenue
-							if m.net_income: agg["net_income"] += m.net_income
-							if m.unit_count: agg["unit_count"] += m.unit_count
-					aggregated_values[year] = agg
+				# Sumy serii branży rok po roku z magazynu widoku - zakres lat to wycinek osi lat
+				aggregated_values = industry_data.aggregate(
+					("revenue", "net_income", "unit_count"),
+					year_from=start_year,
+					year_to=end_year
+				)
 				
 				# Format for frontend
 				values_by_metric = {
@@ -647,11 +804,10 @@ async def compare_branches(
 					"net_income": [],
 					"unit_count": []
 				}
-				for year in sorted(aggregated_values.keys()):
-					vals = aggregated_values[year]
-					values_by_metric["revenue"].append({"year": year, "value": vals["revenue"]})
-					values_by_metric["net_income"].append({"year": year, "value": vals["net_income"]})
-					values_by_metric["unit_count"].append({"year": year, "value": vals["unit_count"]})
+				for year, metrics in aggregated_values.items():
+					values_by_metric["revenue"].append({"year": year, "value": metrics.revenue})
+					values_by_metric["net_income"].append({"year": year, "value": metrics.net_income})
+					values_by_metric["unit_count"].append({"year": year, "value": metrics.unit_count})
 
 				# Konstruuj pełny identyfikator z sekcją
 				full_id = rep_code.symbol
@@ -695,65 +851,36 @@ async def get_trends(
 		
 		metrics_list = [m.strip() for m in metrics.split(",") if m.strip()]
 		pkd_version = PKDVersion.VERSION_2025
-		hierarchy = service.loader.get_hierarchy(pkd_version)
+		# Jeden loader na całe zapytanie - przeładowanie w trakcie nie miesza zbiorów
+		loader = service.loader
+		hierarchy = loader.get_hierarchy(pkd_version)
+		rollup = service.get_rollup(pkd_version, loader)
 		
 		sections_data = {}
 		labels = []
 		
 		for sec in codes_list:
-			# Obsługa zarówno sekcji jak i kodów
-			target_code = sec
+			# Sekcja lub kod w dowolnym akceptowanym zapisie (G, SEK_G, 46, 46., C46, 4611Z...)
+			code_obj = hierarchy.resolve(sec)
+			if not code_obj:
+				print(f"Warning: Code {sec} not found")
+				continue
 			
-			# Sprawdź czy to sekcja czy kod
-			if len(sec) == 1 and sec.isalpha():
-				# To sekcja
-				ind_data = service.get_data(section=sec, version=pkd_version)
-				name = hierarchy.get_by_symbol(sec).name if hierarchy.get_by_symbol(sec) else f"Sekcja {sec}"
+			name = code_obj.name
+			if code_obj.level == PKDLevel.DIVISION:
+				node = (PKDLevel.DIVISION, code_obj.division)
+			elif code_obj.level == PKDLevel.GROUP:
+				node = (PKDLevel.GROUP, code_obj.group)
 			else:
-				# To kod (dział, grupa itp)
-				# Znajdź kod w hierarchii
-				code_obj = hierarchy.get_by_symbol(sec)
-				if not code_obj:
-					# Spróbuj znaleźć w indeksach
-					if sec in hierarchy.division_index:
-						code_obj = hierarchy.codes[hierarchy.division_index[sec][0]]
-					elif sec in hierarchy.group_index:
-						code_obj = hierarchy.codes[hierarchy.group_index[sec][0]]
-				
-				if code_obj:
-					name = code_obj.name
-					if code_obj.level == PKDLevel.SECTION:
-						ind_data = service.get_data(section=code_obj.section, version=pkd_version)
-					elif code_obj.level == PKDLevel.DIVISION:
-						ind_data = service.get_data(section=code_obj.section, division=code_obj.division, version=pkd_version)
-					elif code_obj.level == PKDLevel.GROUP:
-						ind_data = service.get_data(section=code_obj.section, division=code_obj.division, group=code_obj.group, version=pkd_version)
-					else:
-						ind_data = service.get_data(section=code_obj.section, version=pkd_version) # Fallback
-				else:
-					print(f"Warning: Code {sec} not found")
-					continue
-
-			if not ind_data.financial_data:
-				continue
-			from classes.pkd_data_loader import FinancialMetrics
-			agg_financial = {}
-			agg_bankruptcies = {}
-			for fin_data in ind_data.financial_data.values():
-				for yr, m in fin_data.items():
-					if years_range and not (years_range[0] <= yr <= years_range[1]):
-						continue
-					if yr not in agg_financial:
-						agg_financial[yr] = FinancialMetrics(year=yr)
-					cur = agg_financial[yr]
-					cur.revenue = (cur.revenue or 0) + (m.revenue or 0)
-					cur.net_income = (cur.net_income or 0) + (m.net_income or 0)
-					cur.unit_count = (cur.unit_count or 0) + (m.unit_count or 0)
-			for bank_data in ind_data.bankruptcy_data.values():
-				for yr, cnt in bank_data.items():
-					if years_range and not (years_range[0] <= yr <= years_range[1]):
-						continue
-					agg_bankruptcies[yr] = agg_bankruptcies.get(yr, 0) + cnt
+				node = (PKDLevel.SECTION, code_obj.section) # Sekcja (i fallback)
+			
+			agg_financial, agg_bankruptcies = _rollup_node(
+				rollup,
+				*node,
+				("revenue", "net_income", "unit_count"),
+				year_from=years_range[0] if years_range else None,
+				year_to=years_range[1] if years_range else None
+			)
 			
 			if not agg_financial:
 				continue
@@ -851,7 +978,9 @@ async def get_classification_group(
 			)
 		
 		pkd_version = PKDVersion.VERSION_2025 if version == "2025" else PKDVersion.VERSION_2007
-		hierarchy = service.loader.get_hierarchy(pkd_version)
+		# Jeden loader na całe zapytanie - przeładowanie w trakcie nie miesza zbiorów
+		loader = service.loader
+		hierarchy = loader.get_hierarchy(pkd_version)
 		
 		# Zbierz dane dla wszystkich działów
 		all_divisions = {}
@@ -862,44 +991,11 @@ async def get_classification_group(
 		# Oblicz indeksy
 		branches_data = []
 		
+		rollup = service.get_rollup(pkd_version, loader)
 		for division, rep_code in all_divisions.items():
 			try:
-				industry_data = service.get_data(
-					section=rep_code.section,
-					division=rep_code.division,
-					version=pkd_version
-				)
-				
-				if not industry_data.financial_data:
-					continue
-				
-				# Agreguj dane
-				agg_financial = {}
-				agg_bankruptcies = {}
-				
-				for symbol in industry_data.financial_data.keys():
-					fin_data = industry_data.financial_data[symbol]
-					for yr, metrics in fin_data.items():
-						if yr not in agg_financial:
-							from classes.pkd_data_loader import FinancialMetrics
-							agg_financial[yr] = FinancialMetrics(year=yr)
-						
-						current = agg_financial[yr]
-						current.unit_count = (current.unit_count or 0) + (metrics.unit_count or 0)
-						current.profitable_units = (current.profitable_units or 0) + (metrics.profitable_units or 0)
-						current.revenue = (current.revenue or 0) + (metrics.revenue or 0)
-						current.net_income = (current.net_income or 0) + (metrics.net_income or 0)
-						current.operating_income = (current.operating_income or 0) + (metrics.operating_income or 0)
-						current.total_costs = (current.total_costs or 0) + (metrics.total_costs or 0)
-						current.long_term_debt = (current.long_term_debt or 0) + (metrics.long_term_debt or 0)
-						current.short_term_debt = (current.short_term_debt or 0) + (metrics.short_term_debt or 0)
-				
-				for symbol in industry_data.bankruptcy_data.keys():
-					bank_data = industry_data.bankruptcy_data[symbol]
-					for yr, count in bank_data.items():
-						if yr not in agg_bankruptcies:
-							agg_bankruptcies[yr] = 0
-						agg_bankruptcies[yr] += count
+				# Zagregowane dane działu z kostki
+				agg_financial, agg_bankruptcies = _rollup_node(rollup, PKDLevel.DIVISION, division)
 				
 				if agg_financial:
 					index_result = index_calculator.calculate_full_index(
@@ -1094,7 +1190,9 @@ async def get_economy_snapshot(
 	"""
 	try:
 		pkd_version = PKDVersion.VERSION_2025 if version == "2025" else PKDVersion.VERSION_2007
-		hierarchy = service.loader.get_hierarchy(pkd_version)
+		# Jeden loader na całe zapytanie - przeładowanie w trakcie nie miesza zbiorów
+		loader = service.loader
+		hierarchy = loader.get_hierarchy(pkd_version)
 		
 		# Zbierz dane dla wszystkich sekcji
 		sections_data = []
@@ -1111,41 +1209,11 @@ async def get_economy_snapshot(
 		most_bankruptcies = []
 		declining = []
 		
+		rollup = service.get_rollup(pkd_version, loader)
 		for section in all_sections:
 			try:
-				# Pobierz dane sekcji
-				industry_data = service.get_data(section=section, version=pkd_version)
-				
-				if not industry_data.financial_data:
-					continue
-				
-				# Agreguj dane finansowe
-				section_financial = {}
-				section_bankruptcies = {}
-				
-				for symbol in industry_data.financial_data.keys():
-					fin_data = industry_data.financial_data[symbol]
-					for yr, metrics in fin_data.items():
-						if yr not in section_financial:
-							from classes.pkd_data_loader import FinancialMetrics
-							section_financial[yr] = FinancialMetrics(year=yr)
-						
-						current = section_financial[yr]
-						current.unit_count = (current.unit_count or 0) + (metrics.unit_count or 0)
-						current.profitable_units = (current.profitable_units or 0) + (metrics.profitable_units or 0)
-						current.revenue = (current.revenue or 0) + (metrics.revenue or 0)
-						current.net_income = (current.net_income or 0) + (metrics.net_income or 0)
-						current.operating_income = (current.operating_income or 0) + (metrics.operating_income or 0)
-						current.total_costs = (current.total_costs or 0) + (metrics.total_costs or 0)
-						current.long_term_debt = (current.long_term_debt or 0) + (metrics.long_term_debt or 0)
-						current.short_term_debt = (current.short_term_debt or 0) + (metrics.short_term_debt or 0)
-				
-				for symbol in industry_data.bankruptcy_data.keys():
-					bank_data = industry_data.bankruptcy_data[symbol]
-					for yr, count in bank_data.items():
-						if yr not in section_bankruptcies:
-							section_bankruptcies[yr] = 0
-						section_bankruptcies[yr] += count
+				# Zagregowane dane sekcji z kostki
+				section_financial, section_bankruptcies = _rollup_node(rollup, PKDLevel.SECTION, section)
 				
 				# Oblicz indeks dla sekcji
 				if section_financial:
@@ -1174,8 +1242,8 @@ async def get_economy_snapshot(
 						
 						# Liczba działów w sekcji
 						divisions_in_section = len(set(
-							code.division for code in hierarchy.codes.values()
-							if code.section == section and code.division
+							code.division for code in hierarchy.get_by_section(section)
+							if code.division
 						))
 						
 						sections_data.append({
@@ -1302,7 +1370,9 @@ async def get_rankings(
 	"""
 	try:
 		pkd_version = PKDVersion.VERSION_2025 if version == "2025" else PKDVersion.VERSION_2007
-		hierarchy = service.loader.get_hierarchy(pkd_version)
+		# Jeden loader na całe zapytanie - przeładowanie w trakcie nie miesza zbiorów
+		loader = service.loader
+		hierarchy = loader.get_hierarchy(pkd_version)
 		
 		# Zbierz wszystkie kody na wybranym poziomie
 		all_codes = list(hierarchy.codes.values())
@@ -1339,56 +1409,12 @@ async def get_rankings(
 		
 		# Oblicz indeksy dla każdej grupy
 		rankings = []
+		rollup = service.get_rollup(pkd_version, loader)
+		rollup_level = PKDLevel(level)
 		for group_key, representative_code in codes_by_group.items():
 			try:
-				# Pobierz dane dla tej grupy
-				if level == "section":
-					industry_data = service.get_data(section=representative_code.section, version=pkd_version)
-				elif level == "division":
-					industry_data = service.get_data(
-						section=representative_code.section,
-						division=representative_code.division,
-						version=pkd_version
-					)
-				elif level == "group":
-					industry_data = service.get_data(
-						section=representative_code.section,
-						division=representative_code.division,
-						group=representative_code.group,
-						version=pkd_version
-					)
-				
-				if not industry_data.pkd_codes or not industry_data.financial_data:
-					continue
-				
-				# Agreguj dane finansowe dla całej grupy
-				all_financial_data = {}
-				all_bankruptcy_data = {}
-				
-				for symbol in industry_data.financial_data.keys():
-					fin_data = industry_data.financial_data[symbol]
-					for year, metrics in fin_data.items():
-						if year not in all_financial_data:
-							from classes.pkd_data_loader import FinancialMetrics
-							all_financial_data[year] = FinancialMetrics(year=year)
-						
-						# Agreguj metryki
-						current = all_financial_data[year]
-						current.unit_count = (current.unit_count or 0) + (metrics.unit_count or 0)
-						current.profitable_units = (current.profitable_units or 0) + (metrics.profitable_units or 0)
-						current.revenue = (current.revenue or 0) + (metrics.revenue or 0)
-						current.net_income = (current.net_income or 0) + (metrics.net_income or 0)
-						current.operating_income = (current.operating_income or 0) + (metrics.operating_income or 0)
-						current.total_costs = (current.total_costs or 0) + (metrics.total_costs or 0)
-						current.long_term_debt = (current.long_term_debt or 0) + (metrics.long_term_debt or 0)
-						current.short_term_debt = (current.short_term_debt or 0) + (metrics.short_term_debt or 0)
-				
-				for symbol in industry_data.bankruptcy_data.keys():
-					bank_data = industry_data.bankruptcy_data[symbol]
-					for year, count in bank_data.items():
-						if year not in all_bankruptcy_data:
-							all_bankruptcy_data[year] = 0
-						all_bankruptcy_data[year] += count
+				# Zagregowane dane całej grupy z kostki
+				all_financial_data, all_bankruptcy_data = _rollup_node(rollup, rollup_level, group_key)
 				
 				# Oblicz indeks
 				if all_financial_data:
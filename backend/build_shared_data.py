@@ -0,0 +1,31 @@
+"""
+Budowa współdzielonego zbioru danych PKD.
+
+Wczytuje dane raz i zapisuje je do katalogu, który workery uvicorn/gunicorn
+mapują w pamięć (mmap) zamiast wczytywać CSV każdy osobno:
+
+    python build_shared_data.py /srv/pkd-shared
+    PKD_SHARED_DATA_DIR=/srv/pkd-shared uvicorn app:app --workers 4
+"""
+
+import argparse
+from pathlib import Path
+
+from classes.pkd_data_loader import PKDDataLoader, SHARED_EXPORT_RETENTION
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Budowa współdzielonego zbioru danych PKD (mmap)")
+    parser.add_argument("target_dir", type=Path, help="Katalog docelowy współdzielonych plików")
+    parser.add_argument("--data-dir", type=Path, default=None, help="Katalog z plikami CSV")
+    parser.add_argument(
+        "--retention", type=float, default=SHARED_EXPORT_RETENTION,
+        help="Czas (s) od zastąpienia nowszym, po którym starszy eksport jest usuwany"
+    )
+    args = parser.parse_args()
+    
+    PKDDataLoader(args.data_dir).export_shared(args.target_dir, retention=args.retention)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,13 +10,19 @@ from classes.pkd_classification import (
     PKDHierarchy,
 )
 
+from classes.pkd_search import PKDTextIndex
+
 from classes.pkd_data_loader import (
     FinancialMetrics,
+    FinancialStore,
     BankruptcyData,
     PKDMapper,
     PKDDataLoader,
 )
 
+from classes.pkd_rollup import RollupCube
+from classes.result_cache import ResultCache
+
 from classes.pkd_data_service import (
     IndustryData,
     PKDDataService,
@@ -28,10 +34,14 @@ __all__ = [
     "PKDLevel",
     "PKDCode",
     "PKDHierarchy",
+    "PKDTextIndex",
     "FinancialMetrics",
+    "FinancialStore",
     "BankruptcyData",
     "PKDMapper",
     "PKDDataLoader",
+    "RollupCube",
+    "ResultCache",
     "IndustryData",
     "PKDDataService",
 ]
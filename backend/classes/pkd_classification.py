@@ -3,10 +3,13 @@ PKD Classification Module
 Zawiera klasy do reprezentacji hierarchii Polskiej Klasyfikacji Działalności (PKD)
 """
 
+from bisect import bisect_left
 from enum import Enum
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Dict, List, Optional, Sequence, Tuple
 from pathlib import Path
+from classes.pkd_search import PKDTextIndex
 
 
 class PKDVersion(Enum):
@@ -23,9 +26,12 @@ class PKDLevel(Enum):
     SUBCLASS = "subclass"    # Podklasa (litera, np. A)
 
 
-@dataclass
+@dataclass(slots=True)
 class PKDCode:
-    """Reprezentacja pojedynczego kodu PKD"""
+    """
+    Reprezentacja pojedynczego kodu PKD.
+    Sloty zamiast __dict__: kilka tysięcy instancji na hierarchię trzymanych przez cały czas życia workera.
+    """
     symbol: str          # Pełny symbol, np. "46.11.A"
     name: str            # Opisowa nazwa
     level: PKDLevel      # Jaki to poziom hierarchii
@@ -58,6 +64,17 @@ class PKDHierarchy:
     """
     Reprezentacja całej hierarchii PKD dla jednej wersji.
     Umożliwia szybkie wyszukiwanie kodów na różnych poziomach.
+    
+    Kody numerowane są w porządku preorder (sekcja, jej działy, grupy, klasy, podklasy...),
+    więc poddrzewo każdego kodu to przedział [start, end) jednej tablicy kodów - potomkowie
+    są wycinkiem tablicy, a test "czy X leży pod Y" porównaniem dwóch liczb.
+    Numeracja budowana jest leniwie przy pierwszym zapytaniu po zmianie hierarchii.
+    
+    Wyniki get_by_* i get_codes_by_hierarchy są zapamiętywane jako niemutowalne krotki
+    (wiele zapytań dostaje ten sam obiekt). Hierarchia wczytana z plików jest zamrażana
+    (`freeze()`), więc zapamiętane wyniki nigdy się nie dezaktualizują: po zamrożeniu
+    słowniki kodów, indeksów, aliasów i nawigacji są widokami tylko do odczytu
+    (MappingProxyType), a listy - krotkami.
     """
     
     def __init__(self, version: PKDVersion):
@@ -69,10 +86,45 @@ class PKDHierarchy:
         self.division_index: Dict[str, List[str]] = {}  # division → list[symbols]
         self.group_index: Dict[str, List[str]] = {}  # group → list[symbols]
         self.subclass_index: Dict[str, List[str]] = {}  # subclass → list[symbols]
+        
+        # Numeracja preorder (None = do przebudowania)
+        self._preorder: Optional[List[PKDCode]] = None  # kody w porządku preorder
+        self._rank: Dict[str, int] = {}  # symbol → pozycja w _preorder
+        self._subtree_end: List[int] = []  # pozycja → koniec przedziału poddrzewa
+        self._parent: Dict[str, Optional[str]] = {}  # symbol → symbol rodzica
+        self._index_intervals: Dict[str, Dict[str, Tuple[int, int]]] = {}  # indeks → klucz → [start, end)
+        
+        # Indeks prefiksowy do podpowiedzi (None = do przebudowania): posortowane klucze
+        # wyszukiwania i odpowiadające im kody
+        self._prefix_keys: Optional[List[str]] = None
+        self._prefix_codes: List[PKDCode] = []
+        
+        # Indeks pełnotekstowy nazw (None = do przebudowania)
+        self._text_index: Optional[PKDTextIndex] = None
+        
+        # Posortowane listy dzieci do nawigacji (None = do przebudowania):
+        # poziom ("sections"/"divisions"/"groups") → rodzic → lista pozycji {symbol, name, children_count}
+        self._navigation: Optional[Dict[str, Dict[Optional[str], List[Dict]]]] = None
+        
+        # Tablica aliasów (None = do przebudowania): znormalizowany alias → kod kanoniczny
+        self._aliases: Optional[Dict[str, PKDCode]] = None
+        
+        # Zapamiętane wyniki zapytań: (rodzaj, klucz) → krotka kodów
+        self._selections: Dict[Tuple[str, Optional[str]], Tuple[PKDCode, ...]] = {}
+        self._frozen = False
     
     def add_code(self, code: PKDCode) -> None:
         """Dodaj kod do hierarchii i zaktualizuj indeksy"""
+        if self._frozen:
+            raise RuntimeError(f"Hierarchia PKD {self.version.value} jest zamrożona - nie można dodać kodu {code.symbol}")
+        
         self.codes[code.symbol] = code
+        self._selections = {}
+        self._preorder = None
+        self._prefix_keys = None
+        self._text_index = None
+        self._navigation = None
+        self._aliases = None
         
         # Dodaj do indeksów
         if code.section:
@@ -99,25 +151,365 @@ class PKDHierarchy:
         """Zwróć kod PKD po symbolu"""
         return self.codes.get(symbol)
     
-    def get_by_section(self, section: str) -> List[PKDCode]:
+    def _get_by_index(self, name: str, index: Dict[str, List[str]], key: str) -> Tuple[PKDCode, ...]:
+        """Zwróć kody z indeksu: wycinek tablicy preorder, jeśli tworzą w niej ciągły przedział"""
+        selection = self._selections.get((name, key))
+        if selection is not None:
+            return selection
+        if key not in index:
+            return ()  # nieznanych kluczy nie zapamiętujemy - pochodzą z zapytań użytkowników
+        
+        self._ensure_preorder()
+        interval = self._index_intervals[name].get(key)
+        if interval is not None:
+            start, end = interval
+            selection = tuple(self._preorder[start:end])
+        else:
+            selection = tuple(self.codes[sym] for sym in index[key] if sym in self.codes)
+        self._selections[(name, key)] = selection
+        return selection
+    
+    def get_by_section(self, section: str) -> Tuple[PKDCode, ...]:
         """Zwróć wszystkie kody w sekcji"""
-        symbols = self.section_index.get(section, [])
-        return [self.codes[sym] for sym in symbols if sym in self.codes]
+        return self._get_by_index('section', self.section_index, section)
     
-    def get_by_division(self, division: str) -> List[PKDCode]:
+    def get_by_division(self, division: str) -> Tuple[PKDCode, ...]:
         """Zwróć wszystkie kody w dziale"""
-        symbols = self.division_index.get(division, [])
-        return [self.codes[sym] for sym in symbols if sym in self.codes]
+        return self._get_by_index('division', self.division_index, division)
     
-    def get_by_group(self, group: str) -> List[PKDCode]:
+    def get_by_group(self, group: str) -> Tuple[PKDCode, ...]:
         """Zwróć wszystkie kody w grupie"""
-        symbols = self.group_index.get(group, [])
-        return [self.codes[sym] for sym in symbols if sym in self.codes]
+        return self._get_by_index('group', self.group_index, group)
     
-    def get_by_subclass(self, subclass: str) -> List[PKDCode]:
+    def get_by_subclass(self, subclass: str) -> Tuple[PKDCode, ...]:
         """Zwróć wszystkie kody z podklasą"""
-        symbols = self.subclass_index.get(subclass, [])
-        return [self.codes[sym] for sym in symbols if sym in self.codes]
+        return self._get_by_index('subclass', self.subclass_index, subclass)
+    
+    # ==================== Numeracja preorder ====================
+    
+    def _find_parent(self, code: PKDCode) -> Optional[str]:
+        """
+        Znajdź rodzica kodu: najdłuższy istniejący prefiks symbolu
+        ("01.11.Z" → "01.11" → "01.1" → "01"), a dla działu - jego sekcja.
+        """
+        symbol = code.symbol
+        prefix = symbol
+        while len(prefix) > 1:
+            prefix = prefix[:-1].rstrip('.')
+            if prefix in self.codes:
+                return prefix
+        
+        if code.section and code.section != symbol and code.section in self.codes:
+            return code.section
+        return None
+    
+    def _ensure_preorder(self) -> None:
+        """Zbuduj numerację preorder, jeśli hierarchia zmieniła się od ostatniego zapytania"""
+        if self._preorder is not None:
+            return
+        
+        parent = {symbol: self._find_parent(code) for symbol, code in self.codes.items()}
+        children: Dict[Optional[str], List[str]] = {}
+        for symbol, parent_symbol in parent.items():
+            children.setdefault(parent_symbol, []).append(symbol)
+        
+        # DFS od korzeni (sekcje, kody bez rodzica), dzieci w kolejności dodania.
+        # Koniec przedziału poddrzewa ustawiany jest przy powrocie z kodu.
+        preorder: List[PKDCode] = []
+        rank: Dict[str, int] = {}
+        subtree_end: List[int] = []
+        stack: List[Tuple[str, bool]] = [(symbol, False) for symbol in reversed(children.get(None, []))]
+        while stack:
+            symbol, leaving = stack.pop()
+            if leaving:
+                subtree_end[rank[symbol]] = len(preorder)
+                continue
+            
+            rank[symbol] = len(preorder)
+            preorder.append(self.codes[symbol])
+            subtree_end.append(len(preorder))
+            stack.append((symbol, True))
+            stack.extend((child, False) for child in reversed(children.get(symbol, [])))
+        
+        # Klucze indeksów, których kody leżą w preorder jako ciągły przedział (w tej samej kolejności)
+        index_intervals: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        for name, index in (
+            ('section', self.section_index),
+            ('division', self.division_index),
+            ('group', self.group_index),
+            ('subclass', self.subclass_index),
+        ):
+            intervals = {}
+            for key, symbols in index.items():
+                start = rank.get(symbols[0])
+                if start is None:
+                    continue
+                if all(rank.get(sym) == start + offset for offset, sym in enumerate(symbols)):
+                    intervals[key] = (start, start + len(symbols))
+            index_intervals[name] = intervals
+        
+        self._rank = rank
+        self._subtree_end = subtree_end
+        self._parent = parent
+        self._index_intervals = index_intervals
+        self._preorder = preorder
+    
+    @property
+    def preorder(self) -> Sequence[PKDCode]:
+        """Wszystkie kody w porządku preorder"""
+        self._ensure_preorder()
+        return self._preorder
+    
+    def get_interval(self, symbol: str) -> Optional[Tuple[int, int]]:
+        """Zwróć przedział [start, end) poddrzewa kodu w tablicy preorder"""
+        self._ensure_preorder()
+        start = self._rank.get(symbol)
+        if start is None:
+            return None
+        return start, self._subtree_end[start]
+    
+    def get_subtree(self, symbol: str) -> Sequence[PKDCode]:
+        """Zwróć kod wraz z wszystkimi potomkami (wycinek tablicy preorder)"""
+        interval = self.get_interval(symbol)
+        if interval is None:
+            return []
+        start, end = interval
+        return self._preorder[start:end]
+    
+    def get_descendants(self, symbol: str) -> Sequence[PKDCode]:
+        """Zwróć wszystkich potomków kodu, bez niego samego"""
+        return self.get_subtree(symbol)[1:]
+    
+    def get_parent(self, symbol: str) -> Optional[PKDCode]:
+        """Zwróć kod nadrzędny"""
+        self._ensure_preorder()
+        parent_symbol = self._parent.get(symbol)
+        return self.codes[parent_symbol] if parent_symbol is not None else None
+    
+    def get_ancestors(self, symbol: str) -> List[PKDCode]:
+        """Zwróć przodków kodu od korzenia (sekcji) do bezpośredniego rodzica"""
+        self._ensure_preorder()
+        ancestors = []
+        parent_symbol = self._parent.get(symbol)
+        while parent_symbol is not None:
+            ancestors.append(self.codes[parent_symbol])
+            parent_symbol = self._parent[parent_symbol]
+        ancestors.reverse()
+        return ancestors
+    
+    def is_descendant(self, symbol: str, ancestor: str) -> bool:
+        """Czy kod leży w poddrzewie przodka (O(1) - porównanie przedziałów)"""
+        self._ensure_preorder()
+        rank = self._rank.get(symbol)
+        interval = self.get_interval(ancestor)
+        if rank is None or interval is None:
+            return False
+        start, end = interval
+        return start < rank < end
+    
+    # ==================== Podpowiedzi po prefiksie ====================
+    
+    @staticmethod
+    def _prefix_key(text: str) -> str:
+        """Klucz wyszukiwania prefiksowego: bez spacji, wielkie litery"""
+        return "".join(text.split()).upper()
+    
+    def _ensure_prefix_index(self) -> None:
+        """Zbuduj posortowaną tablicę kluczy, jeśli hierarchia zmieniła się od ostatniego zapytania"""
+        if self._prefix_keys is not None:
+            return
+        
+        # Każdy kod pod swoim symbolem ("46.11.Z"), a kody poniżej sekcji także z literą
+        # sekcji na początku ("C29", "C29.10.Z"), tak jak wpisuje się je w formularzach
+        entries = []
+        for symbol, code in self.codes.items():
+            key = self._prefix_key(symbol)
+            entries.append((key, code))
+            if code.section and code.section != symbol:
+                entries.append((self._prefix_key(code.section) + key, code))
+        entries.sort(key=lambda entry: entry[0])
+        
+        self._prefix_codes = [code for _, code in entries]
+        self._prefix_keys = [key for key, _ in entries]
+    
+    def search_prefix(self, prefix: str, limit: int = 10) -> List[PKDCode]:
+        """
+        Zwróć do `limit` kodów, których symbol zaczyna się od prefiksu, w kolejności symboli
+        (np. "46.1" → 46.1, 46.11, 46.11.Z, ...; "C29" → dział 29 sekcji C i jego kody).
+        Wyszukiwanie binarne w posortowanej tablicy: O(log n + limit).
+        """
+        self._ensure_prefix_index()
+        key = self._prefix_key(prefix)
+        if not key or limit <= 0:
+            return []
+        
+        keys = self._prefix_keys
+        results: List[PKDCode] = []
+        seen = set()
+        position = bisect_left(keys, key)
+        while position < len(keys) and keys[position].startswith(key) and len(results) < limit:
+            code = self._prefix_codes[position]
+            if code.symbol not in seen:
+                seen.add(code.symbol)
+                results.append(code)
+            position += 1
+        return results
+    
+    # ==================== Aliasy kodów ====================
+    
+    @staticmethod
+    def _alias_key(text: str) -> str:
+        """Klucz tablicy aliasów: bez spacji i kropek na końcu, wielkie litery ("46. " → "46")"""
+        return "".join(text.split()).upper().rstrip('.')
+    
+    def _ensure_aliases(self) -> None:
+        """Zbuduj tablicę wszystkich akceptowanych zapisów kodów"""
+        if self._aliases is not None:
+            return
+        
+        # Kolejność grup wyznacza pierwszeństwo przy kolizjach: symbol kanoniczny wygrywa
+        # z każdym aliasem, a zapis bez kropek z zapisem z literą sekcji na końcu
+        # ("2910C" to podklasa 29.10.C, nie klasa 29.10 w sekcji C)
+        aliases: Dict[str, PKDCode] = {}
+        for symbol, code in self.codes.items():
+            aliases.setdefault(self._alias_key(symbol), code)
+        for symbol, code in self.codes.items():
+            if code.level == PKDLevel.SECTION:
+                aliases.setdefault(f"SEK_{symbol}", code)  # zapis z wsk_fin.csv
+            else:
+                aliases.setdefault(symbol.replace('.', ''), code)  # zapis z krz_pkd.csv ("4611Z")
+        for symbol, code in self.codes.items():
+            if code.section and code.section != symbol:
+                key = self._alias_key(symbol)
+                aliases.setdefault(f"{code.section}{key}", code)   # C29.10
+                aliases.setdefault(f"{code.section}.{key}", code)  # C.29.10 (identyfikator z /compare)
+                aliases.setdefault(f"{key}{code.section}", code)   # 29.10C
+        self._aliases = aliases
+    
+    def resolve(self, alias: str) -> Optional[PKDCode]:
+        """
+        Zamień dowolny akceptowany zapis kodu na kod kanoniczny: symbol ("46.11.Z", "46."),
+        sekcję ("G", "SEK_G"), zapis bez kropek z krz_pkd.csv ("4611Z") oraz kod z literą
+        sekcji na początku lub końcu ("C29.10", "C.29.10", "29.10C"). Wielkość liter bez znaczenia.
+        None gdy zapis nie pasuje do żadnego kodu.
+        """
+        self._ensure_aliases()
+        return self._aliases.get(self._alias_key(alias))
+    
+    # ==================== Nawigacja ====================
+    
+    def _ensure_navigation(self) -> None:
+        """Zbuduj posortowane listy sekcji, działów w sekcjach i grup w działach"""
+        if self._navigation is not None:
+            return
+        
+        sections = sorted({code.section for code in self.codes.values() if code.section})
+        divisions = {
+            section: sorted({code.division for code in self.get_by_section(section) if code.division})
+            for section in sections
+        }
+        division_keys = {division for children in divisions.values() for division in children}
+        division_keys.update(self.division_index)
+        groups = {
+            division: sorted({code.group for code in self.get_by_division(division) if code.group})
+            for division in division_keys
+        }
+        # Grupy nie mają kolejnego poziomu nawigacji - liczymy ich bezpośrednie podkody w drzewie
+        self._ensure_preorder()
+        direct_children: Dict[str, int] = {}
+        for parent_symbol in self._parent.values():
+            if parent_symbol is not None:
+                direct_children[parent_symbol] = direct_children.get(parent_symbol, 0) + 1
+        
+        def items(symbols: List[str], children_count) -> List[Dict]:
+            return [
+                {
+                    "symbol": symbol,
+                    "name": self.codes[symbol].name if symbol in self.codes else None,
+                    "children_count": children_count(symbol),
+                }
+                for symbol in symbols
+            ]
+        
+        self._navigation = {
+            "sections": {None: items(sections, lambda section: len(divisions.get(section, [])))},
+            "divisions": {
+                section: items(children, lambda division: len(groups.get(division, [])))
+                for section, children in divisions.items()
+            },
+            "groups": {
+                division: items(children, lambda group: direct_children.get(group, 0))
+                for division, children in groups.items()
+            },
+        }
+    
+    def get_navigation(self, level: str, parent: Optional[str] = None) -> Optional[Sequence[Dict]]:
+        """
+        Zwróć posortowane dzieci węzła do nawigacji: level="sections" (bez rodzica),
+        "divisions" (rodzic = sekcja) albo "groups" (rodzic = dział).
+        Każda pozycja: {symbol, name, children_count}, gdzie children_count to liczba pozycji
+        na następnym poziomie nawigacji (dla grup: liczba bezpośrednich podkodów).
+        None gdy rodzic nie istnieje.
+        """
+        self._ensure_navigation()
+        return self._navigation[level].get(parent)
+    
+    def build_indexes(self) -> None:
+        """Zbuduj z góry indeksy pochodne (preorder, prefiksy, nawigacja, aliasy) - wywoływane po wczytaniu"""
+        self._ensure_preorder()
+        self._ensure_prefix_index()
+        self._ensure_navigation()
+        self._ensure_aliases()
+    
+    def freeze(self) -> None:
+        """Zbuduj indeksy pochodne i zablokuj dalsze zmiany - wywoływane po wczytaniu z plików"""
+        self.build_indexes()
+        self._seal()
+        self._frozen = True
+    
+    def _seal(self) -> None:
+        """Zamień słowniki kodów, indeksów, aliasów i nawigacji na widoki tylko do odczytu, a listy na krotki"""
+        self.codes = MappingProxyType(dict(self.codes))
+        for name in ('section_index', 'division_index', 'group_index', 'subclass_index'):
+            index = getattr(self, name)
+            setattr(self, name, MappingProxyType({key: tuple(symbols) for key, symbols in index.items()}))
+        
+        self._preorder = tuple(self._preorder)
+        self._prefix_keys = tuple(self._prefix_keys)
+        self._prefix_codes = tuple(self._prefix_codes)
+        self._aliases = MappingProxyType(dict(self._aliases))
+        self._navigation = MappingProxyType({
+            level: MappingProxyType({parent: tuple(items) for parent, items in children.items()})
+            for level, children in self._navigation.items()
+        })
+    
+    def __getstate__(self) -> dict:
+        """Stan do pickle (snapshot, katalog współdzielony): widoki tylko do odczytu jako zwykłe słowniki"""
+        def thaw(value):
+            if isinstance(value, MappingProxyType):
+                return {key: thaw(item) for key, item in value.items()}
+            return value
+        return {name: thaw(value) for name, value in self.__dict__.items()}
+    
+    def __setstate__(self, state: dict) -> None:
+        """Odtwórz hierarchię z pickle - zamrożona wraca jako zamrożona (bez przebudowy indeksów)"""
+        self.__dict__.update(state)
+        if self._frozen:
+            self._seal()
+    
+    @property
+    def frozen(self) -> bool:
+        """Czy hierarchia jest zamrożona (add_code zgłasza RuntimeError)"""
+        return self._frozen
+    
+    def search_text(self, query: str, limit: int = 20) -> List[Tuple[PKDCode, float]]:
+        """
+        Wyszukaj kody po nazwie działalności ("handel hurtowy", "uprawa zbóż").
+        Zwraca pary (kod, wynik BM25) od najlepiej pasujących; indeks budowany przy pierwszym użyciu.
+        """
+        if self._text_index is None:
+            self._text_index = PKDTextIndex(self.codes.values())
+        return self._text_index.search(query, limit)
     
     def validate_hierarchy(
         self,
@@ -151,10 +543,11 @@ class PKDHierarchy:
         division: Optional[str] = None,
         group: Optional[str] = None,
         subclass: Optional[str] = None
-    ) -> List[PKDCode]:
+    ) -> Tuple[PKDCode, ...]:
         """
         Zwróć kody PKD na podstawie hierarchii.
         Obsługuje wielopoziomowe zapytania z walidacją.
+        Wynik jest zapamiętaną krotką, wspólną dla wszystkich zapytań o ten sam kod.
         
         Przykłady:
         - get_codes_by_hierarchy(section="A") → wszystkie kody w sekcji A
@@ -176,8 +569,14 @@ class PKDHierarchy:
         if subclass is not None:
             # group może być już w formacie "46.11" lub "11"
             full_group = f"{division}.{group}" if not group.startswith(f"{division}.") else group
-            code = self.get_by_symbol(f"{full_group}.{subclass}")
-            return [code] if code else []
+            symbol = f"{full_group}.{subclass}"
+            code = self.get_by_symbol(symbol)
+            if code is None:
+                return ()
+            selection = self._selections.get(('symbol', symbol))
+            if selection is None:
+                selection = self._selections[('symbol', symbol)] = (code,)
+            return selection
         
         # Jeśli podana grupa
         if group is not None:
@@ -193,7 +592,10 @@ class PKDHierarchy:
             return self.get_by_section(section)
         
         # Jeśli nic nie podano, zwróć wszystkie
-        return list(self.codes.values())
+        selection = self._selections.get(('all', None))
+        if selection is None:
+            selection = self._selections[('all', None)] = tuple(self.codes.values())
+        return selection
     
     def __len__(self) -> int:
         """Liczba kodów w hierarchii"""
@@ -4,16 +4,131 @@ Zawiera klasy do wczytywania hierarchii PKD i danych finansowych z CSV
 """
 
 import csv
+import hashlib
+import re
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from dataclasses import dataclass, fields
 from classes.pkd_classification import PKDCode, PKDHierarchy, PKDLevel, PKDVersion
 
 
-@dataclass
+# Komponenty danych ładowane niezależnie (przy pierwszym użyciu) i ich pliki źródłowe
+COMPONENT_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "hierarchy_2007": ("PKD_2007.csv",),
+    "hierarchy_2025": ("PKD_2025.csv",),
+    "mapper": ("MAP_PKD_2007_2025.csv", "MAP_PKD_2025_2007.csv"),
+    "financial_data": ("wsk_fin.csv",),
+    "bankruptcy_data": ("krz_pkd.csv",),
+}
+COMPONENTS = tuple(COMPONENT_SOURCES)
+
+# Wszystkie pliki źródłowe danych
+SOURCE_FILES = tuple(name for sources in COMPONENT_SOURCES.values() for name in sources)
+
+# Wersja PKD, w której zakodowane są wsk_fin.csv i krz_pkd.csv (dane do 2024 r.)
+DATA_VERSION = PKDVersion.VERSION_2007
+
+# Wersja formatu snapshotu - zmień przy każdej zmianie struktur w nim zapisanych
+SNAPSHOT_FORMAT = 17
+SNAPSHOT_PREFIX = "pkd_snapshot_"
+
+# Pliki współdzielonego zbioru danych (tryb mmap dla wielu workerów). Każdy eksport trafia
+# do nowego podkatalogu wersji, a plik CURRENT (podmieniany atomowo) wskazuje aktualny
+SHARED_CURRENT_FILE = "CURRENT"
+SHARED_VERSION_PREFIX = "v"
+SHARED_META_FILE = "meta.pkl"
+SHARED_VALUES_FILE = "financial_values.npy"
+SHARED_PRESENT_FILE = "financial_present.npy"
+# Czas (s), przez który eksport zastąpiony nowszym zostaje na dysku - workery wciąż do niego
+# podłączone doczytują z niego komponenty, zanim przeładowanie przełączy je na nowy eksport
+SHARED_EXPORT_RETENTION = 3600
+
+
+def _shared_store_files(version: PKDVersion) -> Tuple[str, str]:
+    """Pliki tablic (wartości, obecność danych) magazynu wskaźników danej wersji PKD"""
+    if version == DATA_VERSION:
+        return SHARED_VALUES_FILE, SHARED_PRESENT_FILE
+    return f"financial_values_{version.value}.npy", f"financial_present_{version.value}.npy"
+
+
+def _atomic_write(path: Path, write) -> None:
+    """
+    Zapisz plik przez plik tymczasowy + rename, żeby inne procesy nigdy nie czytały
+    połowy pliku. `write` dostaje otwarty plik binarny.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+# Mapa wskaźników wsk_fin.csv → pola FinancialMetrics.
+# Kolejność ma znaczenie: pole wybiera pierwszy klucz zawarty w nazwie wskaźnika.
+INDICATOR_FIELDS: Dict[str, str] = {
+    'EN': 'unit_count',
+    'PEN': 'profitable_units',
+    'GS': 'revenue',
+    'PNPM': 'net_revenue',
+    'GS (I)': 'revenue_from_sales',
+    'Przych. fin.': 'financial_income',
+    'PPO': 'other_operating_income',
+    'NP': 'net_income',
+    'OP': 'operating_income',
+    'POS': 'sales_income',
+    'CF': 'financial_surplus',
+    'TC': 'total_costs',
+    'OFE': 'other_financial_costs',
+    'IP': 'interest_expense',
+    'DEPR': 'depreciation',
+    'IO': 'investments',
+    'NWC': 'working_capital',
+    'C': 'cash_and_securities',
+    'LTL': 'long_term_debt',
+    'STL': 'short_term_debt',
+    'LTC': 'long_term_credits',
+    'STC': 'short_term_credits',
+    'INV': 'inventory',
+    'REC': 'short_term_receivables',
+}
+
+
+# Typ wiersza z plików PKD_*.csv → poziom hierarchii (nieznany typ = podklasa)
+LEVEL_BY_TYPE = {
+    'SEKCJA': PKDLevel.SECTION,
+    'DZIAŁ': PKDLevel.DIVISION,
+    'GRUPA': PKDLevel.GROUP,
+    'KLASA': PKDLevel.GROUP,  # Klasa to też grupa
+    'PODKLASA': PKDLevel.SUBCLASS,
+}
+
+
+def _resolve_indicator_field(wskaznik: str) -> Optional[str]:
+    """Zwróć nazwę pola FinancialMetrics dla nazwy wskaźnika z CSV"""
+    for key, field_name in INDICATOR_FIELDS.items():
+        if key in wskaznik:
+            return field_name
+    return None
+
+
+@dataclass(slots=True)
 class FinancialMetrics:
-    """Wskaźniki finansowe dla branży w danym roku"""
+    """Wskaźniki finansowe dla branży w danym roku (sloty: 25 pól bez __dict__ na instancję)"""
     year: int
     unit_count: Optional[float] = None              # EN - Liczba jednostek
     profitable_units: Optional[float] = None        # PEN - Liczba rentownych
@@ -60,6 +175,170 @@ class FinancialMetrics:
         return None
 
 
+# Pola wskaźników FinancialMetrics w kolejności osi wskaźników FinancialStore
+METRIC_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(FinancialMetrics) if f.name != 'year')
+
+
+def year_slice(years: Sequence[int], year_from: Optional[int] = None, year_to: Optional[int] = None) -> slice:
+    """Zakres lat [year_from, year_to] jako wycinek posortowanej osi lat (widok tablicy, bez kopii)"""
+    start = bisect_left(years, year_from) if year_from is not None else 0
+    end = bisect_right(years, year_to) if year_to is not None else len(years)
+    return slice(start, max(start, end))
+
+
+class FinancialStore(Mapping[str, Dict[int, FinancialMetrics]]):
+    """
+    Kolumnowy magazyn wskaźników finansowych.
+    
+    Wartości trzymane są w jednej tablicy float64 o kształcie kody × lata × wskaźniki,
+    brak danych to NaN. Jako Mapping zachowuje interfejs dawnego
+    Dict[symbol][rok] → FinancialMetrics - obiekty FinancialMetrics powstają
+    dopiero przy odczycie kodu.
+    """
+    
+    def __init__(
+        self,
+        codes: Sequence[str],
+        years: Sequence[int],
+        values: np.ndarray,
+        present: Optional[np.ndarray] = None
+    ):
+        if values.shape != (len(codes), len(years), len(METRIC_FIELDS)):
+            raise ValueError(f"Nieprawidłowy kształt tablicy wskaźników: {values.shape}")
+        
+        self.codes: List[str] = list(codes)
+        self.years: List[int] = list(years)
+        self.values = values
+        
+        # Indeksy: kod → wiersz, rok → kolumna, wskaźnik → pozycja na osi wskaźników
+        self.code_index: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self.year_index: Dict[int, int] = {year: j for j, year in enumerate(self.years)}
+        self.indicator_index: Dict[str, int] = {name: k for k, name in enumerate(METRIC_FIELDS)}
+        
+        # Rok istnieje dla kodu, jeśli ma choć jeden wskaźnik
+        self.present = present if present is not None else ~np.isnan(values).all(axis=2)
+        
+        # Sumy prefiksowe po latach (liczone przy pierwszym użyciu)
+        self._cumulative: Optional[np.ndarray] = None
+    
+    @classmethod
+    def empty(cls) -> 'FinancialStore':
+        """Pusty magazyn"""
+        return cls([], [], np.empty((0, 0, len(METRIC_FIELDS))))
+    
+    def indicator(self, name: str) -> np.ndarray:
+        """Zwróć widok kody × lata dla jednego wskaźnika"""
+        return self.values[:, :, self.indicator_index[name]]
+    
+    @property
+    def cumulative(self) -> np.ndarray:
+        """
+        Sumy prefiksowe wskaźników po latach: kody × (lata + 1) × wskaźniki, brak danych = 0.
+        Suma lat [a, b) to cumulative[:, b] - cumulative[:, a] - koszt nie zależy od długości zakresu.
+        """
+        if self._cumulative is None:
+            cumulative = np.zeros((len(self.codes), len(self.years) + 1, len(METRIC_FIELDS)))
+            np.cumsum(np.nan_to_num(self.values, nan=0.0), axis=1, out=cumulative[:, 1:])
+            self._cumulative = cumulative
+        return self._cumulative
+    
+    def _metrics_for_row(self, row: int, years: slice = slice(None)) -> Dict[int, FinancialMetrics]:
+        """Zbuduj obiekty FinancialMetrics dla lat z danymi w wierszu (opcjonalnie w wycinku lat)"""
+        offset = years.start or 0
+        block = self.values[row, years]
+        result = {}
+        for j in np.flatnonzero(self.present[row, years]):
+            year = self.years[offset + j]
+            # NaN != NaN - brak wartości zamieniamy na None
+            values = [value if value == value else None for value in block[j].tolist()]
+            result[year] = FinancialMetrics(year, *values)
+        return result
+    
+    def metrics(
+        self,
+        code: str,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> Dict[int, FinancialMetrics]:
+        """Zwróć rok → FinancialMetrics kodu w zakresie lat (obiekty tylko dla lat z wycinka)"""
+        row = self.code_index.get(code)
+        if row is None:
+            return {}
+        return self._metrics_for_row(row, year_slice(self.years, year_from, year_to))
+    
+    def range_totals(
+        self,
+        codes: Iterable[str],
+        metric_fields: Sequence[str] = METRIC_FIELDS,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> Dict[str, float]:
+        """
+        Zsumuj wskaźniki po kodach i wszystkich latach zakresu (brak danych liczony jako 0).
+        Dwa odczyty sum prefiksowych na kod - koszt nie zależy od liczby lat.
+        Powtórzone kody liczone są wielokrotnie.
+        """
+        rows = [self.code_index[code] for code in codes if code in self.code_index]
+        columns = [self.indicator_index[name] for name in metric_fields]
+        years = year_slice(self.years, year_from, year_to)
+        
+        if not rows:
+            return dict.fromkeys(metric_fields, 0.0)
+        
+        cumulative = self.cumulative
+        totals = (cumulative[rows, years.stop] - cumulative[rows, years.start]).sum(axis=0)
+        return dict(zip(metric_fields, totals[columns].tolist()))
+    
+    def aggregate(
+        self,
+        codes: Iterable[str],
+        metric_fields: Sequence[str] = METRIC_FIELDS,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> Dict[int, FinancialMetrics]:
+        """
+        Zsumuj wskaźniki po kodach (brak danych liczony jako 0).
+        Zwraca rok → FinancialMetrics z sumami dla lat, w których którykolwiek kod ma dane;
+        pola spoza metric_fields pozostają None. Powtórzone kody liczone są wielokrotnie.
+        """
+        rows = [self.code_index[code] for code in codes if code in self.code_index]
+        if not rows:
+            return {}
+        
+        columns = [self.indicator_index[name] for name in metric_fields]
+        years = year_slice(self.years, year_from, year_to)
+        totals = np.nansum(self.values[rows, years][:, :, columns], axis=0)
+        present = self.present[rows, years].any(axis=0)
+        
+        return {
+            self.years[years.start + j]: FinancialMetrics(
+                year=self.years[years.start + j],
+                **dict(zip(metric_fields, totals[j].tolist()))
+            )
+            for j in np.flatnonzero(present)
+        }
+    
+    def convert(self, crosswalk: 'PKDCrosswalk') -> 'FinancialStore':
+        """Przelicz cały magazyn na kody innej wersji PKD (jedno mnożenie macierzy rzadkiej)"""
+        codes, values = crosswalk.convert(self.codes, self.values)
+        return FinancialStore(codes, self.years, values)
+    
+    def __getitem__(self, code: str) -> Dict[int, FinancialMetrics]:
+        return self._metrics_for_row(self.code_index[code])
+    
+    def __contains__(self, code: object) -> bool:
+        return code in self.code_index
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.codes)
+    
+    def __len__(self) -> int:
+        return len(self.codes)
+    
+    def __str__(self) -> str:
+        return f"FinancialStore(codes={len(self.codes)}, years={len(self.years)}, indicators={len(METRIC_FIELDS)})"
+
+
 @dataclass
 class BankruptcyData:
     """Dane o upadłościach branży w danym roku"""
@@ -67,34 +346,189 @@ class BankruptcyData:
     bankruptcy_count: int
 
 
+# 5-znakowy kod podklasy z krz_pkd.csv ("0111Z", także małą literą "4322z")
+_KRZ_CODE = re.compile(r"(\d{2})(\d{2})([A-Za-z])")
+
+# Symbol podklasy hierarchii: klasa + końcówka ("46.72.Z")
+_SUBCLASS_SYMBOL = re.compile(r"(\d{2}\.\d{2})\.([A-Z])")
+
+
+def _krz_symbol(code: str) -> str:
+    """Zamień kod z krz_pkd.csv na symbol hierarchii: "0111Z" → "01.11.Z"; inne kody bez zmian"""
+    code = code.strip()
+    match = _KRZ_CODE.fullmatch(code)
+    if match is None:
+        return code
+    return f"{match.group(1)}.{match.group(2)}.{match.group(3).upper()}"
+
+
+class BankruptcyStore(Mapping[str, Dict[int, int]]):
+    """
+    Gęsta tablica liczby upadłości: kody (symbole hierarchii) × lata, int64.
+    
+    Seria kodu to wycinek wiersza, a lata to wszystkie lata z pliku - nowy rok w krz_pkd.csv
+    nie wymaga zmian w kodzie. Jako Mapping zachowuje interfejs Dict[symbol][rok] → liczba
+    (tylko lata z niezerową liczbą upadłości).
+    """
+    
+    def __init__(self, codes: Sequence[str], years: Sequence[int], counts: np.ndarray):
+        if counts.shape != (len(codes), len(years)):
+            raise ValueError(f"Nieprawidłowy kształt tablicy upadłości: {counts.shape}")
+        
+        self.codes: List[str] = list(codes)
+        self.years: List[int] = list(years)
+        self.counts = counts
+        self.code_index: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        
+        # Sumy prefiksowe po latach (liczone przy pierwszym użyciu)
+        self._cumulative: Optional[np.ndarray] = None
+    
+    @property
+    def cumulative(self) -> np.ndarray:
+        """Sumy prefiksowe upadłości po latach: kody × (lata + 1), int64"""
+        if self._cumulative is None:
+            cumulative = np.zeros((len(self.codes), len(self.years) + 1), dtype=np.int64)
+            np.cumsum(self.counts, axis=1, out=cumulative[:, 1:])
+            self._cumulative = cumulative
+        return self._cumulative
+    
+    def series(self, code: str, year_from: Optional[int] = None, year_to: Optional[int] = None) -> Dict[int, int]:
+        """Zwróć rok → liczba upadłości kodu (lata z niezerową liczbą, opcjonalnie w zakresie lat)"""
+        row = self.code_index.get(code)
+        if row is None:
+            return {}
+        
+        years = year_slice(self.years, year_from, year_to)
+        counts = self.counts[row, years]
+        return {self.years[years.start + j]: int(counts[j]) for j in np.flatnonzero(counts)}
+    
+    def total(self, codes: Iterable[str], year_from: Optional[int] = None, year_to: Optional[int] = None) -> int:
+        """Łączna liczba upadłości kodów w zakresie lat (sumy prefiksowe - O(1) na kod)"""
+        rows = [self.code_index[code] for code in codes if code in self.code_index]
+        if not rows:
+            return 0
+        
+        years = year_slice(self.years, year_from, year_to)
+        cumulative = self.cumulative
+        return int((cumulative[rows, years.stop] - cumulative[rows, years.start]).sum())
+    
+    def convert(self, weights: Callable[[str], Sequence[Tuple[str, float]]]) -> 'BankruptcyStore':
+        """
+        Przelicz magazyn na kody innej wersji PKD. `weights(kod)` zwraca odpowiedniki kodu
+        z wagami sumującymi się do 1. Liczby pozostają całkowite: liczba z danego roku dzielona
+        jest według wag metodą największych reszt, więc suma upadłości kodu się nie zmienia.
+        """
+        target_index: Dict[str, int] = {}
+        parts = []
+        for row, code in enumerate(self.codes):
+            targets = weights(code)
+            columns = [target_index.setdefault(target, len(target_index)) for target, _ in targets]
+            
+            # Odpowiedniki × lata: części całkowite, reszta po jednej do największych części ułamkowych
+            shares = np.outer([weight for _, weight in targets], self.counts[row])
+            split = np.floor(shares).astype(np.int64)
+            remainder = self.counts[row] - split.sum(axis=0)
+            order = np.argsort(split - shares, axis=0, kind="stable")
+            for j in np.flatnonzero(remainder):
+                split[order[:remainder[j], j], j] += 1
+            parts.append((columns, split))
+        
+        counts = np.zeros((len(target_index), len(self.years)), dtype=np.int64)
+        for columns, split in parts:
+            np.add.at(counts, columns, split)
+        return BankruptcyStore(list(target_index), self.years, counts)
+    
+    def count(self, code: str, year: int) -> int:
+        """Liczba upadłości kodu w danym roku (0 gdy brak danych)"""
+        row = self.code_index.get(code)
+        column = bisect_left(self.years, year)
+        if row is None or column == len(self.years) or self.years[column] != year:
+            return 0
+        return int(self.counts[row, column])
+    
+    def __getitem__(self, code: str) -> Dict[int, int]:
+        if code not in self.code_index:
+            raise KeyError(code)
+        return self.series(code)
+    
+    def __contains__(self, code: object) -> bool:
+        return code in self.code_index
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.codes)
+    
+    def __len__(self) -> int:
+        return len(self.codes)
+    
+    def __str__(self) -> str:
+        return f"BankruptcyStore(codes={len(self.codes)}, years={len(self.years)})"
+
+
 class PKDMapper:
     """
-    Mapowanie między wersjami PKD 2007 ↔ 2025
+    Mapowanie między wersjami PKD 2007 ↔ 2025.
+    
+    Łączy oba pliki mapowań: MAP_PKD_2007_2025.csv i (opcjonalny) MAP_PKD_2025_2007.csv.
+    Kod może mieć kilka odpowiedników (jeden-do-wielu), a kilka kodów ten sam odpowiednik
+    (wiele-do-jednego) - pełne listy są w targets_*, a mapping_* trzyma jeden, główny
+    odpowiednik używany przez translate().
     """
     
     def __init__(self, data_dir: Path):
         self.data_dir = Path(data_dir)
         self.mapping_2007_to_2025: Dict[str, str] = {}
         self.mapping_2025_to_2007: Dict[str, str] = {}
+        self.targets_2007_to_2025: Dict[str, Tuple[str, ...]] = {}
+        self.targets_2025_to_2007: Dict[str, Tuple[str, ...]] = {}
+        self._crosswalks: Dict[Tuple[PKDVersion, PKDVersion], PKDCrosswalk] = {}
         self._load_mappings()
     
+    @staticmethod
+    def _read_pairs(mapping_file: Path) -> List[Tuple[str, str]]:
+        """Wczytaj pary (symbol_2007, symbol_2025) z pliku mapowania, w kolejności wierszy"""
+        df = pd.read_csv(mapping_file, dtype=str, keep_default_na=False)
+        return list(zip(df['symbol_2007'].str.strip(), df['symbol_2025'].str.strip()))
+    
     def _load_mappings(self) -> None:
-        """Wczytaj mapowania z MAP_PKD_2007_2025.csv"""
+        """Wczytaj mapowania z MAP_PKD_2007_2025.csv i MAP_PKD_2025_2007.csv"""
         mapping_file = self.data_dir / "MAP_PKD_2007_2025.csv"
+        reverse_file = self.data_dir / "MAP_PKD_2025_2007.csv"
         
         if not mapping_file.exists():
             raise FileNotFoundError(f"Plik mapowania nie znaleziony: {mapping_file}")
         
         try:
-            df = pd.read_csv(mapping_file)
-            for _, row in df.iterrows():
-                symbol_2007 = str(row['symbol_2007']).strip()
-                symbol_2025 = str(row['symbol_2025']).strip()
-                
-                self.mapping_2007_to_2025[symbol_2007] = symbol_2025
-                self.mapping_2025_to_2007[symbol_2025] = symbol_2007
+            pairs = self._read_pairs(mapping_file)
+            reverse_pairs = self._read_pairs(reverse_file) if reverse_file.exists() else []
         except Exception as e:
             raise RuntimeError(f"Błąd wczytywania mapowania: {e}")
+        
+        # Główny odpowiednik: MAP_PKD_2007_2025.csv (ostatni wiersz wygrywa) w obu kierunkach,
+        # MAP_PKD_2025_2007.csv uzupełnia kody, których tam brakuje
+        for symbol_2007, symbol_2025 in reverse_pairs + pairs:
+            self.mapping_2007_to_2025[symbol_2007] = symbol_2025
+            self.mapping_2025_to_2007[symbol_2025] = symbol_2007
+        
+        targets_2007: Dict[str, Dict[str, None]] = {}
+        targets_2025: Dict[str, Dict[str, None]] = {}
+        for symbol_2007, symbol_2025 in pairs + reverse_pairs:
+            targets_2007.setdefault(symbol_2007, {})[symbol_2025] = None
+            targets_2025.setdefault(symbol_2025, {})[symbol_2007] = None
+        
+        self.targets_2007_to_2025 = self._with_primary_first(targets_2007, self.mapping_2007_to_2025)
+        self.targets_2025_to_2007 = self._with_primary_first(targets_2025, self.mapping_2025_to_2007)
+    
+    @staticmethod
+    def _with_primary_first(
+        targets: Dict[str, Dict[str, None]],
+        primary: Dict[str, str]
+    ) -> Dict[str, Tuple[str, ...]]:
+        """Zamień zbiory odpowiedników na krotki z głównym odpowiednikiem na początku"""
+        result = {}
+        for code, codes in targets.items():
+            first = primary[code]
+            result[code] = (first,) + tuple(target for target in codes if target != first)
+        return result
     
     def translate(self, code: str, from_version: PKDVersion, to_version: PKDVersion) -> Optional[str]:
         """Przetłumacz kod PKD między wersjami"""
@@ -109,6 +543,42 @@ class PKDMapper:
         
         return None
     
+    def translate_many(
+        self,
+        codes: Iterable[str],
+        from_version: PKDVersion,
+        to_version: PKDVersion
+    ) -> Dict[str, List[str]]:
+        """
+        Przetłumacz wiele kodów naraz.
+        Zwraca kod → lista wszystkich odpowiedników (pusta gdy brak mapowania);
+        pierwszy element listy to wynik translate().
+        """
+        if from_version == to_version:
+            return {code: [code] for code in codes}
+        
+        if from_version == PKDVersion.VERSION_2007 and to_version == PKDVersion.VERSION_2025:
+            targets = self.targets_2007_to_2025
+        elif from_version == PKDVersion.VERSION_2025 and to_version == PKDVersion.VERSION_2007:
+            targets = self.targets_2025_to_2007
+        else:
+            targets = {}
+        
+        return {code: list(targets.get(code, ())) for code in codes}
+    
+    def crosswalk(self, from_version: PKDVersion, to_version: PKDVersion) -> 'PKDCrosswalk':
+        """Zwróć (zapamiętany) ważony crosswalk do przeliczania całych serii między wersjami"""
+        key = (from_version, to_version)
+        if key not in self._crosswalks:
+            if from_version == to_version:
+                targets = {}
+            elif from_version == PKDVersion.VERSION_2007:
+                targets = self.targets_2007_to_2025
+            else:
+                targets = self.targets_2025_to_2007
+            self._crosswalks[key] = PKDCrosswalk(targets)
+        return self._crosswalks[key]
+    
     def validate_mapping(self, code: str, version: PKDVersion) -> bool:
         """Sprawdź czy kod ma mapowanie na drugą wersję"""
         if version == PKDVersion.VERSION_2007:
@@ -118,63 +588,503 @@ class PKDMapper:
         return False
 
 
+def _symbol_depth(symbol: str) -> int:
+    """Głębokość symbolu PKD: 0 sekcja, 2 dział, 3 grupa, 4 klasa, 5 podklasa ("01.11.Z")"""
+    digits = sum(char.isdigit() for char in symbol)
+    return digits + 1 if digits and symbol[-1].isalpha() else digits
+
+
+class PKDCrosswalk:
+    """
+    Ważony crosswalk między wersjami PKD do przeliczania wartości addytywnych
+    (przychody, koszty, liczba jednostek...).
+    
+    Wartość kodu źródłowego dzielona jest po równo między wszystkie jego odpowiedniki
+    (1 / liczba odpowiedników), a odpowiednik z kilku źródeł dostaje ich sumę - suma
+    po wszystkich kodach się nie zmienia. Kody bez mapowania przechodzą bez zmian.
+    
+    Brane są tylko odpowiedniki tej samej głębokości co kod źródłowy: pary międzypoziomowe
+    z MAP_PKD_2025_2007.csv (np. klasa 62.02 → grupa 62.2) przelałyby wartość klasy do grupy,
+    która i tak ma własną serię. Kod bez odpowiedników tej samej głębokości przechodzi bez zmian.
+    """
+    
+    def __init__(self, targets: Mapping[str, Sequence[str]]):
+        self.targets: Dict[str, Tuple[str, ...]] = {}
+        for code, codes in targets.items():
+            same_depth = tuple(target for target in codes if _symbol_depth(target) == _symbol_depth(code))
+            if same_depth:
+                self.targets[code] = same_depth
+    
+    def weights(self, code: str) -> List[Tuple[str, float]]:
+        """Odpowiedniki kodu z wagami (kod bez mapowania → on sam z wagą 1)"""
+        targets = self.targets.get(code) or (code,)
+        return [(target, 1.0 / len(targets)) for target in targets]
+    
+    def subclass_weights(self, symbol: str, hierarchy: PKDHierarchy) -> List[Tuple[str, float]]:
+        """
+        Odpowiedniki symbolu z wagami w kodach hierarchii docelowej. Mapowania są na poziomie
+        klas, więc podklasa ("46.72.Z") przechodzi przez odpowiedniki swojej klasy: do podklasy
+        o tej samej końcówce, a gdy jej brak - po równo na podklasy klasy docelowej (albo na
+        samą klasę, jeśli nie ma podklas).
+        """
+        match = _SUBCLASS_SYMBOL.fullmatch(symbol)
+        if match is None:
+            return self.weights(symbol)
+        
+        class_symbol, suffix = match.groups()
+        if class_symbol not in self.targets:
+            return [(symbol, 1.0)]
+        
+        result = []
+        for target, weight in self.weights(class_symbol):
+            same_suffix = f"{target}.{suffix}"
+            if same_suffix in hierarchy.codes:
+                subclasses = [same_suffix]
+            else:
+                subclasses = [
+                    code.symbol for code in hierarchy.get_by_group(target) if code.level == PKDLevel.SUBCLASS
+                ] or [target]
+            result.extend((subclass, weight / len(subclasses)) for subclass in subclasses)
+        return result
+    
+    def matrix(self, codes: Sequence[str]) -> Tuple[List[str], sparse.csr_matrix]:
+        """Zwróć kody docelowe i macierz wag (kody docelowe × kody źródłowe w kolejności `codes`)"""
+        target_index: Dict[str, int] = {}
+        rows, columns, weights = [], [], []
+        for column, code in enumerate(codes):
+            for target, weight in self.weights(code):
+                rows.append(target_index.setdefault(target, len(target_index)))
+                columns.append(column)
+                weights.append(weight)
+        
+        matrix = sparse.csr_matrix((weights, (rows, columns)), shape=(len(target_index), len(codes)))
+        return list(target_index), matrix
+    
+    def convert(self, codes: Sequence[str], values: np.ndarray) -> Tuple[List[str], np.ndarray]:
+        """
+        Przelicz tablicę kody × ... (np. kody × lata × wskaźniki) na kody docelowe.
+        NaN to brak danych: pomijany w sumie, a wynik jest NaN tylko gdy żadne źródło nie ma wartości.
+        """
+        target_codes, matrix = self.matrix(codes)
+        flat = values.reshape(len(codes), -1)
+        has_value = ~np.isnan(flat)
+        
+        converted = matrix @ np.where(has_value, flat, 0.0)
+        covered = (matrix != 0).astype(np.float64) @ has_value.astype(np.float64)
+        converted[covered == 0] = np.nan
+        return target_codes, converted.reshape((len(target_codes),) + values.shape[1:])
+
+
 class PKDDataLoader:
     """
     Główna klasa do wczytywania wszystkich danych PKD
     """
     
-    def __init__(self, data_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        data_dir: Optional[Path] = None,
+        cache_dir: Optional[Path] = None,
+        use_snapshot: bool = True,
+        shared_dir: Optional[Path] = None
+    ):
         if data_dir is None:
             data_dir = Path(__file__).parent.parent / "data"
         
         self.data_dir = Path(data_dir)
         
-        # Hierarchie
-        self.hierarchy_2007: Optional[PKDHierarchy] = None
-        self.hierarchy_2025: Optional[PKDHierarchy] = None
+        # Binarny snapshot danych (pomija parsowanie CSV przy kolejnych startach)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else self.data_dir / ".cache"
+        self.use_snapshot = use_snapshot
         
-        # Mapper
-        self.mapper: Optional[PKDMapper] = None
+        # Katalog współdzielonego zbioru danych (export_shared) mapowanego przez wszystkie workery
+        self.shared_dir = Path(shared_dir) if shared_dir is not None else None
+        self._shared_version_dir: Optional[Path] = None  # podkatalog eksportu wskazany przez CURRENT przy podłączeniu
+        self._shared_meta: Optional[dict] = None
+        self._shared_lock = threading.Lock()
         
-        # Dane finansowe: symbol → rok → FinancialMetrics
-        self.financial_data: Dict[str, Dict[int, FinancialMetrics]] = {}
+        # Załadowane komponenty: nazwa z COMPONENTS → dane. Każdy komponent ładowany
+        # jest przy pierwszym dostępie do odpowiadającego mu atrybutu:
+        #   hierarchy_2007, hierarchy_2025 - hierarchie PKD
+        #   mapper - mapowania PKD 2007 ↔ 2025
+        #   financial_data - symbol → rok → FinancialMetrics (kolumnowo w FinancialStore)
+        #   bankruptcy_data - symbol → rok → liczba upadłości
+        self._components: Dict[str, object] = {}
+        self._locks = {name: threading.Lock() for name in COMPONENTS}
         
-        # Dane o upadłościach: symbol → rok → liczba upadłości
-        self.bankruptcy_data: Dict[str, Dict[int, int]] = {}
+        # Czas ładowania komponentów: nazwa → (źródło: shared/snapshot/csv, sekundy)
+        self.load_timings: Dict[str, Tuple[str, float]] = {}
         
-        # Flaga załadowania
-        self._loaded = False
+        # Dane finansowe i upadłości przeliczone crosswalkiem na kody innych wersji niż DATA_VERSION
+        self._converted_financial_data: Dict[PKDVersion, FinancialStore] = {}
+        self._converted_bankruptcy_data: Dict[PKDVersion, BankruptcyStore] = {}
+        self._convert_lock = threading.Lock()
     
-    def load_all(self) -> None:
-        """Załaduj wszystkie dane"""
-        if self._loaded:
+    @property
+    def hierarchy_2007(self) -> PKDHierarchy:
+        return self._component("hierarchy_2007")
+    
+    @hierarchy_2007.setter
+    def hierarchy_2007(self, value: PKDHierarchy) -> None:
+        self._components["hierarchy_2007"] = value
+    
+    @property
+    def hierarchy_2025(self) -> PKDHierarchy:
+        return self._component("hierarchy_2025")
+    
+    @hierarchy_2025.setter
+    def hierarchy_2025(self, value: PKDHierarchy) -> None:
+        self._components["hierarchy_2025"] = value
+    
+    @property
+    def mapper(self) -> 'PKDMapper':
+        return self._component("mapper")
+    
+    @mapper.setter
+    def mapper(self, value: 'PKDMapper') -> None:
+        self._components["mapper"] = value
+        self._converted_financial_data = {}
+        self._converted_bankruptcy_data = {}
+    
+    @property
+    def financial_data(self) -> FinancialStore:
+        return self._component("financial_data")
+    
+    @financial_data.setter
+    def financial_data(self, value: FinancialStore) -> None:
+        self._components["financial_data"] = value
+        self._converted_financial_data = {}
+    
+    @property
+    def bankruptcy_data(self) -> BankruptcyStore:
+        return self._component("bankruptcy_data")
+    
+    @bankruptcy_data.setter
+    def bankruptcy_data(self, value: BankruptcyStore) -> None:
+        self._components["bankruptcy_data"] = value
+        self._converted_bankruptcy_data = {}
+    
+    @property
+    def _loaded(self) -> bool:
+        """Czy wszystkie komponenty są załadowane"""
+        return all(name in self._components for name in COMPONENTS)
+    
+    def loaded_components(self) -> Tuple[str, ...]:
+        """Zwróć nazwy już załadowanych komponentów (bez ładowania pozostałych)"""
+        return tuple(name for name in COMPONENTS if name in self._components)
+    
+    def preload(self, components: Iterable[str]) -> None:
+        """
+        Załaduj od razu wskazane komponenty (np. ["hierarchy_2025", "financial_data"]),
+        zamiast czekać na pierwsze zapytanie. Nieznana nazwa → ValueError.
+        
+        Komponenty są niezależne, więc ładowane są równolegle w puli wątków
+        (parsowanie CSV w pandas i odczyt plików zwalniają GIL).
+        """
+        components = list(components)
+        unknown = [name for name in components if name not in COMPONENT_SOURCES]
+        if unknown:
+            raise ValueError(
+                f"Nieznane komponenty danych: {', '.join(unknown)}. "
+                f"Dostępne: {', '.join(COMPONENTS)}"
+            )
+        
+        pending = [name for name in dict.fromkeys(components) if name not in self._components]
+        if len(pending) <= 1:
+            for name in pending:
+                self._component(name)
             return
         
-        print("Ładowanie danych PKD...")
-        self._load_pkd_hierarchies()
-        self._load_mappings()
-        self._load_financial_data()
-        self._load_bankruptcy_data()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(len(pending), os.cpu_count() or 1)) as executor:
+            # list() zbiera wyniki, żeby błąd któregokolwiek komponentu został zgłoszony
+            list(executor.map(self._component, pending))
+        
+        print(f"✓ Załadowano {len(pending)} komponentów w {time.perf_counter() - started:.2f} s:")
+        for name in pending:
+            source, seconds = self.load_timings[name]
+            print(f"    {name}: {seconds:.2f} s ({source})")
+    
+    def load_all(self) -> None:
+        """Załaduj wszystkie komponenty danych"""
+        self.preload(COMPONENTS)
+    
+    def _component(self, name: str):
+        """Zwróć komponent, ładując go przy pierwszym dostępie"""
+        try:
+            return self._components[name]
+        except KeyError:
+            pass
+        
+        with self._locks[name]:
+            if name not in self._components:
+                started = time.perf_counter()
+                source = self._load_component(name)
+                self.load_timings[name] = (source, time.perf_counter() - started)
+            return self._components[name]
+    
+    def _load_component(self, name: str) -> str:
+        """
+        Załaduj komponent: ze współdzielonego katalogu, ze snapshotu albo z CSV.
+        Zwraca źródło, z którego komponent został wczytany. W trybie współdzielonym
+        komponent pochodzi wyłącznie z eksportu - nigdy z CSV z data_dir, które może
+        zawierać inny zbiór danych.
+        """
+        if self.shared_dir is not None:
+            self._attach_shared(name)
+            return "shared"
+        
+        fingerprint = self._source_fingerprint(name) if self.use_snapshot else None
+        if fingerprint and self._load_snapshot(name, fingerprint):
+            return "snapshot"
+        
+        if name == "hierarchy_2007":
+            self._load_pkd_hierarchy(PKDVersion.VERSION_2007)
+        elif name == "hierarchy_2025":
+            self._load_pkd_hierarchy(PKDVersion.VERSION_2025)
+        elif name == "mapper":
+            self._load_mappings()
+        elif name == "financial_data":
+            self._load_financial_data()
+        else:
+            self._load_bankruptcy_data()
+        
+        if fingerprint:
+            self._write_snapshot(name, fingerprint)
+        return "csv"
+    
+    def source_signature(self) -> Tuple[Tuple[str, Optional[int], Optional[int]], ...]:
+        """
+        Tani podpis plików źródłowych (nazwa, rozmiar, mtime) do wykrywania zmian bez
+        czytania zawartości. W trybie współdzielonym podpisem jest wskaźnik CURRENT
+        (zmienia się przy każdym eksporcie).
+        """
+        if self.shared_dir is not None:
+            paths = [self.shared_dir / SHARED_CURRENT_FILE]
+        else:
+            paths = [self.data_dir / name for name in SOURCE_FILES]
         
-        self._loaded = True
-        print("✓ Dane załadowane pomyślnie")
+        signature = []
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                signature.append((path.name, None, None))
+                continue
+            signature.append((path.name, stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
     
-    def _load_pkd_hierarchies(self) -> None:
-        """Wczytaj hierarchie PKD dla obu wersji"""
-        print("  → Ładowanie hierarchii PKD...")
+    def _source_fingerprint(self, name: str) -> str:
+        """
+        Zwróć odcisk plików źródłowych komponentu: rozmiar, mtime i hash zawartości
+        każdego CSV. Brak pliku też jest częścią odcisku (pliki opcjonalne).
+        """
+        digest = hashlib.sha256(f"format={SNAPSHOT_FORMAT}:{name}".encode())
         
-        self.hierarchy_2007 = self._load_single_hierarchy(
-            PKDVersion.VERSION_2007,
-            self.data_dir / "PKD_2007.csv"
+        for source in COMPONENT_SOURCES[name]:
+            path = self.data_dir / source
+            if not path.exists():
+                digest.update(f"{source}:missing:".encode())
+                continue
+            
+            stat = path.stat()
+            digest.update(f"{source}:{stat.st_size}:{stat.st_mtime_ns}:".encode())
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        
+        return digest.hexdigest()
+    
+    def _snapshot_path(self, name: str, fingerprint: str) -> Path:
+        """Zwróć ścieżkę snapshotu komponentu dla danego odcisku plików źródłowych"""
+        return self.cache_dir / f"{SNAPSHOT_PREFIX}{name}_{fingerprint[:32]}.pkl"
+    
+    def _load_snapshot(self, name: str, fingerprint: str) -> bool:
+        """Wczytaj komponent ze snapshotu. Zwraca False jeśli brak aktualnego snapshotu."""
+        snapshot_file = self._snapshot_path(name, fingerprint)
+        if not snapshot_file.exists():
+            return False
+        
+        try:
+            with open(snapshot_file, "rb") as f:
+                snapshot = pickle.load(f)
+            
+            if snapshot.get("fingerprint") != fingerprint:
+                return False
+            
+            self._components[name] = snapshot["data"]
+        except Exception as e:
+            print(f"  ⚠ Nie udało się wczytać snapshotu {snapshot_file}: {e}")
+            return False
+        
+        print(f"✓ {name} wczytane ze snapshotu {snapshot_file.name}")
+        return True
+    
+    def _write_snapshot(self, name: str, fingerprint: str) -> None:
+        """Zapisz załadowany komponent do snapshotu i usuń jego nieaktualne snapshoty"""
+        snapshot_file = self._snapshot_path(name, fingerprint)
+        snapshot = {
+            "fingerprint": fingerprint,
+            "data": self._components[name],
+        }
+        
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            _atomic_write(
+                snapshot_file,
+                lambda f: pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+            
+            for stale in self.cache_dir.glob(f"{SNAPSHOT_PREFIX}{name}_*.pkl"):
+                if stale != snapshot_file:
+                    stale.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"  ⚠ Nie udało się zapisać snapshotu danych: {e}")
+    
+    def export_shared(self, target_dir: Path, retention: float = SHARED_EXPORT_RETENTION) -> None:
+        """
+        Zapisz zbiór danych jako katalog współdzielony przez workery.
+        Tablice wskaźników - w kodach pliku i przeliczone crosswalkiem na pozostałe wersje
+        PKD - trafiają do plików .npy mapowanych w pamięć (mmap) przez każdy proces,
+        pozostałe komponenty do osobnych plików .pkl (każdy worker wczytuje tylko te,
+        których używa).
+        
+        Pliki zapisywane są do nowego podkatalogu wersji (v<czas>), a na końcu atomowo
+        podmieniany jest wskaźnik CURRENT - workery podłączone do poprzedniego eksportu
+        nigdy nie zobaczą mieszanki starych i nowych plików. Bieżący i poprzedni eksport
+        zostają zawsze, starsze są usuwane dopiero `retention` sekund po zastąpieniu
+        nowszym - workery, które jeszcze się nie przeładowały, doczytują z nich komponenty.
+        
+        Args:
+            target_dir: Katalog współdzielony (PKD_SHARED_DATA_DIR)
+            retention: Czas (s) od zastąpienia, po którym starszy eksport jest usuwany
+        """
+        self.load_all()
+        
+        shared_dir = Path(target_dir)
+        shared_dir.mkdir(parents=True, exist_ok=True)
+        target_dir = shared_dir / f"{SHARED_VERSION_PREFIX}{time.time_ns()}"
+        target_dir.mkdir()
+        
+        financial_stores = {}
+        for version in PKDVersion:
+            store = self.get_financial_data(version)
+            values_file, present_file = _shared_store_files(version)
+            _atomic_write(
+                target_dir / values_file,
+                lambda f: np.save(f, np.ascontiguousarray(store.values, dtype=np.float64))
+            )
+            _atomic_write(
+                target_dir / present_file,
+                lambda f: np.save(f, np.ascontiguousarray(store.present))
+            )
+            financial_stores[version.value] = (store.codes, store.years)
+        
+        for name in COMPONENTS:
+            if name == "financial_data":
+                continue
+            data = self._components[name]
+            _atomic_write(
+                target_dir / f"{name}.pkl",
+                lambda f: pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+        
+        meta = {
+            "format": SNAPSHOT_FORMAT,
+            "financial_stores": financial_stores,  # wersja → (kody, lata) tablic .npy
+        }
+        _atomic_write(
+            target_dir / SHARED_META_FILE,
+            lambda f: pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
         )
         
-        self.hierarchy_2025 = self._load_single_hierarchy(
-            PKDVersion.VERSION_2025,
-            self.data_dir / "PKD_2025.csv"
+        # Przełącz wskaźnik na nowy eksport
+        current_file = shared_dir / SHARED_CURRENT_FILE
+        previous = current_file.read_text(encoding="utf-8").strip() if current_file.exists() else None
+        _atomic_write(current_file, lambda f: f.write(target_dir.name.encode("utf-8")))
+        self._prune_shared(shared_dir, keep=(target_dir.name, previous), retention=retention)
+        
+        print(f"✓ Współdzielony zbiór danych zapisany w {target_dir}")
+    
+    @staticmethod
+    def _prune_shared(shared_dir: Path, keep: Tuple[Optional[str], ...], retention: float) -> None:
+        """
+        Usuń eksporty zastąpione nowszym dawniej niż `retention` sekund temu (poza `keep`).
+        Moment zastąpienia to czas utworzenia następnego eksportu, zapisany w jego nazwie.
+        """
+        exports = []
+        for path in shared_dir.glob(f"{SHARED_VERSION_PREFIX}*"):
+            try:
+                exports.append((int(path.name[len(SHARED_VERSION_PREFIX):]), path))
+            except ValueError:
+                continue
+        exports.sort()
+        
+        now = time.time_ns()
+        for (_, path), (superseded_at, _) in zip(exports, exports[1:]):
+            if path.name not in keep and path.is_dir() and now - superseded_at >= retention * 1e9:
+                shutil.rmtree(path, ignore_errors=True)
+    
+    def _attach_shared(self, name: str) -> None:
+        """
+        Podłącz komponent ze współdzielonego zbioru danych (tylko do odczytu).
+        RuntimeError jeśli się nie udało (np. eksport usunięty albo w innym formacie).
+        """
+        try:
+            if name == "financial_data":
+                self._components[name] = self._map_shared_store(DATA_VERSION)
+            else:
+                self._read_shared_meta()
+                with open(self._shared_version_dir / f"{name}.pkl", "rb") as f:
+                    self._components[name] = pickle.load(f)
+        except Exception as e:
+            version_dir = self._shared_version_dir or self.shared_dir
+            raise RuntimeError(
+                f"Nie udało się podłączyć {name} ze współdzielonego katalogu {version_dir}: {e}"
+            ) from e
+        
+        print(f"✓ {name} podłączone ze współdzielonego katalogu {self.shared_dir}")
+    
+    def _read_shared_meta(self) -> dict:
+        """
+        Wczytaj (raz) meta współdzielonego zbioru danych i sprawdź jego format.
+        Podkatalog eksportu ustalany jest z CURRENT tylko przy pierwszym odczycie - wszystkie
+        komponenty loadera pochodzą z tego samego eksportu, nawet gdy w międzyczasie powstał nowy.
+        """
+        with self._shared_lock:
+            if self._shared_meta is None:
+                version = (self.shared_dir / SHARED_CURRENT_FILE).read_text(encoding="utf-8").strip()
+                version_dir = self.shared_dir / version
+                with open(version_dir / SHARED_META_FILE, "rb") as f:
+                    meta = pickle.load(f)
+                
+                if meta.get("format") != SNAPSHOT_FORMAT:
+                    raise ValueError(f"nieobsługiwany format {meta.get('format')}")
+                self._shared_version_dir = version_dir
+                self._shared_meta = meta
+            return self._shared_meta
+    
+    def _map_shared_store(self, version: PKDVersion) -> FinancialStore:
+        """Zmapuj w pamięć (tylko do odczytu) magazyn wskaźników danej wersji z katalogu współdzielonego"""
+        codes, years = self._read_shared_meta()["financial_stores"][version.value]
+        values_file, present_file = _shared_store_files(version)
+        values = np.load(self._shared_version_dir / values_file, mmap_mode="r")
+        present = np.load(self._shared_version_dir / present_file, mmap_mode="r")
+        return FinancialStore(codes, years, values, present=present)
+    
+    def _load_pkd_hierarchy(self, version: PKDVersion) -> None:
+        """Wczytaj hierarchię PKD dla danej wersji"""
+        print(f"  → Ładowanie hierarchii PKD {version.value}...")
+        
+        hierarchy = self._load_single_hierarchy(
+            version,
+            self.data_dir / f"PKD_{version.value}.csv"
         )
+        hierarchy.freeze()
+        
+        if version == PKDVersion.VERSION_2007:
+            self.hierarchy_2007 = hierarchy
+        else:
+            self.hierarchy_2025 = hierarchy
         
-        print(f"    ✓ PKD 2007: {len(self.hierarchy_2007)} kodów")
-        print(f"    ✓ PKD 2025: {len(self.hierarchy_2025)} kodów")
+        print(f"    ✓ PKD {version.value}: {len(hierarchy)} kodów")
     
     def _load_single_hierarchy(self, version: PKDVersion, file_path: Path) -> PKDHierarchy:
         """Wczytaj hierarchię z jednego pliku CSV"""
@@ -184,58 +1094,96 @@ class PKDDataLoader:
             raise FileNotFoundError(f"Plik hierarchii nie znaleziony: {file_path}")
         
         try:
-            df = pd.read_csv(file_path)
+            df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+            typ = df['typ'].str.strip()
+            symbols = df['symbol'].str.strip()
+            names = df['nazwa'].str.strip()
             
-            # Śledzimy aktualną sekcję i dział, bo w CSV sekcja jest podana raz, a kolejne wiersze dziedziczą ją kontekstowo
-            current_section = None
-            current_division = None
+            levels = typ.map(LEVEL_BY_TYPE).fillna(PKDLevel.SUBCLASS)
+            section, division, group, subclass = self._parse_symbols(symbols)
             
-            for _, row in df.iterrows():
-                typ = str(row['typ']).strip()
-                symbol = str(row['symbol']).strip()
-                nazwa = str(row['nazwa']).strip()
-                
-                level_map = {
-                    'SEKCJA': PKDLevel.SECTION,
-                    'DZIAŁ': PKDLevel.DIVISION,
-                    'GRUPA': PKDLevel.GROUP,
-                    'KLASA': PKDLevel.GROUP,  # Klasa to też grupa
-                    'PODKLASA': PKDLevel.SUBCLASS,
-                }
-                level = level_map.get(typ, PKDLevel.SUBCLASS)
-                
-                section, division, group, subclass = self._parse_symbol(symbol)
-                
-                if level == PKDLevel.SECTION:
-                    current_section = section
-                    current_division = None
-                elif level == PKDLevel.DIVISION:
-                    current_division = division
-                    if section is None:
-                        section = current_section
-                else:  # GROUP lub SUBCLASS
-                    if section is None:
-                        section = current_section
-                    if division is None:
-                        division = current_division
-                
-                code = PKDCode(
+            # W CSV sekcja i dział podane są raz, a kolejne wiersze dziedziczą je kontekstowo:
+            # sekcja obowiązuje do następnej sekcji, dział do następnego działu lub sekcji.
+            # Znaczniki ("" = jawny brak) ustawiane są w wierszach sekcji/działów i przepisywane w dół.
+            is_section = levels == PKDLevel.SECTION
+            is_division = levels == PKDLevel.DIVISION
+            current_section = section.fillna("").where(is_section).ffill()
+            current_division = division.fillna("").where(is_division, "").where(is_section | is_division).ffill()
+            
+            # Sekcja uzupełniana poza wierszami sekcji, dział tylko w grupach i podklasach
+            section = section.where(
+                is_section | section.notna(),
+                current_section.where(current_section != "")
+            )
+            division = division.where(
+                is_section | is_division | division.notna(),
+                current_division.where(current_division != "")
+            )
+            
+            # Kolumny jako listy Pythona z None zamiast NaN. Napisy są internowane, więc
+            # powtarzające się symbole sekcji/działów/grup to jeden obiekt we wszystkich kodach i indeksach
+            symbol_list = [sys.intern(symbol) for symbol in symbols.tolist()]
+            columns = {
+                name: [
+                    sys.intern(value) if value is not None else None
+                    for value in column.astype(object).where(column.notna(), None).tolist()
+                ]
+                for name, column in (
+                    ('section', section),
+                    ('division', division),
+                    ('group', group),
+                    ('subclass', subclass),
+                )
+            }
+            
+            codes = [
+                PKDCode(
                     symbol=symbol,
-                    name=nazwa,
+                    name=name,
                     level=level,
-                    section=section,
-                    division=division,
-                    group=group,
-                    subclass=subclass
+                    section=code_section,
+                    division=code_division,
+                    group=code_group,
+                    subclass=code_subclass
                 )
-                
-                hierarchy.add_code(code)
+                for symbol, name, level, code_section, code_division, code_group, code_subclass in zip(
+                    symbol_list, names.tolist(), levels.tolist(), *columns.values()
+                )
+            ]
+            
+            # Indeksy wypełniane hurtowo z kolumn, w kolejności wierszy pliku
+            hierarchy.codes = dict(zip(symbol_list, codes))
+            indexes = {
+                'section': hierarchy.section_index,
+                'division': hierarchy.division_index,
+                'group': hierarchy.group_index,
+                'subclass': hierarchy.subclass_index,
+            }
+            for column, index in indexes.items():
+                for key, symbol in zip(columns[column], symbol_list):
+                    if key:
+                        index.setdefault(key, []).append(symbol)
         
         except Exception as e:
             raise RuntimeError(f"Błąd wczytywania hierarchii z {file_path}: {e}")
         
         return hierarchy
     
+    def _parse_symbols(self, symbols: pd.Series) -> Tuple[pd.Series, pd.Series, pd.Series, pd.Series]:
+        """Wektorowa wersja _parse_symbol: kolumny (sekcja, dział, grupa, podklasa), brak = NaN"""
+        is_section = (symbols.str.len() == 1) & symbols.str.isalpha()
+        has_dot = ~is_section & symbols.str.contains('.', regex=False)
+        is_division = ~is_section & ~has_dot & symbols.str.isdigit()
+        
+        parts = symbols.str.split('.')
+        first = parts.str[0]
+        
+        section = symbols.where(is_section)
+        division = first.where(has_dot | is_division)
+        group = (first + '.' + parts.str[1]).where(has_dot)
+        subclass = parts.str[2].where(has_dot)
+        return section, division, group, subclass
+    
     def _parse_symbol(self, symbol: str) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
         """
         Parsuj symbol PKD na komponenty hierarchii
@@ -294,6 +1242,15 @@ class PKDDataLoader:
         
         return code
     
+    def _normalize_pkd_keys(self, codes: pd.Series) -> pd.Series:
+        """Wektorowa wersja _normalize_pkd_key dla całej kolumny PKD"""
+        codes = codes.astype(str).str.strip()
+        is_section = codes.str.startswith('SEK_')
+        has_trailing_dot = ~is_section & codes.str.endswith('.') & (codes.str.len() >= 3)
+        
+        codes = codes.where(~is_section, codes.str[4:])
+        return codes.where(~has_trailing_dot, codes.str[:-1])
+    
     def _load_financial_data(self) -> None:
         """Wczytaj dane finansowe z wsk_fin.csv"""
         print("  → Ładowanie danych finansowych...")
@@ -308,72 +1265,41 @@ class PKDDataLoader:
             
             # Kolumny z latami
             year_columns = [col for col in df.columns if col.isdigit()]
-            years = sorted([int(col) for col in year_columns])
             
-            for _, row in df.iterrows():
-                pkd = self._normalize_pkd_key(str(row['PKD']))
-                wskaznik = str(row['WSKAZNIK']).strip()
-                
-                if pkd not in self.financial_data:
-                    self.financial_data[pkd] = {}
-                
-                # Mapa wskaźników
-                indicator_map = {
-                    'EN': 'unit_count',
-                    'PEN': 'profitable_units',
-                    'GS': 'revenue',
-                    'PNPM': 'net_revenue',
-                    'GS (I)': 'revenue_from_sales',
-                    'Przych. fin.': 'financial_income',
-                    'PPO': 'other_operating_income',
-                    'NP': 'net_income',
-                    'OP': 'operating_income',
-                    'POS': 'sales_income',
-                    'CF': 'financial_surplus',
-                    'TC': 'total_costs',
-                    'OFE': 'other_financial_costs',
-                    'IP': 'interest_expense',
-                    'DEPR': 'depreciation',
-                    'IO': 'investments',
-                    'NWC': 'working_capital',
-                    'C': 'cash_and_securities',
-                    'LTL': 'long_term_debt',
-                    'STL': 'short_term_debt',
-                    'LTC': 'long_term_credits',
-                    'STC': 'short_term_credits',
-                    'INV': 'inventory',
-                    'REC': 'short_term_receivables',
-                }
-                
-                # Pobierz kod pola z mapy
-                field_name = None
-                for key, value in indicator_map.items():
-                    if key in wskaznik:
-                        field_name = value
-                        break
-                
-                if field_name:
-                    # Dla każdego roku
-                    for year in years:
-                        year_str = str(year)
-                        if year_str in row:
-                            value = row[year_str]
-                            
-                            # Pomiń 'bd' (brak danych) i wartości puste
-                            if pd.isna(value) or value == 'bd':
-                                continue
-                            
-                            try:
-                                value = float(value)
-                            except (ValueError, TypeError):
-                                continue
-                            
-                            # Inicjalizuj FinancialMetrics dla roku jeśli nie istnieje
-                            if year not in self.financial_data[pkd]:
-                                self.financial_data[pkd][year] = FinancialMetrics(year=year)
-                            
-                            # Ustaw wartość pola
-                            setattr(self.financial_data[pkd][year], field_name, value)
+            # Normalizacja kluczy PKD i mapowanie wskaźników na całych kolumnach
+            df['PKD'] = self._normalize_pkd_keys(df['PKD'])
+            wskazniki = df['WSKAZNIK'].astype(str).str.strip()
+            field_lookup = {w: _resolve_indicator_field(w) for w in wskazniki.unique()}
+            df['field'] = wskazniki.map(field_lookup)
+            
+            # Każdy kod z pliku ma wiersz, nawet jeśli nie ma żadnych wartości
+            codes = list(df['PKD'].unique())
+            years = sorted(int(col) for col in year_columns)
+            
+            # Jeden wiersz na (kod, wskaźnik, rok); 'bd' i puste wartości odpadają jako NaN
+            long_df = df[['PKD', 'field'] + year_columns].melt(
+                id_vars=['PKD', 'field'],
+                var_name='year',
+                value_name='value'
+            )
+            long_df['value'] = pd.to_numeric(long_df['value'], errors='coerce')
+            long_df = long_df[long_df['field'].notna() & long_df['value'].notna()]
+            
+            # Przy powtórzonym wskaźniku wygrywa ostatni wiersz pliku
+            long_df = long_df.drop_duplicates(subset=['PKD', 'year', 'field'], keep='last')
+            
+            code_index = {code: i for i, code in enumerate(codes)}
+            year_index = {col: years.index(int(col)) for col in year_columns}
+            field_index = {name: k for k, name in enumerate(METRIC_FIELDS)}
+            
+            values = np.full((len(codes), len(years), len(METRIC_FIELDS)), np.nan)
+            values[
+                long_df['PKD'].map(code_index).to_numpy(),
+                long_df['year'].map(year_index).to_numpy(),
+                long_df['field'].map(field_index).to_numpy(),
+            ] = long_df['value'].to_numpy(dtype=float)
+            
+            self.financial_data = FinancialStore(codes, years, values)
             
             print(f"    ✓ Dane finansowe dla {len(self.financial_data)} kodów PKD załadowane")
         
@@ -389,18 +1315,21 @@ class PKDDataLoader:
             raise FileNotFoundError(f"Plik danych o upadłościach nie znaleziony: {bankruptcy_file}")
         
         try:
-            df = pd.read_csv(bankruptcy_file, sep=';')
+            df = pd.read_csv(bankruptcy_file, sep=';', dtype={'pkd': str})
             
-            for _, row in df.iterrows():
-                rok = int(row['rok'])
-                pkd = str(row['pkd']).strip()
-                liczba_upadlosci = int(row['liczba_upadlosci'])
-                
-                if pkd not in self.bankruptcy_data:
-                    self.bankruptcy_data[pkd] = {}
-                
-                self.bankruptcy_data[pkd][rok] = liczba_upadlosci
+            # Kody krz ("0111Z", "4322z") → symbole hierarchii ("01.11.Z"); wiersze tego
+            # samego kodu i roku po normalizacji są sumowane
+            df['pkd'] = df['pkd'].map(_krz_symbol)
+            df['rok'] = df['rok'].astype(int)
+            counts = df.pivot_table(
+                index='pkd', columns='rok', values='liczba_upadlosci', aggfunc='sum', fill_value=0, sort=False
+            ).sort_index(axis=1)
             
+            self.bankruptcy_data = BankruptcyStore(
+                counts.index.tolist(),
+                [int(year) for year in counts.columns],
+                counts.to_numpy(dtype=np.int64)
+            )
             print(f"    ✓ Dane o upadłościach dla {len(self.bankruptcy_data)} kodów PKD załadowane")
         
         except Exception as e:
@@ -408,48 +1337,107 @@ class PKDDataLoader:
     
     def get_hierarchy(self, version: PKDVersion) -> PKDHierarchy:
         """Zwróć hierarchię dla danej wersji"""
-        if not self._loaded:
-            self.load_all()
         
         if version == PKDVersion.VERSION_2007:
             return self.hierarchy_2007
         else:
             return self.hierarchy_2025
     
-    def get_financial_metrics(self, pkd: str, year: Optional[int] = None) -> Dict[int, FinancialMetrics]:
-        """Zwróć metryki finansowe dla kodu PKD"""
-        if not self._loaded:
-            self.load_all()
+    def get_financial_data(self, version: Optional[PKDVersion] = None) -> FinancialStore:
+        """
+        Zwróć dane finansowe w kodach danej wersji PKD (domyślnie DATA_VERSION - kody z pliku).
+        Dla innej wersji cały magazyn przeliczany jest crosswalkiem z mapowań przy pierwszym
+        użyciu i zapamiętywany, więc kolejne zapytania są tak samo szybkie jak w wersji danych.
+        W trybie współdzielonym przeliczony magazyn mapowany jest z plików export_shared() -
+        workery nie trzymają własnych kopii.
+        """
+        if version is None or version == DATA_VERSION:
+            return self.financial_data
         
-        if pkd not in self.financial_data:
-            return {}
+        converted = self._converted_financial_data.get(version)
+        if converted is None:
+            with self._convert_lock:
+                converted = self._converted_financial_data.get(version)
+                if converted is None:
+                    converted = self._attach_converted_store(version)
+                    if converted is None:
+                        crosswalk = self.mapper.crosswalk(DATA_VERSION, version)
+                        converted = self.financial_data.convert(crosswalk)
+                    self._converted_financial_data[version] = converted
+        return converted
+    
+    def get_bankruptcy_data(self, version: Optional[PKDVersion] = None) -> BankruptcyStore:
+        """
+        Zwróć upadłości w kodach danej wersji PKD (domyślnie DATA_VERSION - kody z krz_pkd.csv).
+        Dla innej wersji magazyn przeliczany jest tym samym crosswalkiem co dane finansowe
+        (podklasy przez odpowiedniki swoich klas, PKDCrosswalk.subclass_weights) przy pierwszym
+        użyciu i zapamiętywany.
+        """
+        if version is None or version == DATA_VERSION:
+            return self.bankruptcy_data
+        
+        converted = self._converted_bankruptcy_data.get(version)
+        if converted is None:
+            with self._convert_lock:
+                converted = self._converted_bankruptcy_data.get(version)
+                if converted is None:
+                    crosswalk = self.mapper.crosswalk(DATA_VERSION, version)
+                    hierarchy = self.get_hierarchy(version)
+                    converted = self.bankruptcy_data.convert(
+                        lambda code: crosswalk.subclass_weights(code, hierarchy)
+                    )
+                    self._converted_bankruptcy_data[version] = converted
+        return converted
+    
+    def _attach_converted_store(self, version: PKDVersion) -> Optional[FinancialStore]:
+        """
+        Zmapuj przeliczony magazyn wersji z katalogu współdzielonego. None poza trybem
+        współdzielonym albo gdy dane w kodach pliku nie pochodzą z tego samego katalogu.
+        """
+        financial_data = self.financial_data
+        if self.shared_dir is None or self.load_timings.get("financial_data", ("",))[0] != "shared":
+            return None
         
-        data = self.financial_data[pkd]
+        try:
+            converted = self._map_shared_store(version)
+        except Exception as e:
+            print(f"  ⚠ Nie udało się podłączyć danych PKD {version.value} z {self.shared_dir}: {e}")
+            return None
         
+        if converted.years != financial_data.years:
+            return None
+        return converted
+    
+    def get_financial_metrics(
+        self,
+        pkd: str,
+        year: Optional[int] = None,
+        version: Optional[PKDVersion] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> Dict[int, FinancialMetrics]:
+        """
+        Zwróć metryki finansowe dla kodu PKD (w kodach danej wersji, domyślnie DATA_VERSION).
+        year wybiera jeden rok, year_from/year_to - zakres lat (wycinek osi lat w magazynie).
+        """
         if year is not None:
-            return {year: data[year]} if year in data else {}
+            year_from = year_to = year
         
-        return data
+        return self.get_financial_data(version).metrics(pkd, year_from, year_to)
     
     def get_bankruptcy_count(self, pkd: str, year: int) -> int:
-        """Zwróć liczbę upadłości dla kodu PKD w danym roku"""
-        if not self._loaded:
-            self.load_all()
-        
-        if pkd not in self.bankruptcy_data:
-            return 0
-        
-        return self.bankruptcy_data[pkd].get(year, 0)
+        """Zwróć liczbę upadłości dla kodu PKD w danym roku (symbol hierarchii lub kod krz, np. "0111Z")"""
+        return self.bankruptcy_data.count(_krz_symbol(pkd), year)
     
     def __str__(self) -> str:
-        if not self._loaded:
+        loaded = self.loaded_components()
+        if not loaded:
             return "PKDDataLoader(not loaded)"
         
-        return (
-            f"PKDDataLoader("
-            f"hierarchy_2007={len(self.hierarchy_2007)}, "
-            f"hierarchy_2025={len(self.hierarchy_2025)}, "
-            f"financial_codes={len(self.financial_data)}, "
-            f"bankruptcy_codes={len(self.bankruptcy_data)}"
-            f")"
-        )
+        sizes = []
+        for name in loaded:
+            data = self._components[name]
+            size = len(data.mapping_2007_to_2025) if name == "mapper" else len(data)
+            sizes.append(f"{name}={size}")
+        return f"PKDDataLoader({', '.join(sizes)})"
+
@@ -3,89 +3,297 @@ PKD Data Service Module
 Główny serwis do pobierania i przetwarzania danych PKD
 """
 
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
-from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
-from classes.pkd_classification import PKDVersion, PKDCode
+import numpy as np
+
+from classes.pkd_classification import PKDVersion, PKDCode, PKDHierarchy
 from classes.pkd_data_loader import (
     PKDDataLoader,
+    COMPONENTS,
+    METRIC_FIELDS,
     FinancialMetrics,
-    BankruptcyData
+    FinancialStore,
+    BankruptcyData,
+    BankruptcyStore,
+    year_slice
 )
+from classes.pkd_rollup import RollupCube
+from classes.result_cache import ResultCache
 
 
-@dataclass
 class IndustryData:
     """
-    Dane dla wybranej branży/branż
+    Dane dla wybranej branży/branż.
+    
+    Z get_data() to leniwy widok na magazyny loadera: wybrane kody, kandydujące serie
+    (czysty symbol, kod serii) z ich wierszami w FinancialStore, symbole z wierszem
+    w BankruptcyStore i zakres lat. Słowniki financial_data, bankruptcy_data i series_codes
+    oraz lista lat powstają przy pierwszym odczycie i są zapamiętywane - zapytanie, które
+    ich nie czyta, niczego nie kopiuje. Dane można też podać wprost (gotowe słowniki).
+    Obiekt jest współdzielony przez cache wyników - tylko do odczytu.
     """
-    pkd_codes: List[PKDCode]  # Wybrane kody PKD
-    financial_data: Dict[str, Dict[int, FinancialMetrics]] = field(default_factory=dict)
-    bankruptcy_data: Dict[str, Dict[int, int]] = field(default_factory=dict)
-    query_params: Dict = field(default_factory=dict)
-    version: PKDVersion = PKDVersion.VERSION_2025
+    
+    def __init__(
+        self,
+        pkd_codes: Sequence[PKDCode],
+        financial_data: Optional[Dict[str, Dict[int, FinancialMetrics]]] = None,
+        bankruptcy_data: Optional[Dict[str, Dict[int, int]]] = None,
+        query_params: Optional[Dict] = None,
+        version: PKDVersion = PKDVersion.VERSION_2025,
+        series_codes: Optional[Dict[str, str]] = None  # symbol w financial_data → kod w FinancialStore wersji `version`
+    ):
+        self.pkd_codes = pkd_codes  # Wybrane kody PKD (krotka współdzielona z hierarchią)
+        self.query_params = query_params if query_params is not None else {}
+        self.version = version
+        
+        # Zmaterializowane dane (None - jeszcze nie zbudowane z widoku)
+        self._financial_data = financial_data if financial_data is not None else {}
+        self._bankruptcy_data = bankruptcy_data if bankruptcy_data is not None else {}
+        self._series_codes = series_codes if series_codes is not None else {}
+        self._years: Optional[List[int]] = None
+        
+        # Widok na magazyny loadera (tylko dla danych z get_data)
+        self._store: Optional[FinancialStore] = None
+        self._series: Sequence[Tuple[str, str]] = ()
+        self._series_rows = np.empty(0, dtype=np.intp)
+        self._series_mask: Optional[np.ndarray] = None
+        self._bankruptcies: Optional[BankruptcyStore] = None
+        self._bankruptcy_symbols: Sequence[str] = ()
+        self._year_from: Optional[int] = None
+        self._year_to: Optional[int] = None
+    
+    @classmethod
+    def view(
+        cls,
+        pkd_codes: Sequence[PKDCode],
+        store: FinancialStore,
+        series: Sequence[Tuple[str, str]],
+        bankruptcies: BankruptcyStore,
+        bankruptcy_symbols: Sequence[str],
+        query_params: Dict,
+        version: PKDVersion,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> 'IndustryData':
+        """
+        Utwórz leniwy widok.
+        
+        Args:
+            series: (czysty symbol, kod serii w store) - kandydaci, bez sprawdzenia lat
+            bankruptcy_symbols: Symbole kodów obecne w bankruptcies
+        """
+        data = cls(pkd_codes, query_params=query_params, version=version)
+        data._financial_data = data._bankruptcy_data = data._series_codes = None
+        data._store = store
+        data._series = series
+        data._series_rows = np.fromiter(
+            (store.code_index[series_code] for _, series_code in series), dtype=np.intp, count=len(series)
+        )
+        data._bankruptcies = bankruptcies
+        data._bankruptcy_symbols = bankruptcy_symbols
+        data._year_from = year_from
+        data._year_to = year_to
+        return data
+    
+    def _series_with_data(self) -> np.ndarray:
+        """Maska serii mających dane w zakresie lat (liczona raz)"""
+        if self._series_mask is None:
+            years = year_slice(self._store.years, self._year_from, self._year_to)
+            self._series_mask = self._store.present[self._series_rows, years].any(axis=1)
+        return self._series_mask
+    
+    @property
+    def financial_data(self) -> Dict[str, Dict[int, FinancialMetrics]]:
+        """Czysty symbol → rok → FinancialMetrics (tylko serie z danymi w zakresie lat)"""
+        if self._financial_data is None:
+            self._financial_data = {
+                clean_symbol: self._store.metrics(series_code, self._year_from, self._year_to)
+                for (clean_symbol, series_code), has_data in zip(self._series, self._series_with_data())
+                if has_data
+            }
+        return self._financial_data
+    
+    @property
+    def series_codes(self) -> Dict[str, str]:
+        """Czysty symbol z financial_data → kod serii w FinancialStore wersji `version`"""
+        if self._series_codes is None:
+            self._series_codes = {
+                clean_symbol: series_code
+                for (clean_symbol, series_code), has_data in zip(self._series, self._series_with_data())
+                if has_data
+            }
+        return self._series_codes
+    
+    @property
+    def bankruptcy_data(self) -> Dict[str, Dict[int, int]]:
+        """Symbol → rok → liczba upadłości (tylko kody z upadłościami w zakresie lat)"""
+        if self._bankruptcy_data is None:
+            bankruptcy_data = {}
+            for symbol in self._bankruptcy_symbols:
+                series = self._bankruptcies.series(symbol, self._year_from, self._year_to)
+                if series:
+                    bankruptcy_data[symbol] = series
+            self._bankruptcy_data = bankruptcy_data
+        return self._bankruptcy_data
     
     def get_all_years(self) -> List[int]:
-        """Zwróć listę wszystkich lat dostępnych w danych"""
-        years = set()
-        for years_dict in self.financial_data.values():
-            years.update(years_dict.keys())
-        return sorted(list(years))
+        """Zwróć listę wszystkich lat dostępnych w danych (liczona raz)"""
+        if self._years is None:
+            if self._store is not None:
+                # Z tablicy obecności - bez budowania FinancialMetrics
+                years = year_slice(self._store.years, self._year_from, self._year_to)
+                present = self._store.present[self._series_rows, years].any(axis=0)
+                self._years = [self._store.years[years.start + j] for j in np.flatnonzero(present)]
+            else:
+                years = set()
+                for years_dict in self._financial_data.values():
+                    years.update(years_dict.keys())
+                self._years = sorted(years)
+        return list(self._years)
     
-    def get_summary_statistics(self, year: Optional[int] = None) -> Dict:
+    def aggregate(
+        self,
+        metric_fields: Sequence[str] = METRIC_FIELDS,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> Dict[int, FinancialMetrics]:
         """
-        Zwróć podsumowanie statystyk dla wybranych kodów
+        Zsumuj wskaźniki serii branży rok po roku (brak danych liczony jako 0), w zakresie lat
+        zawężonym do zakresu widoku. Widok sumuje w magazynie, z którego powstał - wynik
+        zawsze pochodzi z tego samego zbioru danych co financial_data, także po przeładowaniu.
         """
+        if self._year_from is not None:
+            year_from = self._year_from if year_from is None else max(year_from, self._year_from)
+        if self._year_to is not None:
+            year_to = self._year_to if year_to is None else min(year_to, self._year_to)
+        
+        if self._store is not None:
+            return self._store.aggregate(self.series_codes.values(), metric_fields, year_from, year_to)
+        
+        totals: Dict[int, Dict[str, float]] = {}
+        for history in self._financial_data.values():
+            for y, metrics in history.items():
+                if (year_from is None or y >= year_from) and (year_to is None or y <= year_to):
+                    year_totals = totals.setdefault(y, dict.fromkeys(metric_fields, 0.0))
+                    for name in metric_fields:
+                        year_totals[name] += getattr(metrics, name) or 0.0
+        return {y: FinancialMetrics(year=y, **totals[y]) for y in sorted(totals)}
+    
+    def _year_bounds(self, year: Optional[int]) -> Tuple[Optional[int], Optional[int]]:
+        """Zakres lat podsumowania: zakres widoku, zawężony do jednego roku gdy podany"""
+        if year is None:
+            return self._year_from, self._year_to
+        if (self._year_from is not None and year < self._year_from) or (self._year_to is not None and year > self._year_to):
+            return year, year - 1  # rok spoza zakresu widoku - pusty wycinek
+        return year, year
+    
+    def _summary_values(self, year: Optional[int]) -> Tuple[List[int], np.ndarray]:
+        """
+        Lata i tablica serie × lata × wskaźniki (NaN = brak) dla podsumowania.
+        Dla widoku to wycinek magazynu, dla danych podanych wprost - tablica zbudowana ze słowników.
+        """
+        if self._store is not None:
+            years = year_slice(self._store.years, *self._year_bounds(year))
+            rows = self._series_rows[self._series_with_data()]
+            return self._store.years[years], self._store.values[rows, years]
+        
+        years = self.get_all_years() if year is None else [year]
+        year_index = {y: j for j, y in enumerate(years)}
+        values = np.full((len(self._financial_data), len(years), len(METRIC_FIELDS)), np.nan)
+        for i, history in enumerate(self._financial_data.values()):
+            for y, metrics in history.items():
+                if y in year_index:
+                    values[i, year_index[y]] = [getattr(metrics, name) for name in METRIC_FIELDS]
+        return years, values
+    
+    def _bankruptcies_by_year(self, year: Optional[int]) -> Dict[int, int]:
+        """Rok → łączna liczba upadłości wybranych kodów"""
+        if self._bankruptcies is not None:
+            years = year_slice(self._bankruptcies.years, *self._year_bounds(year))
+            rows = [self._bankruptcies.code_index[symbol] for symbol in self._bankruptcy_symbols]
+            counts = self._bankruptcies.counts[rows, years].sum(axis=0)
+            return {self._bankruptcies.years[years.start + j]: int(counts[j]) for j in np.flatnonzero(counts)}
+        
+        totals: Dict[int, int] = {}
+        for data in self._bankruptcy_data.values():
+            for y, count in data.items():
+                if year is None or y == year:
+                    totals[y] = totals.get(y, 0) + count
+        return dict(sorted(totals.items()))
+    
+    def get_summary_statistics(self, year: Optional[int] = None, per_year: bool = False) -> Dict:
+        """
+        Zwróć podsumowanie statystyk dla wybranych kodów.
+        
+        Liczone redukcjami na tablicy serie × lata × wskaźniki (bez budowania FinancialMetrics).
+        Brak danych (NaN) jest pomijany, zera liczą się do średnich i median.
+        
+        Args:
+            year: Tylko ten rok (domyślnie wszystkie lata zakresu)
+            per_year: Dołącz rozbicie na lata ("per_year": rok → sumy, upadłości, liczba serii)
+        
+        Returns:
+            Słownik z sumami głównych wskaźników (total_*), liczbą kodów i serii, latami oraz
+            "totals", "means" i "medians" dla wszystkich pól FinancialMetrics
+        """
+        years, values = self._summary_values(year)
+        bankruptcies = self._bankruptcies_by_year(year)
+        
+        observed = ~np.isnan(values)
+        counts = observed.sum(axis=(0, 1))
+        totals = np.nansum(values, axis=(0, 1))
+        
+        # Średnie i mediany tylko dla wskaźników z jakąkolwiek obserwacją (bez ostrzeżeń numpy o pustych)
+        means: Dict[str, Optional[float]] = dict.fromkeys(METRIC_FIELDS)
+        medians: Dict[str, Optional[float]] = dict.fromkeys(METRIC_FIELDS)
+        with_data = np.flatnonzero(counts)
+        if len(with_data):
+            flat = values.reshape(-1, len(METRIC_FIELDS))[:, with_data]
+            means_arr = totals[with_data] / counts[with_data]
+            medians_arr = np.nanmedian(flat, axis=0)
+            for k, mean, median in zip(with_data, means_arr.tolist(), medians_arr.tolist()):
+                means[METRIC_FIELDS[k]] = mean
+                medians[METRIC_FIELDS[k]] = median
+        
+        totals_by_field = dict(zip(METRIC_FIELDS, totals.tolist()))
+        series_with_data = observed.any(axis=2)
+        year_has_data = series_with_data.any(axis=0)
+        
         summary = {
-            "total_revenue": 0,
-            "total_net_income": 0,
-            "total_units": 0,
-            "total_profitable_units": 0,
-            "total_bankruptcies": 0,
+            "total_revenue": totals_by_field["revenue"],
+            "total_net_income": totals_by_field["net_income"],
+            "total_units": totals_by_field["unit_count"],
+            "total_profitable_units": totals_by_field["profitable_units"],
+            "total_bankruptcies": sum(bankruptcies.values()),
             "num_codes": len(self.pkd_codes),
+            "num_series": int(series_with_data.any(axis=1).sum()),
+            "years": [y for y, has_data in zip(years, year_has_data) if has_data],
+            "totals": totals_by_field,
+            "means": means,
+            "medians": medians,
         }
         
-        for pkd_symbol in self.financial_data:
-            data = self.financial_data[pkd_symbol]
-            
-            if year is not None:
-                if year not in data:
-                    continue
-                metrics = data[year]
-                years_to_process = [year]
-            else:
-                years_to_process = list(data.keys())
-                metrics = data[max(data.keys())] if data else None
-            
-            for y in years_to_process:
-                if y not in data:
-                    continue
-                m = data[y]
-                
-                if m.revenue:
-                    summary["total_revenue"] += m.revenue
-                if m.net_income:
-                    summary["total_net_income"] += m.net_income
-                if m.unit_count:
-                    summary["total_units"] += m.unit_count
-                if m.profitable_units:
-                    summary["total_profitable_units"] += m.profitable_units
-        
-        # Upadłości
-        for pkd_symbol in self.bankruptcy_data:
-            data = self.bankruptcy_data[pkd_symbol]
-            
-            if year is not None:
-                if year in data:
-                    summary["total_bankruptcies"] += data[year]
-            else:
-                summary["total_bankruptcies"] += sum(data.values())
+        if per_year:
+            year_totals = np.nansum(values, axis=0)
+            year_series = series_with_data.sum(axis=0)
+            summary["per_year"] = {
+                y: {
+                    "totals": dict(zip(METRIC_FIELDS, year_totals[j].tolist())),
+                    "bankruptcies": bankruptcies.get(y, 0),
+                    "num_series": int(year_series[j]),
+                }
+                for j, y in enumerate(years)
+                if year_has_data[j] or y in bankruptcies
+            }
         
         return summary
     
     def __str__(self) -> str:
-        years_str = f"{min(self.get_all_years())}-{max(self.get_all_years())}" if self.get_all_years() else "N/A"
+        years = self.get_all_years()
+        years_str = f"{years[0]}-{years[-1]}" if years else "N/A"
         return (
             f"IndustryData("
             f"codes={len(self.pkd_codes)}, "
@@ -101,10 +309,152 @@ class PKDDataService:
     Implementuje interfejs get_data() z walidacją hierarchii
     """
     
-    def __init__(self, data_dir: Optional[Path] = None, default_version: PKDVersion = PKDVersion.VERSION_2025):
-        self.loader = PKDDataLoader(data_dir)
+    def __init__(
+        self,
+        data_dir: Optional[Path] = None,
+        default_version: PKDVersion = PKDVersion.VERSION_2025,
+        shared_dir: Optional[Path] = None,
+        preload: Optional[Iterable[str]] = None,
+        cache_size: int = 256,
+        cache_ttl: Optional[float] = 300.0
+    ):
+        self.data_dir = data_dir
+        self.shared_dir = shared_dir
         self.default_version = default_version
-        self.loader.load_all()
+        
+        # Komponenty ładowane od razu; pozostałe loader wczytuje przy pierwszym użyciu
+        self.preload = list(preload) if preload is not None else []
+        
+        self.loader = self._create_loader()
+        self.loader.preload(self.preload)
+        
+        # Przeładowanie danych bez restartu: numer wersji zbioru rośnie przy każdej podmianie loadera
+        self.dataset_version = 1
+        self.last_reload_error: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watch_thread: Optional[threading.Thread] = None
+        
+        # Serie finansowe kodów hierarchii: wersja → (loader, symbol → (kod serii, czysty symbol))
+        self._series_index: Dict[PKDVersion, Tuple[PKDDataLoader, Dict[str, Tuple[str, str]]]] = {}
+        
+        # Kostki agregatów sekcji/działów/grup: wersja → (loader, RollupCube)
+        self._rollups: Dict[PKDVersion, Tuple[PKDDataLoader, RollupCube]] = {}
+        
+        # Wyniki get_data: (loader, wersja, selektor, lata) → IndustryData, LRU z TTL
+        self.result_cache = ResultCache(cache_size, cache_ttl)
+        if set(COMPONENTS) <= set(self.preload):
+            self.get_rollup()
+    
+    def _create_loader(self) -> PKDDataLoader:
+        """Utwórz nowy (niezaładowany) loader dla katalogów serwisu"""
+        return PKDDataLoader(self.data_dir, shared_dir=self.shared_dir)
+    
+    @property
+    def is_reloading(self) -> bool:
+        """Czy trwa przeładowanie danych"""
+        return self._reload_lock.locked()
+    
+    def reload(self) -> bool:
+        """
+        Wczytaj dane od nowa i atomowo podmień loader.
+        
+        Nowy loader budowany jest obok starego; zapytania, które już pobrały
+        self.loader, kończą się na starym zbiorze. Przy błędzie (także przy budowie
+        kostek agregatów) stary loader zostaje, a błąd trafia do last_reload_error.
+        Zwraca False jeśli przeładowanie już trwa lub się nie powiodło.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        
+        try:
+            # Nowy loader od razu ładuje to, czego używał stary - podmiana nie wychładza serwisu
+            new_loader = self._create_loader()
+            in_use = set(self.preload) | set(self.loader.loaded_components())
+            new_loader.preload(name for name in COMPONENTS if name in in_use)
+            
+            # Indeksy serii i kostki wersji używanych przed podmianą budowane dla nowego zbioru
+            # jeszcze przed podmianą - błąd zostawia stary zbiór
+            prepared = {}
+            for version in self._rollups:
+                series_index = self._build_series_index(new_loader, version)
+                prepared[version] = (series_index, self._build_rollup(new_loader, version, series_index))
+        except Exception as e:
+            self.last_reload_error = str(e)
+            print(f"⚠ Przeładowanie danych nie powiodło się: {e}")
+            return False
+        else:
+            self._swap_loader(new_loader, prepared)
+            return True
+        finally:
+            self._reload_lock.release()
+    
+    def reload_async(self) -> bool:
+        """Uruchom reload() w wątku w tle. Zwraca False jeśli przeładowanie już trwa."""
+        if self.is_reloading:
+            return False
+        
+        threading.Thread(target=self.reload, name="pkd-reload", daemon=True).start()
+        return True
+    
+    def _swap_loader(
+        self,
+        loader: PKDDataLoader,
+        prepared: Optional[Dict[PKDVersion, Tuple[Dict[str, Tuple[str, str]], RollupCube]]] = None
+    ) -> None:
+        """
+        Podmień loader i unieważnij dane pochodne poprzedniego zbioru.
+        `prepared` - gotowe indeksy serii i kostki nowego zbioru: wersja → (indeks, kostka).
+        """
+        prepared = prepared or {}
+        self.loader = loader
+        self._series_index = {version: (loader, series_index) for version, (series_index, _) in prepared.items()}
+        self._rollups = {version: (loader, rollup) for version, (_, rollup) in prepared.items()}
+        self.result_cache.clear()
+        self.dataset_version += 1
+        self.last_reload_error = None
+        print(f"✓ Dane PKD przeładowane (wersja zbioru {self.dataset_version})")
+    
+    def start_watching(self, interval: float = 30.0) -> None:
+        """
+        Obserwuj pliki źródłowe co `interval` sekund i przeładuj dane po zmianie.
+        Przeładowanie startuje dopiero gdy podpis plików jest stabilny przez jeden cykl,
+        żeby nie czytać pliku w trakcie kopiowania.
+        """
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(
+            target=self._watch_loop,
+            args=(interval, self.loader.source_signature()),
+            name="pkd-watch",
+            daemon=True
+        )
+        self._watch_thread.start()
+    
+    def stop_watching(self) -> None:
+        """Zatrzymaj obserwację plików źródłowych"""
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
+            self._watch_thread = None
+    
+    def _watch_loop(self, interval: float, loaded_signature: tuple) -> None:
+        """Pętla obserwacji plików źródłowych"""
+        pending_signature = None
+        
+        while not self._watch_stop.wait(interval):
+            current = self.loader.source_signature()
+            
+            if current == loaded_signature:
+                pending_signature = None
+            elif current != pending_signature:
+                # Zmiana wykryta - poczekaj cykl, aż pliki przestaną się zmieniać
+                pending_signature = current
+            elif self.reload():
+                loaded_signature = current
+                pending_signature = None
     
     def get_data(
         self,
@@ -114,7 +464,8 @@ class PKDDataService:
         subclass: Optional[str] = None,
         version: Optional[PKDVersion] = None,
         year_from: Optional[int] = None,
-        year_to: Optional[int] = None
+        year_to: Optional[int] = None,
+        loader: Optional[PKDDataLoader] = None
     ) -> IndustryData:
         """
         Pobierz dane dla wybranej branży/branż.
@@ -139,87 +490,145 @@ class PKDDataService:
             version: Wersja PKD (domyślnie VERSION_2025)
             year_from: Rok początkowy dla filtrowania danych (opcjonalny)
             year_to: Rok końcowy dla filtrowania danych (opcjonalny)
+            loader: Zbiór danych zapytania (domyślnie bieżący self.loader)
+        
+        Returns:
+            IndustryData z wybranymi kodami i danymi. Wynik może pochodzić z cache
+            (self.result_cache) i jest współdzielony między zapytaniami - tylko do odczytu.
+        """
+        
+        selector = {"section": section, "division": division, "group": group, "subclass": subclass}
+        return self.get_many([selector], version=version, year_from=year_from, year_to=year_to, loader=loader)[0]
+    
+    def get_many(
+        self,
+        selectors: Iterable[Mapping[str, Optional[str]]],
+        version: Optional[PKDVersion] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        loader: Optional[PKDDataLoader] = None
+    ) -> List[IndustryData]:
+        """
+        Pobierz dane dla wielu branż w jednym przebiegu.
+        
+        Selektor to słownik z kluczami section/division/group/subclass (jak argumenty
+        get_data()). Hierarchia, magazyny i indeks serii pobierane są raz na wywołanie, a wyniki
+        to leniwe widoki na wspólne magazyny - nakładające się poddrzewa (np. sekcja G i dział 46)
+        odwołują się do tych samych wierszy zamiast kopiować dane kodów.
+        
+        Przykład:
+        - get_many([{"section": "G"}, {"section": "G", "division": "46"}])
+        
+        Handler, który czyta też hierarchię czy kostkę agregatów, przekazuje `loader` pobrany
+        raz na początku zapytania - wszystkie odczyty pochodzą wtedy z jednego zbioru danych.
         
         Returns:
-            IndustryData z wybranymi kodami i danymi
+            IndustryData dla każdego selektora, w kolejności selektorów
         """
         
         # Ustaw wersję
         if version is None:
             version = self.default_version
         
-        # Waliduj hierarchię
-        self._validate_hierarchy(section, division, group, subclass)
+        selectors = [
+            tuple(selector.get(name) for name in ("section", "division", "group", "subclass"))
+            for selector in selectors
+        ]
         
-        # Pobierz hierarchię dla danej wersji
-        hierarchy = self.loader.get_hierarchy(version)
-        
-        # Pobierz kody PKD
-        pkd_codes = hierarchy.get_codes_by_hierarchy(section, division, group, subclass)
+        # Waliduj hierarchię wszystkich selektorów przed pobraniem danych
+        for selector in selectors:
+            self._validate_hierarchy(*selector)
         
-        # Zbierz dane finansowe i upadłości dla każdego kodu
-        financial_data = {}
-        bankruptcy_data = {}
+        # Jeden loader na całe zapytanie - przeładowanie w trakcie nie miesza zbiorów
+        if loader is None:
+            loader = self.loader
+        hierarchy = loader.get_hierarchy(version)
+        store = None
         
-        for pkd_code in pkd_codes:
-            # Dane finansowe - spróbuj różnych wariantów symbolu
-            fin_metrics = None
-            for symbol_variant in self._get_financial_symbol_variants(pkd_code.symbol):
-                fin_metrics = self.loader.get_financial_metrics(symbol_variant)
-                if fin_metrics:
-                    # Filtruj według zakresu lat
-                    if year_from is not None or year_to is not None:
-                        filtered_metrics = {}
-                        for year, metrics in fin_metrics.items():
-                            if year_from is not None and year < year_from:
-                                continue
-                            if year_to is not None and year > year_to:
-                                continue
-                            filtered_metrics[year] = metrics
-                        fin_metrics = filtered_metrics
-                    
-                    # Zapisz pod ORYGINALNYM symbolem bez sekcji dla spójności z frontendem
-                    # np. A.02.10.Z -> 02.10
-                    clean_symbol = pkd_code.symbol.replace(f"{pkd_code.section}.", "").replace(".Z", "")
-                    if fin_metrics:  # Tylko jeśli są dane po filtrowaniu
-                        financial_data[clean_symbol] = fin_metrics
-                    break
+        results = []
+        for selector in selectors:
+            # Pobierz kody PKD (zapamiętane krotki hierarchii) dla selektora w postaci kanonicznej
+            section, division, group, subclass = self._canonical_selector(hierarchy, *selector)
+            pkd_codes = hierarchy.get_codes_by_hierarchy(section, division, group, subclass)
             
-            # Dane o upadłościach - pobierz dla wszystkich dostępnych lat
-            bankruptcy_dict = {}
-            start_year = year_from if year_from else 2018
-            end_year = year_to if year_to else 2024
+            # Loader w kluczu: wynik policzony na starym zbiorze nigdy nie trafi po przeładowaniu.
+            # Pusty wybór (nieznany kod) nie trafia do cache - błędne parametry nie wypychają wpisów
+            cache_key = (loader, version, section, division, group, subclass, year_from, year_to)
+            industry_data = self.result_cache.get(cache_key) if pkd_codes else None
+            if industry_data is not None:
+                results.append(industry_data)
+                continue
             
-            for pkd_symbol_short in self._get_alternative_symbols(pkd_code.symbol):
-                # Szukaj danych w krz_pkd.csv dla wszystkich lat
-                for year in range(start_year, end_year + 1):  # Dane dostępne od 2018
-                    count = self.loader.get_bankruptcy_count(pkd_symbol_short, year)
-                    if count > 0:
-                        if year not in bankruptcy_dict:
-                            bankruptcy_dict[year] = 0
-                        bankruptcy_dict[year] += count
+            if store is None:
+                # Pobierz magazyny raz na wywołanie (tylko gdy któryś selektor nie jest w cache)
+                store = loader.get_financial_data(version)
+                bankruptcies = loader.get_bankruptcy_data(version)
+                
+                # Symbol → (kod serii w wsk_fin.csv, czysty symbol), rozwiązane raz dla zbioru danych
+                series_index = self._get_series_index(loader, version)
             
-            if bankruptcy_dict:
-                bankruptcy_data[pkd_code.symbol] = bankruptcy_dict
-        
-        # Stwórz IndustryData
-        industry_data = IndustryData(
-            pkd_codes=pkd_codes,
-            financial_data=financial_data,
-            bankruptcy_data=bankruptcy_data,
-            query_params={
-                "section": section,
-                "division": division,
-                "group": group,
-                "subclass": subclass,
-                "version": version.value,
-                "year_from": year_from,
-                "year_to": year_to
-            },
-            version=version
-        )
+            # Serie finansowe (jedna na czysty symbol - ostatni kod wygrywa) i kody z upadłościami;
+            # same odwołania do wierszy magazynów - dane powstają przy pierwszym odczycie widoku
+            series = {}
+            bankruptcy_symbols = []
+            for pkd_code in pkd_codes:
+                entry = series_index.get(pkd_code.symbol)
+                if entry is not None:
+                    series_code, clean_symbol = entry
+                    series[clean_symbol] = series_code
+                if pkd_code.symbol in bankruptcies:
+                    bankruptcy_symbols.append(pkd_code.symbol)
+            
+            # Stwórz IndustryData
+            industry_data = IndustryData.view(
+                pkd_codes,
+                store,
+                list(series.items()),
+                bankruptcies,
+                bankruptcy_symbols,
+                query_params={
+                    "section": section,
+                    "division": division,
+                    "group": group,
+                    "subclass": subclass,
+                    "version": version.value,
+                    "year_from": year_from,
+                    "year_to": year_to
+                },
+                version=version,
+                year_from=year_from,
+                year_to=year_to
+            )
+            
+            if pkd_codes:
+                self.result_cache.put(cache_key, industry_data)
+            results.append(industry_data)
         
-        return industry_data
+        return results
+    
+    @staticmethod
+    def _canonical_selector(
+        hierarchy: PKDHierarchy,
+        section: Optional[str],
+        division: Optional[str],
+        group: Optional[str],
+        subclass: Optional[str]
+    ) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+        """
+        Sprowadź selektor do postaci kanonicznej (klucz cache i query_params wyniku):
+        grupa jako pełny symbol ("11" → "46.11"), a przy podanym dziale sekcja z hierarchii -
+        get_codes_by_hierarchy() wybiera wtedy kody po dziale, więc sekcja spoza niego
+        nie zmienia wyniku.
+        """
+        if group is not None and not group.startswith(f"{division}."):
+            group = f"{division}.{group}"
+        
+        if division is not None:
+            division_code = hierarchy.get_by_symbol(division)
+            if division_code is not None:
+                section = division_code.section
+        
+        return section, division, group, subclass
     
     def _validate_hierarchy(
         self,
@@ -245,24 +654,76 @@ class PKDDataService:
         if subclass is not None and group is None:
             raise ValueError("Jeśli podana jest podklasa (subclass), to grupa (group) jest wymagana")
     
-    def _get_alternative_symbols(self, symbol: str) -> List[str]:
+    def _get_series_index(self, loader: PKDDataLoader, version: PKDVersion) -> Dict[str, Tuple[str, str]]:
         """
-        Zwróć alternatywne symbole dla szukania w krz_pkd.csv
-        np. dla "46.11.A" szukaj też "46.11Z" lub pełnego 5-znakowego kodu
+        Zwróć (i zapamiętaj dla loadera) indeks symbol → (kod serii, czysty symbol) dla
+        wszystkich kodów hierarchii danej wersji. Kod serii to pierwszy wariant symbolu
+        (_get_financial_symbol_variants) mający dane w wsk_fin.csv; kody bez danych są pomijane.
         """
-        symbols = [symbol]
+        cached = self._series_index.get(version)
+        if cached is not None and cached[0] is loader:
+            return cached[1]
         
-        # Jeśli symbol zawiera literkę, spróbuj zmienić na Z
-        if symbol[-1].isalpha() and symbol[-1] != 'Z':
-            symbols.append(symbol[:-1] + 'Z')
+        series_index = self._build_series_index(loader, version)
         
-        # Spróbuj znaleźć 5-znakowy kod
-        parts = symbol.split('.')
-        if len(parts) == 3:
-            code_5 = f"{parts[0]}{parts[1]}{parts[2]}"
-            symbols.append(code_5)
+        # Zapytanie dokończone na starym zbiorze nie nadpisuje indeksu bieżącego
+        if loader is self.loader:
+            self._series_index[version] = (loader, series_index)
+        return series_index
+    
+    def _build_series_index(self, loader: PKDDataLoader, version: PKDVersion) -> Dict[str, Tuple[str, str]]:
+        """Zbuduj indeks symbol → (kod serii, czysty symbol) dla zbioru danych loadera (bez zapamiętywania)"""
+        store = loader.get_financial_data(version)
+        with_data = {code for code, has_data in zip(store.codes, store.present.any(axis=1)) if has_data}
         
-        return symbols
+        series_index = {}
+        for pkd_code in loader.get_hierarchy(version).codes.values():
+            for symbol_variant in self._get_financial_symbol_variants(pkd_code.symbol):
+                if symbol_variant in with_data:
+                    # Zapisz pod ORYGINALNYM symbolem bez sekcji dla spójności z frontendem
+                    # np. A.02.10.Z -> 02.10
+                    clean_symbol = pkd_code.symbol.replace(f"{pkd_code.section}.", "").replace(".Z", "")
+                    series_index[pkd_code.symbol] = (symbol_variant, clean_symbol)
+                    break
+        
+        return series_index
+    
+    def get_rollup(self, version: Optional[PKDVersion] = None, loader: Optional[PKDDataLoader] = None) -> RollupCube:
+        """
+        Zwróć kostkę agregatów (sekcja/dział/grupa × rok) dla wersji PKD.
+        Budowana raz na zbiór danych; węzeł obejmuje te same kody i serie co get_data().
+        `loader` - zbiór danych zapytania (domyślnie bieżący self.loader).
+        """
+        if version is None:
+            version = self.default_version
+        
+        if loader is None:
+            loader = self.loader
+        cached = self._rollups.get(version)
+        if cached is not None and cached[0] is loader:
+            return cached[1]
+        
+        rollup = self._build_rollup(loader, version, self._get_series_index(loader, version))
+        if loader is self.loader:
+            self._rollups[version] = (loader, rollup)
+        return rollup
+    
+    def _build_rollup(
+        self,
+        loader: PKDDataLoader,
+        version: PKDVersion,
+        series_index: Mapping[str, Tuple[str, str]]
+    ) -> RollupCube:
+        """Zbuduj kostkę agregatów wersji dla zbioru danych loadera (bez zapamiętywania)"""
+        print(f"  → Budowanie kostki agregatów PKD {version.value}...")
+        rollup = RollupCube.build(
+            loader.get_hierarchy(version),
+            loader.get_financial_data(version),
+            series_index,
+            loader.get_bankruptcy_data(version)
+        )
+        print(f"✓ {rollup}")
+        return rollup
     
     def _get_financial_symbol_variants(self, symbol: str) -> List[str]:
         """
@@ -297,7 +758,7 @@ class PKDDataService:
             version = self.default_version
         
         hierarchy = self.loader.get_hierarchy(version)
-        return hierarchy.get_codes_by_hierarchy(section=section)
+        return list(hierarchy.get_codes_by_hierarchy(section=section))
     
     def get_codes_for_division(
         self,
@@ -310,7 +771,7 @@ class PKDDataService:
             version = self.default_version
         
         hierarchy = self.loader.get_hierarchy(version)
-        return hierarchy.get_codes_by_hierarchy(section=section, division=division)
+        return list(hierarchy.get_codes_by_hierarchy(section=section, division=division))
     
     def translate_code(
         self,
@@ -319,9 +780,19 @@ class PKDDataService:
         to_version: PKDVersion
     ) -> Optional[str]:
         """Przetłumacz kod PKD między wersjami"""
-        if self.loader.mapper:
-            return self.loader.mapper.translate(code, from_version, to_version)
+        mapper = self.loader.mapper
+        if mapper:
+            return mapper.translate(code, from_version, to_version)
         return None
     
+    def translate_many(
+        self,
+        codes: List[str],
+        from_version: PKDVersion,
+        to_version: PKDVersion
+    ) -> Dict[str, List[str]]:
+        """Przetłumacz wiele kodów PKD naraz: kod → lista odpowiedników"""
+        return self.loader.mapper.translate_many(codes, from_version, to_version)
+    
     def __str__(self) -> str:
         return f"PKDDataService(default_version={self.default_version.value}, loader={self.loader})"
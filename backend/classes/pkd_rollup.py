@@ -0,0 +1,181 @@
+"""
+Kostka agregatów PKD (rollup)
+Sumy wskaźników finansowych i upadłości dla każdej sekcji, działu i grupy, rok po roku
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from classes.pkd_classification import PKDLevel, PKDHierarchy
+from classes.pkd_data_loader import METRIC_FIELDS, FinancialMetrics, FinancialStore, BankruptcyStore, year_slice
+
+
+# Poziomy hierarchii trzymane w kostce (podklasa to pojedynczy kod - nie wymaga agregatu)
+ROLLUP_LEVELS = (PKDLevel.SECTION, PKDLevel.DIVISION, PKDLevel.GROUP)
+
+
+class RollupCube:
+    """
+    Zagregowane wskaźniki i upadłości dla każdego węzła hierarchii (sekcja, dział, grupa) × rok.
+    
+    Węzeł obejmuje te same kody co get_data() dla tej sekcji/działu/grupy: wskaźniki to suma
+    serii z wsk_fin.csv przypisanych kodom (seria liczona raz na czysty symbol, jak w
+    IndustryData.series_codes), upadłości to suma wierszy kodów w BankruptcyStore.
+    Odczyt węzła to wycinek gotowej tablicy - bez zbierania kodów i sumowania na zapytanie.
+    """
+    
+    def __init__(
+        self,
+        nodes: Sequence[Tuple[PKDLevel, str]],
+        years: Sequence[int],
+        values: np.ndarray,
+        present: np.ndarray,
+        bankruptcy_years: Sequence[int],
+        bankruptcy_counts: np.ndarray
+    ):
+        if values.shape != (len(nodes), len(years), len(METRIC_FIELDS)) or present.shape != values.shape[:2]:
+            raise ValueError(f"Nieprawidłowy kształt kostki wskaźników: {values.shape}")
+        if bankruptcy_counts.shape != (len(nodes), len(bankruptcy_years)):
+            raise ValueError(f"Nieprawidłowy kształt kostki upadłości: {bankruptcy_counts.shape}")
+        
+        self.nodes: List[Tuple[PKDLevel, str]] = list(nodes)
+        self.years: List[int] = list(years)
+        self.values = values                        # węzeł × rok × wskaźnik (brak danych = 0)
+        self.present = present                      # węzeł × rok: czy którakolwiek seria ma dane
+        self.bankruptcy_years: List[int] = list(bankruptcy_years)
+        self.bankruptcy_counts = bankruptcy_counts  # węzeł × rok upadłości, int64
+        self.node_index: Dict[Tuple[PKDLevel, str], int] = {node: i for i, node in enumerate(self.nodes)}
+        self.indicator_index: Dict[str, int] = {name: i for i, name in enumerate(METRIC_FIELDS)}
+    
+    @classmethod
+    def build(
+        cls,
+        hierarchy: PKDHierarchy,
+        store: FinancialStore,
+        series_index: Mapping[str, Tuple[str, str]],
+        bankruptcies: BankruptcyStore
+    ) -> 'RollupCube':
+        """
+        Zbuduj kostkę dla hierarchii.
+        
+        Args:
+            hierarchy: Hierarchia PKD (węzły z jej indeksów sekcji, działów i grup)
+            store: Wskaźniki finansowe w wersji hierarchii
+            series_index: Symbol kodu → (kod serii w store, czysty symbol)
+            bankruptcies: Upadłości w kodach wersji hierarchii (loader.get_bankruptcy_data)
+        """
+        nodes = []
+        node_series = []
+        bank_rows, bank_cols = [], []
+        
+        for level in ROLLUP_LEVELS:
+            for key in cls._level_keys(hierarchy, level):
+                node = len(nodes)
+                nodes.append((level, key))
+                codes = cls._node_codes(hierarchy, level, key)
+                
+                # Jedna seria na czysty symbol - ostatni kod wygrywa, jak w get_data()
+                series = {}
+                for pkd_code in codes:
+                    entry = series_index.get(pkd_code.symbol)
+                    if entry is not None:
+                        series[entry[1]] = entry[0]
+                node_series.append([store.code_index[series_code] for series_code in series.values()])
+                
+                for pkd_code in codes:
+                    row = bankruptcies.code_index.get(pkd_code.symbol)
+                    if row is not None:
+                        bank_rows.append(node)
+                        bank_cols.append(row)
+        
+        # Sumy liczone w kolejności serii, jak FinancialStore.aggregate() - wyniki identyczne bitowo
+        # (zaokrąglenia w odpowiedziach API nie zależą od tego, skąd pochodzi agregat)
+        n_years, n_fields = len(store.years), len(METRIC_FIELDS)
+        filled = np.nan_to_num(store.values, nan=0.0)
+        values = np.zeros((len(nodes), n_years, n_fields))
+        present = np.zeros((len(nodes), n_years), dtype=bool)
+        for node, rows in enumerate(node_series):
+            if rows:
+                values[node] = filled[rows].sum(axis=0)
+                present[node] = store.present[rows].any(axis=0)
+        
+        # Upadłości są całkowite - kolejność sumowania bez znaczenia, jedno mnożenie macierzy rzadkiej
+        bank_membership = sparse.csr_matrix(
+            (np.ones(len(bank_rows), dtype=np.int64), (bank_rows, bank_cols)),
+            shape=(len(nodes), len(bankruptcies.codes))
+        )
+        bankruptcy_counts = np.asarray(bank_membership @ bankruptcies.counts, dtype=np.int64)
+        
+        return cls(nodes, store.years, values, present, bankruptcies.years, bankruptcy_counts)
+    
+    @staticmethod
+    def _level_keys(hierarchy: PKDHierarchy, level: PKDLevel) -> Iterable[str]:
+        """Klucze węzłów danego poziomu (klucze indeksów hierarchii)"""
+        if level == PKDLevel.SECTION:
+            return hierarchy.section_index.keys()
+        if level == PKDLevel.DIVISION:
+            return hierarchy.division_index.keys()
+        return hierarchy.group_index.keys()
+    
+    @staticmethod
+    def _node_codes(hierarchy: PKDHierarchy, level: PKDLevel, key: str):
+        """Kody węzła - te same, które zwraca get_codes_by_hierarchy()"""
+        if level == PKDLevel.SECTION:
+            return hierarchy.get_by_section(key)
+        if level == PKDLevel.DIVISION:
+            return hierarchy.get_by_division(key)
+        return hierarchy.get_by_group(key)
+    
+    def financials(
+        self,
+        level: PKDLevel,
+        key: str,
+        metric_fields: Sequence[str] = METRIC_FIELDS,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> Dict[int, FinancialMetrics]:
+        """
+        Zwróć rok → FinancialMetrics z sumami węzła (lata, w których którakolwiek seria ma dane).
+        Pola spoza metric_fields pozostają None - wynik jak FinancialStore.aggregate().
+        """
+        node = self.node_index.get((level, key))
+        if node is None:
+            return {}
+        
+        years = year_slice(self.years, year_from, year_to)
+        columns = [self.indicator_index[name] for name in metric_fields]
+        totals = self.values[node, years][:, columns]
+        return {
+            self.years[years.start + j]: FinancialMetrics(
+                year=self.years[years.start + j],
+                **dict(zip(metric_fields, totals[j].tolist()))
+            )
+            for j in np.flatnonzero(self.present[node, years])
+        }
+    
+    def bankruptcies(
+        self,
+        level: PKDLevel,
+        key: str,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> Dict[int, int]:
+        """Zwróć rok → łączna liczba upadłości węzła (lata z niezerową liczbą)"""
+        node = self.node_index.get((level, key))
+        if node is None:
+            return {}
+        
+        years = year_slice(self.bankruptcy_years, year_from, year_to)
+        counts = self.bankruptcy_counts[node, years]
+        return {self.bankruptcy_years[years.start + j]: int(counts[j]) for j in np.flatnonzero(counts)}
+    
+    def __contains__(self, node: object) -> bool:
+        return node in self.node_index
+    
+    def __len__(self) -> int:
+        return len(self.nodes)
+    
+    def __str__(self) -> str:
+        return f"RollupCube(nodes={len(self.nodes)}, years={len(self.years)})"
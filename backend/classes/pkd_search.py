@@ -0,0 +1,130 @@
+"""
+PKD Search Module
+Pełnotekstowe wyszukiwanie kodów PKD po nazwie działalności (indeks odwrócony + BM25)
+"""
+
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+# Litery, które nie rozkładają się w NFKD na literę bazową + znak diakrytyczny
+_EXTRA_FOLDING = str.maketrans({"ł": "l", "Ł": "l"})
+
+# Spójniki i przyimki - nie niosą treści, a jako prefiksy pasowałyby do połowy słownika
+STOPWORDS = frozenset({
+    "a", "do", "dla", "i", "na", "o", "od", "oraz", "po", "przez", "w", "we", "z", "ze",
+})
+
+# Końcówki fleksyjne (po usunięciu znaków diakrytycznych), od najdłuższych.
+# Prosty stemmer: zbóż/zboża → zboz, hurtowy/hurtowa/hurtowej → hurt, uprawa/uprawy → upraw
+SUFFIXES = tuple(sorted({
+    "owego", "owemu", "owych", "owymi", "owej", "owym", "owa", "owe", "owi", "owy",
+    "ami", "ach", "ego", "emu", "ich", "ych", "imi", "ymi", "iej",
+    "ej", "em", "ie", "ia", "iu", "om", "ow",
+    "a", "e", "i", "o", "u", "y",
+}, key=len, reverse=True))
+MIN_STEM_LENGTH = 3
+
+# Parametry BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Waga dopasowania samym prefiksem (np. "hurt" → "hurtownia") względem pełnego rdzenia
+PREFIX_MATCH_WEIGHT = 0.5
+
+
+def fold(text: str) -> str:
+    """Małe litery bez polskich znaków diakrytycznych: "Uprawa ZBÓŻ" → "uprawa zboz" """
+    decomposed = unicodedata.normalize("NFKD", text.translate(_EXTRA_FOLDING))
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def stem(token: str) -> str:
+    """Obetnij najdłuższą pasującą końcówkę, zostawiając co najmniej MIN_STEM_LENGTH znaków"""
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            return token[:-len(suffix)]
+    return token
+
+
+def analyze(text: str) -> List[str]:
+    """Tekst → lista rdzeni (zwinięcie znaków, tokenizacja, stop-słowa, stemming)"""
+    return [stem(token) for token in re.findall(r"[a-z0-9]+", fold(text)) if token not in STOPWORDS]
+
+
+class PKDTextIndex:
+    """
+    Indeks odwrócony nad nazwami kodów PKD jednej hierarchii.
+
+    Rdzeń → lista (dokument, liczba wystąpień). Słowa zapytania dopasowywane są jako
+    prefiksy rdzeni (wyszukiwanie binarne w posortowanym słowniku), więc działają też
+    niedokończone słowa. Ranking: najpierw liczba dopasowanych słów zapytania, potem BM25.
+    """
+
+    def __init__(self, codes: Iterable):
+        self.codes = list(codes)
+
+        postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: List[int] = []
+        for doc_id, code in enumerate(self.codes):
+            terms = analyze(code.name)
+            self.doc_lengths.append(len(terms))
+            for term in terms:
+                doc_counts = postings.setdefault(term, {})
+                doc_counts[doc_id] = doc_counts.get(doc_id, 0) + 1
+
+        self.vocabulary: List[str] = sorted(postings)
+        self.postings: Dict[str, Tuple[Tuple[int, int], ...]] = {
+            term: tuple(doc_counts.items()) for term, doc_counts in postings.items()
+        }
+        self.avg_doc_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+        doc_count = len(self.codes)
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def _matching_terms(self, query_term: str) -> List[str]:
+        """Rdzenie słownika zaczynające się od słowa zapytania"""
+        terms = []
+        position = bisect_left(self.vocabulary, query_term)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(query_term):
+            terms.append(self.vocabulary[position])
+            position += 1
+        return terms
+
+    def _bm25(self, term: str, doc_id: int, term_count: int) -> float:
+        """Wynik BM25 jednego rdzenia w dokumencie"""
+        length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / self.avg_doc_length
+        return self.idf[term] * term_count * (BM25_K1 + 1) / (term_count + BM25_K1 * length_norm)
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[object, float]]:
+        """Zwróć do `limit` par (kod, wynik) posortowanych od najlepiej pasujących"""
+        query_terms = list(dict.fromkeys(analyze(query)))
+        if not query_terms or limit <= 0:
+            return []
+
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for query_term in query_terms:
+            # Dla każdego dokumentu liczy się najlepszy rdzeń pasujący do słowa zapytania
+            best: Dict[int, float] = {}
+            for term in self._matching_terms(query_term):
+                weight = 1.0 if term == query_term else PREFIX_MATCH_WEIGHT
+                for doc_id, term_count in self.postings[term]:
+                    score = weight * self._bm25(term, doc_id, term_count)
+                    if score > best.get(doc_id, 0.0):
+                        best[doc_id] = score
+
+            for doc_id, score in best.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+                matched[doc_id] = matched.get(doc_id, 0) + 1
+
+        ranked = sorted(scores, key=lambda doc_id: (-matched[doc_id], -scores[doc_id], doc_id))
+        return [(self.codes[doc_id], scores[doc_id]) for doc_id in ranked[:limit]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
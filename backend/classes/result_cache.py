@@ -0,0 +1,101 @@
+"""
+Cache wyników zapytań
+LRU z limitem liczby wpisów i czasem życia (TTL) oraz licznikami trafień
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+class ResultCache:
+    """
+    Ograniczony cache LRU z czasem życia wpisów.
+    
+    Po przekroczeniu max_size usuwany jest najdawniej używany wpis; wpis starszy niż ttl
+    sekund traktowany jest jak brak. Bezpieczny dla wątków (zapytania z puli wątków FastAPI
+    i przeładowanie danych w tle). max_size=0 wyłącza cache, ttl=None - wpisy bez wygasania.
+    """
+    
+    def __init__(
+        self,
+        max_size: int = 256,
+        ttl: Optional[float] = 300.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if max_size < 0:
+            raise ValueError(f"Nieprawidłowy rozmiar cache: {max_size}")
+        
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()  # klucz → (czas wygaśnięcia, wartość)
+        self._lock = threading.Lock()
+        
+        # Liczniki od utworzenia cache (clear() ich nie zeruje)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def get(self, key: Hashable) -> Optional[object]:
+        """Zwróć wartość dla klucza (None gdy brak lub wygasła) i oznacz wpis jako ostatnio użyty"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: Hashable, value: object) -> None:
+        """Zapisz wartość; przy przepełnieniu usuń najdawniej używane wpisy"""
+        if self.max_size == 0:
+            return
+        
+        expires_at = self._clock() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Usuń wszystkie wpisy (np. po przeładowaniu danych)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+    
+    def stats(self) -> Dict[str, object]:
+        """Liczniki cache do monitoringu"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __str__(self) -> str:
+        return f"ResultCache(size={len(self._entries)}, max_size={self.max_size}, ttl={self.ttl})"
@@ -7,6 +7,8 @@ mkShell {
     python313
     python313Packages.uvicorn
     python313Packages.pandas
+    python313Packages.numpy
+    python313Packages.scipy
     python313Packages.fastapi
     python313Packages.pytest
     python313Packages.statsmodels
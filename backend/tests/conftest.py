@@ -0,0 +1,52 @@
+"""
+Wspólne fixtures testów: minimalny zbiór danych PKD i serwis na nim
+"""
+
+from pathlib import Path
+
+import pytest
+from classes.pkd_data_service import PKDDataService
+
+
+def write_tiny_dataset(data_dir: Path) -> Path:
+    """Zapisz minimalny komplet plików CSV do katalogu testowego"""
+    hierarchy_csv = (
+        "typ,symbol,nazwa\n"
+        "SEKCJA,A,ROLNICTWO\n"
+        "DZIAŁ,01,UPRAWY ROLNE\n"
+        "GRUPA,01.1,Uprawy rolne inne niż wieloletnie\n"
+        "KLASA,01.11,Uprawa zbóż\n"
+        "PODKLASA,01.11.Z,Uprawa zbóż\n"
+    )
+    (data_dir / "PKD_2007.csv").write_text(hierarchy_csv, encoding="utf-8")
+    (data_dir / "PKD_2025.csv").write_text(hierarchy_csv, encoding="utf-8")
+    (data_dir / "MAP_PKD_2007_2025.csv").write_text(
+        "symbol_2007,symbol_2025\nA,A\n01,01\n01.1,01.1\n01.11,01.11\n",
+        encoding="utf-8"
+    )
+    (data_dir / "wsk_fin.csv").write_text(
+        "PKD;WSKAZNIK;2022;2023\n"
+        "SEK_A;GS Przychody ogółem;100;110\n"
+        "01.11;GS Przychody ogółem;40;bd\n",
+        encoding="utf-8"
+    )
+    (data_dir / "krz_pkd.csv").write_text(
+        "rok;pkd;liczba_upadlosci\n2022;0111Z;3\n2023;0111Z;1\n",
+        encoding="utf-8"
+    )
+    return data_dir
+
+
+@pytest.fixture
+def tiny_data_dir(tmp_path):
+    """Katalog (tmp_path) z minimalnym zbiorem danych"""
+    return write_tiny_dataset(tmp_path)
+
+
+@pytest.fixture
+def tiny_service(request, tiny_data_dir):
+    """
+    Serwis na minimalnym zbiorze danych. Argumenty PKDDataService przez parametryzację:
+    @pytest.mark.parametrize("tiny_service", [{"cache_size": 0}], indirect=True)
+    """
+    return PKDDataService(tiny_data_dir, **getattr(request, "param", {}))
@@ -0,0 +1,62 @@
+"""
+Testy dla endpointu /api/admin/reload
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from app import app
+from api import routes
+from api.routes import service
+
+client = TestClient(app)
+ADMIN_HEADERS = {"X-Admin-Token": "test-token"}
+
+
+@pytest.fixture(autouse=True)
+def admin_token(monkeypatch):
+    monkeypatch.setattr(routes, "_admin_token", "test-token")
+
+
+def test_reload_wait():
+    version_before = service.dataset_version
+    resp = client.post("/api/admin/reload?wait=true", headers=ADMIN_HEADERS)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["status"] == "reloaded"
+    assert data["dataset_version"] == version_before + 1
+    assert data["error"] is None
+
+
+def test_reload_keeps_serving():
+    resp = client.post("/api/admin/reload?wait=true", headers=ADMIN_HEADERS)
+    assert resp.status_code == 200
+    resp = client.get("/api/sections")
+    assert resp.status_code == 200
+    assert len(resp.json()["sections"]) > 0
+
+
+def test_reload_requires_token():
+    version_before = service.dataset_version
+    assert client.post("/api/admin/reload?wait=true").status_code == 401
+    assert client.post("/api/admin/reload?wait=true", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert service.dataset_version == version_before
+
+
+def test_reload_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(routes, "_admin_token", None)
+    assert client.post("/api/admin/reload", headers=ADMIN_HEADERS).status_code == 403
+
+
+def test_cache_stats():
+    client.get("/api/industry?section=A")
+    client.get("/api/industry?section=A")
+    resp = client.get("/api/admin/cache", headers=ADMIN_HEADERS)
+    assert resp.status_code == 200
+    stats = resp.json()["get_data"]
+    assert stats["hits"] >= 1
+    assert {"misses", "hit_rate", "evictions", "expirations", "size", "max_size", "ttl"} <= set(stats)
+
+
+def test_cache_stats_requires_token():
+    assert client.get("/api/admin/cache").status_code == 401
+    assert client.get("/api/admin/cache", headers={"X-Admin-Token": "wrong"}).status_code == 401
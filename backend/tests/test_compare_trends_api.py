@@ -39,3 +39,15 @@ def test_trends_basic():
 def test_trends_invalid_years():
     resp = client.get("/api/trends?codes=G&years=bad")
     assert resp.status_code == 400
+
+
+def test_compare_and_trends_accept_same_aliases():
+    resp = client.get("/api/compare?codes=SEK_G,G.46,46.")
+    assert resp.status_code == 200
+    assert [item["id"] for item in resp.json()] == ["G", "G.46", "G.46"]
+    
+    resp = client.get("/api/trends?codes=SEK_G,G.46,46.")
+    assert resp.status_code == 200
+    sections_data = resp.json()["sections_data"]
+    assert set(sections_data) == {"SEK_G", "G.46", "46."}
+    assert sections_data["G.46"] == sections_data["46."]
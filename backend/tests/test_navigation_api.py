@@ -0,0 +1,61 @@
+"""
+Testy dla endpointów nawigacji /api/sections, /api/divisions, /api/groups
+"""
+
+from fastapi.testclient import TestClient
+from app import app
+
+client = TestClient(app)
+
+
+def test_sections_items():
+    resp = client.get("/api/sections")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["version"] == "2025"
+    assert data["sections"] == sorted(data["sections"])
+    assert [item["symbol"] for item in data["items"]] == data["sections"]
+    section_a = data["items"][0]
+    assert section_a["symbol"] == "A"
+    assert section_a["name"]
+    assert section_a["children_count"] > 0
+
+
+def test_divisions_match_children_count():
+    sections = client.get("/api/sections").json()["items"]
+    section = sections[0]
+    resp = client.get(f"/api/divisions?section={section['symbol']}")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["section"] == section["symbol"]
+    assert len(data["divisions"]) == section["children_count"]
+    assert data["divisions"] == sorted(data["divisions"])
+
+
+def test_groups():
+    resp = client.get("/api/groups?section=A&division=01")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["division"] == "01"
+    assert data["groups"]
+    assert all(group.startswith("01.") for group in data["groups"])
+    assert [item["symbol"] for item in data["items"]] == data["groups"]
+
+
+def test_unknown_parent_returns_empty():
+    resp = client.get("/api/divisions?section=ZZ")
+    assert resp.status_code == 200
+    assert resp.json()["divisions"] == []
+    assert resp.json()["items"] == []
+    
+    resp = client.get("/api/groups?section=A&division=00")
+    assert resp.status_code == 200
+    assert resp.json()["groups"] == []
+
+
+def test_repeated_requests_identical():
+    first = client.get("/api/divisions?section=C&version=2007")
+    second = client.get("/api/divisions?section=C&version=2007")
+    assert first.status_code == 200
+    assert first.json() == second.json()
+    assert first.json()["version"] == "2007"
@@ -41,6 +41,14 @@ class TestPKDCode:
         assert "section" in path
         assert path["section"] == "G"
         assert path["division"] == "46"
+    
+    def test_pkd_code_slots(self):
+        """Test kompaktowej reprezentacji kodu (sloty zamiast __dict__)"""
+        code = PKDCode(symbol="A", name="Test", level=PKDLevel.SECTION, section="A")
+        assert not hasattr(code, "__dict__")
+        
+        with pytest.raises(AttributeError):
+            code.extra = "x"
 
 
 class TestPKDHierarchy:
@@ -147,6 +155,153 @@ class TestPKDHierarchy:
         """Test pobierania wszystkich kodów"""
         codes = hierarchy.get_codes_by_hierarchy()
         assert len(codes) == 10
+    
+    def test_get_codes_by_hierarchy_memoized(self, hierarchy):
+        """Test zapamiętywania wyników jako wspólnych krotek"""
+        codes = hierarchy.get_codes_by_hierarchy(section="G", division="46")
+        assert isinstance(codes, tuple)
+        assert hierarchy.get_codes_by_hierarchy(section="G", division="46") is codes
+        assert hierarchy.get_by_division("46") is codes
+        
+        subclass = hierarchy.get_codes_by_hierarchy(section="G", division="46", group="11", subclass="A")
+        assert hierarchy.get_codes_by_hierarchy(section="G", division="46", group="46.11", subclass="A") is subclass
+        assert hierarchy.get_codes_by_hierarchy(section="G", division="99") == ()
+    
+    def test_frozen_hierarchy(self, hierarchy):
+        """Test zamrożonej hierarchii: indeksy zbudowane, dodawanie kodów zablokowane"""
+        hierarchy.get_by_division("46")
+        hierarchy.add_code(
+            PKDCode("46.2", "Handel surowcami", PKDLevel.GROUP, section="G", division="46", group="46.2")
+        )
+        assert len(hierarchy.get_by_division("46")) == 5
+        
+        hierarchy.freeze()
+        assert hierarchy.frozen
+        with pytest.raises(RuntimeError):
+            hierarchy.add_code(PKDCode("B", "GÓRNICTWO", PKDLevel.SECTION, section="B"))
+        assert "B" not in hierarchy.codes
+    
+    def test_frozen_structures_read_only(self, hierarchy):
+        """Test zamrożonej hierarchii: zapis do kodów, indeksów, aliasów i nawigacji zgłasza błąd"""
+        hierarchy.freeze()
+        code = PKDCode("B", "GÓRNICTWO", PKDLevel.SECTION, section="B")
+        
+        with pytest.raises(TypeError):
+            hierarchy.codes["B"] = code
+        with pytest.raises(TypeError):
+            hierarchy.section_index["B"] = ("B",)
+        with pytest.raises(AttributeError):
+            hierarchy.division_index["46"].append("B")
+        with pytest.raises(TypeError):
+            hierarchy.preorder[0] = code
+        with pytest.raises(TypeError):
+            hierarchy._aliases["B"] = code
+        with pytest.raises(AttributeError):
+            hierarchy.get_navigation("sections").append({"symbol": "B"})
+        with pytest.raises(TypeError):
+            hierarchy._navigation["sections"][None] = ()
+        assert hierarchy.resolve("B") is None
+    
+    def test_frozen_hierarchy_pickle(self, hierarchy):
+        """Test zapisu zamrożonej hierarchii do pickle (snapshot) - po odczycie dalej zamrożona"""
+        import pickle
+        
+        hierarchy.freeze()
+        restored = pickle.loads(pickle.dumps(hierarchy))
+        
+        assert restored.frozen
+        assert list(restored.codes) == list(hierarchy.codes)
+        assert restored.resolve("4611A").symbol == "46.11.A"
+        with pytest.raises(TypeError):
+            restored.codes["B"] = restored.codes["A"]
+    
+    def test_preorder_intervals(self, hierarchy):
+        """Test numeracji preorder: poddrzewo to ciągły przedział tablicy kodów"""
+        symbols = [code.symbol for code in hierarchy.preorder]
+        assert symbols == ["A", "01", "01.1", "01.11", "01.11.Z", "G", "46", "46.1", "46.11", "46.11.A"]
+        
+        assert hierarchy.get_interval("A") == (0, 5)
+        assert hierarchy.get_interval("46.1") == (7, 10)
+        assert hierarchy.get_interval("XX") is None
+        assert [c.symbol for c in hierarchy.get_descendants("46")] == ["46.1", "46.11", "46.11.A"]
+        assert [c.symbol for c in hierarchy.get_subtree("01.11.Z")] == ["01.11.Z"]
+    
+    def test_ancestors_and_descendants(self, hierarchy):
+        """Test przodków i relacji przodek-potomek"""
+        assert [c.symbol for c in hierarchy.get_ancestors("46.11.A")] == ["G", "46", "46.1", "46.11"]
+        assert hierarchy.get_ancestors("G") == []
+        assert hierarchy.get_parent("01").symbol == "A"
+        
+        assert hierarchy.is_descendant("46.11.A", "G")
+        assert not hierarchy.is_descendant("46.11.A", "A")
+        assert not hierarchy.is_descendant("G", "G")
+    
+    def test_preorder_rebuilt_after_add(self, hierarchy):
+        """Test przebudowy numeracji po dodaniu kodu"""
+        assert hierarchy.get_interval("01") == (1, 5)
+        hierarchy.add_code(
+            PKDCode("01.2", "Uprawy wieloletnie", PKDLevel.GROUP, section="A", division="01", group="01.2")
+        )
+        
+        assert hierarchy.get_interval("01") == (1, 6)
+        assert [c.symbol for c in hierarchy.get_by_division("01")][-1] == "01.2"
+
+    
+    def test_navigation(self, hierarchy):
+        """Test posortowanych list dzieci do nawigacji"""
+        sections = hierarchy.get_navigation("sections")
+        assert [item["symbol"] for item in sections] == ["A", "G"]
+        assert sections[0] == {"symbol": "A", "name": "ROLNICTWO", "children_count": 1}
+        
+        assert [item["symbol"] for item in hierarchy.get_navigation("divisions", "G")] == ["46"]
+        groups = hierarchy.get_navigation("groups", "46")
+        assert [(item["symbol"], item["children_count"]) for item in groups] == [("46.1", 1), ("46.11", 1)]
+        assert hierarchy.get_navigation("divisions", "X") is None
+    
+    def test_search_prefix(self, hierarchy):
+        """Test podpowiedzi kodów po prefiksie symbolu"""
+        assert [c.symbol for c in hierarchy.search_prefix("46.1")] == ["46.1", "46.11", "46.11.A"]
+        assert [c.symbol for c in hierarchy.search_prefix("01.11.z")] == ["01.11.Z"]
+        assert [c.symbol for c in hierarchy.search_prefix("46", limit=2)] == ["46", "46.1"]
+        assert hierarchy.search_prefix("99") == []
+        assert hierarchy.search_prefix("  ") == []
+    
+    def test_search_prefix_with_section(self, hierarchy):
+        """Test prefiksu z literą sekcji (np. G46)"""
+        assert [c.symbol for c in hierarchy.search_prefix("g46.11")] == ["46.11", "46.11.A"]
+        assert [c.symbol for c in hierarchy.search_prefix("G")] == ["G", "46", "46.1", "46.11", "46.11.A"]
+        assert hierarchy.search_prefix("A46") == []
+    
+    def test_search_prefix_after_add(self, hierarchy):
+        """Test przebudowy indeksu prefiksowego po dodaniu kodu"""
+        assert hierarchy.search_prefix("46.2") == []
+        hierarchy.add_code(
+            PKDCode("46.2", "Handel surowcami", PKDLevel.GROUP, section="G", division="46", group="46.2")
+        )
+        assert [c.symbol for c in hierarchy.search_prefix("46.2")] == ["46.2"]
+    
+    def test_resolve_aliases(self, hierarchy):
+        """Test zamiany aliasów (SEK_X, zapis krz, kropki, litera sekcji) na kod kanoniczny"""
+        expected = {
+            "46": "46", "46.": "46", "g": "G", "SEK_G": "G",
+            "4611A": "46.11.A", "0111Z": "01.11.Z", "011": "01.1",
+            "G46.11": "46.11", "g.46.11": "46.11", "46.11G": "46.11", " 46.1 ": "46.1",
+        }
+        for alias, symbol in expected.items():
+            assert hierarchy.resolve(alias).symbol == symbol, alias
+        
+        # Litera innej sekcji i nieznane kody nie pasują
+        assert hierarchy.resolve("A46") is None
+        assert hierarchy.resolve("SEK_46") is None
+        assert hierarchy.resolve("99") is None
+    
+    def test_resolve_after_add(self, hierarchy):
+        """Test przebudowy tablicy aliasów po dodaniu kodu"""
+        assert hierarchy.resolve("G46.2") is None
+        hierarchy.add_code(
+            PKDCode("46.2", "Handel surowcami", PKDLevel.GROUP, section="G", division="46", group="46.2")
+        )
+        assert hierarchy.resolve("G46.2").symbol == "46.2"
 
 
 if __name__ == "__main__":
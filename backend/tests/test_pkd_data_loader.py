@@ -4,8 +4,10 @@ Testy dla PKD Data Loader
 
 import pytest
 from pathlib import Path
-from classes.pkd_data_loader import PKDDataLoader, FinancialMetrics, BankruptcyData, PKDMapper
-from classes.pkd_classification import PKDVersion
+import numpy as np
+import pandas as pd
+from classes.pkd_data_loader import PKDDataLoader, FinancialMetrics, FinancialStore, BankruptcyData, BankruptcyStore, PKDMapper, PKDCrosswalk, METRIC_FIELDS, COMPONENTS, year_slice
+from classes.pkd_classification import PKDVersion, PKDLevel
 
 
 class TestFinancialMetrics:
@@ -22,6 +24,11 @@ class TestFinancialMetrics:
         assert metrics.revenue == 1000000
         assert metrics.net_income == 100000
     
+    def test_financial_metrics_slots(self):
+        """Test kompaktowej reprezentacji metryk (sloty zamiast __dict__)"""
+        metrics = FinancialMetrics(year=2023, revenue=1.0)
+        assert not hasattr(metrics, "__dict__")
+    
     def test_profitability_ratio(self):
         """Test obliczania rentowności"""
         metrics = FinancialMetrics(
@@ -48,6 +55,86 @@ class TestFinancialMetrics:
         assert ratio == 0.2  # 200000 / 1000000 = 0.2
 
 
+class TestFinancialStore:
+    """Testy dla kolumnowego magazynu wskaźników"""
+    
+    @pytest.fixture
+    def store(self):
+        """Magazyn z dwoma kodami i dwoma latami"""
+        values = np.full((2, 2, len(METRIC_FIELDS)), np.nan)
+        revenue = METRIC_FIELDS.index("revenue")
+        net_income = METRIC_FIELDS.index("net_income")
+        values[0, 0, revenue] = 100.0
+        values[0, 1, revenue] = 120.0
+        values[0, 1, net_income] = 12.0
+        values[1, 1, revenue] = 30.0
+        return FinancialStore(["01", "02"], [2022, 2023], values)
+    
+    def test_store_as_mapping(self, store):
+        """Test odczytu jak Dict[symbol][rok] → FinancialMetrics"""
+        assert len(store) == 2
+        assert "01" in store and "99" not in store
+        assert list(store["02"]) == [2023]
+        
+        metrics = store["01"][2023]
+        assert isinstance(metrics, FinancialMetrics)
+        assert metrics.revenue == 120.0
+        assert metrics.net_income == 12.0
+        assert metrics.unit_count is None
+    
+    def test_store_indicator_view(self, store):
+        """Test widoku kody × lata dla jednego wskaźnika"""
+        revenue = store.indicator("revenue")
+        assert revenue.shape == (2, 2)
+        assert revenue[0, 1] == 120.0
+        assert np.isnan(revenue[1, 0])
+    
+    def test_store_aggregate(self, store):
+        """Test sumowania wskaźników po kodach"""
+        totals = store.aggregate(["01", "02"], ("revenue", "net_income"))
+        assert sorted(totals) == [2022, 2023]
+        assert totals[2022].revenue == 100.0
+        assert totals[2023].revenue == 150.0
+        assert totals[2023].net_income == 12.0
+        assert totals[2023].unit_count is None
+        
+        assert list(store.aggregate(["01", "02"], ("revenue",), year_from=2023)) == [2023]
+        assert store.aggregate(["99"]) == {}
+    
+    def test_year_slice(self):
+        """Test zakresu lat jako wycinka posortowanej osi"""
+        years = [2018, 2019, 2020, 2021]
+        assert year_slice(years) == slice(0, 4)
+        assert year_slice(years, 2019, 2020) == slice(1, 3)
+        assert year_slice(years, 2015, 2018) == slice(0, 1)
+        assert year_slice(years, 2022) == slice(4, 4)
+        assert year_slice(years, 2021, 2019) == slice(3, 3)
+    
+    def test_store_metrics_year_range(self, store):
+        """Test metryk kodu w zakresie lat bez budowania pozostałych lat"""
+        assert list(store.metrics("01")) == [2022, 2023]
+        assert list(store.metrics("01", year_from=2023)) == [2023]
+        assert store.metrics("01", year_to=2022)[2022].revenue == 100.0
+        assert store.metrics("02", year_to=2022) == {}
+        assert store.metrics("99") == {}
+    
+    def test_store_range_totals(self, store):
+        """Test sum zakresu lat z sum prefiksowych"""
+        assert store.range_totals(["01", "02"], ("revenue", "net_income")) == {"revenue": 250.0, "net_income": 12.0}
+        assert store.range_totals(["01"], ("revenue",), year_from=2023) == {"revenue": 120.0}
+        assert store.range_totals(["01", "01"], ("revenue",), year_to=2022) == {"revenue": 200.0}
+        assert store.range_totals(["99"], ("revenue",)) == {"revenue": 0.0}
+    
+    def test_store_convert(self, store):
+        """Test przeliczenia magazynu crosswalkiem: podział 01 na 01/03, 02 bez mapowania"""
+        converted = store.convert(PKDCrosswalk({"01": ("01", "03")}))
+        assert converted.codes == ["01", "03", "02"]
+        assert converted["01"][2023].revenue == 60.0
+        assert converted["03"][2022].revenue == 50.0
+        assert converted["03"][2022].net_income is None
+        assert converted["02"] == store["02"]
+
+
 class TestBankruptcyData:
     """Testy dla klasy BankruptcyData"""
     
@@ -56,6 +143,89 @@ class TestBankruptcyData:
         data = BankruptcyData(year=2023, bankruptcy_count=15)
         assert data.year == 2023
         assert data.bankruptcy_count == 15
+    
+    def test_bankruptcy_store_series(self):
+        """Test serii upadłości jako wycinka wiersza tablicy kody × lata"""
+        counts = np.array([[3, 0, 1], [0, 2, 0]], dtype=np.int64)
+        store = BankruptcyStore(["01.11.Z", "46.11.Z"], [2022, 2023, 2024], counts)
+        
+        assert store["01.11.Z"] == {2022: 3, 2024: 1}
+        assert store.series("01.11.Z", year_from=2023) == {2024: 1}
+        assert store.series("46.11.Z", 2022, 2022) == {}
+        assert store.series("99.99.Z") == {}
+        assert store.count("46.11.Z", 2023) == 2
+        assert store.count("46.11.Z", 2030) == 0
+        assert len(store) == 2 and "01.11.Z" in store
+        
+        assert store.total(["01.11.Z", "46.11.Z"]) == 6
+        assert store.total(["01.11.Z"], year_from=2023) == 1
+        assert store.total(["99.99.Z"]) == 0
+    
+    def test_load_bankruptcy_normalizes_krz_codes(self, tiny_data_dir):
+        """Test normalizacji kodów krz ("0111Z", "0111z") do symboli hierarchii, z każdym rokiem z pliku"""
+        data_dir = tiny_data_dir
+        (data_dir / "krz_pkd.csv").write_text(
+            "rok;pkd;liczba_upadlosci\n2022;0111Z;3\n2022;0111z;1\n2031;0111Z;2\n2022;Zielon;1\n",
+            encoding="utf-8"
+        )
+        loader = PKDDataLoader(data_dir, use_snapshot=False)
+        
+        assert loader.bankruptcy_data["01.11.Z"] == {2022: 4, 2031: 2}
+        assert loader.get_bankruptcy_count("0111Z", 2031) == 2
+        assert loader.bankruptcy_data.years == [2022, 2031]
+        assert "Zielon" in loader.bankruptcy_data
+    
+    def test_bankruptcy_store_convert(self):
+        """Test przeliczenia upadłości: liczby całkowite, podział metodą największych reszt"""
+        counts = np.array([[3, 1], [4, 0]], dtype=np.int64)
+        store = BankruptcyStore(["01.11.Z", "01.13.Z"], [2022, 2023], counts)
+        weights = {"01.11.Z": [("01.12.Z", 1.0)], "01.13.Z": [("01.11.Z", 0.5), ("01.15", 0.5)]}
+        
+        converted = store.convert(lambda code: weights[code])
+        assert converted.codes == ["01.12.Z", "01.11.Z", "01.15"]
+        assert converted.counts.dtype == np.int64
+        assert converted["01.12.Z"] == store["01.11.Z"]
+        assert converted["01.11.Z"] == {2022: 2} and converted["01.15"] == {2022: 2}
+        
+        split = BankruptcyStore(["01.11.Z"], [2022], np.array([[3]])).convert(
+            lambda code: [("01.11.Z", 0.5), ("01.12.Z", 0.5)]
+        )
+        assert split.counts[:, 0].tolist() == [2, 1]
+    
+    def test_loader_bankruptcy_data_per_version(self, tiny_data_dir):
+        """Test upadłości w kodach PKD 2025: przenumerowana klasa ma historię swojego źródła z 2007"""
+        data_dir = tiny_data_dir
+        (data_dir / "PKD_2025.csv").write_text(
+            "typ,symbol,nazwa\n"
+            "SEKCJA,A,ROLNICTWO\n"
+            "DZIAŁ,01,UPRAWY ROLNE\n"
+            "GRUPA,01.1,Uprawy rolne inne niż wieloletnie\n"
+            "KLASA,01.11,Uprawa zbóż\n"
+            "PODKLASA,01.11.Z,Uprawa zbóż\n"
+            "KLASA,01.12,Uprawa ryżu\n"
+            "PODKLASA,01.12.Z,Uprawa ryżu\n"
+            "KLASA,01.15,Uprawa tytoniu\n",
+            encoding="utf-8"
+        )
+        (data_dir / "MAP_PKD_2007_2025.csv").write_text(
+            "symbol_2007,symbol_2025\nA,A\n01.11,01.12\n01.13,01.11\n01.14,01.11\n01.14,01.15\n",
+            encoding="utf-8"
+        )
+        (data_dir / "krz_pkd.csv").write_text(
+            "rok;pkd;liczba_upadlosci\n2022;0111Z;3\n2023;0111Z;1\n2022;0113Z;5\n2022;0114Z;4\n",
+            encoding="utf-8"
+        )
+        loader = PKDDataLoader(data_dir, use_snapshot=False)
+        
+        assert loader.get_bankruptcy_data(PKDVersion.VERSION_2007) is loader.bankruptcy_data
+        converted = loader.get_bankruptcy_data(PKDVersion.VERSION_2025)
+        assert loader.get_bankruptcy_data(PKDVersion.VERSION_2025) is converted
+        
+        # 2007 01.11 → 2025 01.12; 2025 01.11 to 2007 01.13 i połowa 01.14 (druga połowa → klasa 01.15 bez podklas)
+        assert converted["01.12.Z"] == loader.bankruptcy_data["01.11.Z"]
+        assert converted["01.11.Z"] == {2022: 5 + 2}
+        assert converted["01.15"] == {2022: 2}
+        assert converted.counts.sum() == loader.bankruptcy_data.counts.sum()
 
 
 class TestPKDMapper:
@@ -90,6 +260,69 @@ class TestPKDMapper:
         code_2007 = mapper.translate(code_2025, PKDVersion.VERSION_2025, PKDVersion.VERSION_2007)
         assert code_2007 == "01"
     
+    def test_mapper_translate_many(self, tmp_path):
+        """Test tłumaczenia wielu kodów z mapowaniami jeden-do-wielu z obu plików"""
+        (tmp_path / "MAP_PKD_2007_2025.csv").write_text(
+            "symbol_2007,symbol_2025\n01,01\n03.11,03.11\n03.12,03.11\n",
+            encoding="utf-8"
+        )
+        (tmp_path / "MAP_PKD_2025_2007.csv").write_text(
+            "symbol_2025,symbol_2007\n03.11,03.11\n03.30,03.11\n",
+            encoding="utf-8"
+        )
+        mapper = PKDMapper(tmp_path)
+        
+        result = mapper.translate_many(["03.11", "03.12", "99"], PKDVersion.VERSION_2007, PKDVersion.VERSION_2025)
+        assert result == {"03.11": ["03.11", "03.30"], "03.12": ["03.11"], "99": []}
+        
+        # Wiele-do-jednego: główny odpowiednik zgodny z translate()
+        back = mapper.translate_many(["03.11", "03.30"], PKDVersion.VERSION_2025, PKDVersion.VERSION_2007)
+        assert back["03.11"][0] == mapper.translate("03.11", PKDVersion.VERSION_2025, PKDVersion.VERSION_2007)
+        assert set(back["03.11"]) == {"03.11", "03.12"}
+        assert back["03.30"] == ["03.11"]
+    
+    def test_crosswalk_weights(self):
+        """Test wag crosswalku: podział po równo, sumowanie wielu źródeł, brak danych jako NaN"""
+        crosswalk = PKDCrosswalk({"03.11": ("03.11", "03.30"), "03.12": ("03.11",)})
+        codes, matrix = crosswalk.matrix(["03.11", "03.12", "99"])
+        assert codes == ["03.11", "03.30", "99"]
+        assert matrix.toarray().tolist() == [[0.5, 1.0, 0.0], [0.5, 0.0, 0.0], [0.0, 0.0, 1.0]]
+        
+        values = np.array([[10.0, np.nan], [4.0, np.nan], [np.nan, np.nan]])
+        codes, converted = crosswalk.convert(["03.11", "03.12", "99"], values)
+        assert converted[0, 0] == 9.0 and converted[1, 0] == 5.0
+        assert np.isnan(converted[:, 1]).all() and np.isnan(converted[2, 0])
+    
+    def test_crosswalk_skips_cross_level_pairs(self):
+        """Test crosswalku z parą międzypoziomową: wartość klasy nie trafia do grupy"""
+        crosswalk = PKDCrosswalk({"62.02": ("62.20", "62.2"), "90.03": ("91.3",), "A": ("A",)})
+        codes, converted = crosswalk.convert(["62.02", "90.03", "A"], np.array([[12.0], [5.0], [7.0]]))
+        
+        # 62.02 → tylko klasa 62.20; 90.03 bez odpowiednika tej samej głębokości - bez zmian
+        assert codes == ["62.20", "90.03", "A"]
+        assert converted[:, 0].tolist() == [12.0, 5.0, 7.0]
+    
+    def test_mapper_crosswalk_cached(self, tmp_path):
+        """Test zapamiętywania crosswalku dla kierunku tłumaczenia"""
+        (tmp_path / "MAP_PKD_2007_2025.csv").write_text(
+            "symbol_2007,symbol_2025\n16.10,16.11\n16.10,16.12\n",
+            encoding="utf-8"
+        )
+        mapper = PKDMapper(tmp_path)
+        crosswalk = mapper.crosswalk(PKDVersion.VERSION_2007, PKDVersion.VERSION_2025)
+        assert mapper.crosswalk(PKDVersion.VERSION_2007, PKDVersion.VERSION_2025) is crosswalk
+        assert crosswalk.targets["16.10"] == ("16.12", "16.11")
+        assert mapper.crosswalk(PKDVersion.VERSION_2025, PKDVersion.VERSION_2007).targets["16.11"] == ("16.10",)
+    
+    def test_mapper_without_reverse_file(self, tmp_path):
+        """Test działania mappera bez pliku MAP_PKD_2025_2007.csv"""
+        (tmp_path / "MAP_PKD_2007_2025.csv").write_text(
+            "symbol_2007,symbol_2025\n01,01\n",
+            encoding="utf-8"
+        )
+        mapper = PKDMapper(tmp_path)
+        assert mapper.translate("01", PKDVersion.VERSION_2025, PKDVersion.VERSION_2007) == "01"
+    
     def test_mapper_same_version(self, data_dir):
         """Test translacji na tę samą wersję"""
         if not (data_dir / "MAP_PKD_2007_2025.csv").exists():
@@ -142,6 +375,26 @@ class TestPKDDataLoader:
         hierarchy_2025 = loader.get_hierarchy(PKDVersion.VERSION_2025)
         assert hierarchy_2025 is not None
         assert len(hierarchy_2025) > 0
+        
+        # Hierarchie z plików są zamrożone
+        assert hierarchy_2007.frozen and hierarchy_2025.frozen
+    
+    def test_loader_financial_data_per_version(self, tiny_data_dir):
+        """Test danych finansowych przeliczonych na kody PKD 2025 (raz, przy pierwszym użyciu)"""
+        data_dir = tiny_data_dir
+        (data_dir / "MAP_PKD_2007_2025.csv").write_text(
+            "symbol_2007,symbol_2025\nA,A\n01.11,01.11\n01.11,01.12\n",
+            encoding="utf-8"
+        )
+        loader = PKDDataLoader(data_dir, use_snapshot=False)
+        
+        assert loader.get_financial_data(PKDVersion.VERSION_2007) is loader.financial_data
+        converted = loader.get_financial_data(PKDVersion.VERSION_2025)
+        assert loader.get_financial_data(PKDVersion.VERSION_2025) is converted
+        
+        assert loader.get_financial_metrics("01.12", version=PKDVersion.VERSION_2025)[2022].revenue == 20.0
+        assert loader.get_financial_metrics("A", version=PKDVersion.VERSION_2025)[2023].revenue == 110.0
+        assert loader.get_financial_metrics("01.12") == {}
     
     def test_loader_get_financial_metrics(self, data_dir):
         """Test pobierania metryk finansowych"""
@@ -170,6 +423,72 @@ class TestPKDDataLoader:
         count = loader.get_bankruptcy_count("0111Z", 2018)
         assert isinstance(count, int)
     
+    def test_load_financial_data_from_csv(self, tmp_path):
+        """Test wczytywania wsk_fin.csv: normalizacja kodów, pomijanie 'bd' i pustych"""
+        (tmp_path / "wsk_fin.csv").write_text(
+            "PKD;WSKAZNIK;2022;2023\n"
+            "SEK_A;GS Przychody ogółem;100.5;bd\n"
+            "01.;GS Przychody ogółem;;20\n"
+            "01.;NP Wynik finansowy netto;5;bd\n"
+            "01.1;XYZ Nieznany wskaźnik;1;2\n",
+            encoding="utf-8"
+        )
+        loader = PKDDataLoader(tmp_path)
+        loader._load_financial_data()
+
+        assert set(loader.financial_data) == {"A", "01", "01.1"}
+        assert loader.financial_data["A"][2022].revenue == 100.5
+        assert 2023 not in loader.financial_data["A"]
+        assert loader.financial_data["01"][2022].revenue is None
+        assert loader.financial_data["01"][2022].net_income == 5
+        assert loader.financial_data["01"][2023].revenue == 20
+        assert loader.financial_data["01.1"] == {}
+
+    def test_load_single_hierarchy_inherits_context(self, tmp_path):
+        """Test dziedziczenia sekcji i działu przez kolejne wiersze pliku hierarchii"""
+        file_path = tmp_path / "PKD_2025.csv"
+        file_path.write_text(
+            "typ,symbol,nazwa\n"
+            "SEKCJA,A,Sekcja A\n"
+            "DZIAŁ,01,Dział 01\n"
+            "GRUPA,01.1,Grupa\n"
+            "KLASA,01.11,Klasa\n"
+            "PODKLASA,01.11.Z,Podklasa\n"
+            "SEKCJA,B,Sekcja B\n"
+            "GRUPA,05.1,Grupa bez działu\n"
+            "PODKLASA,07,Podklasa bez kropek\n",
+            encoding="utf-8"
+        )
+        loader = PKDDataLoader(tmp_path, use_snapshot=False)
+        hierarchy = loader._load_single_hierarchy(PKDVersion.VERSION_2025, file_path)
+        
+        subclass = hierarchy.get_by_symbol("01.11.Z")
+        assert (subclass.level, subclass.section, subclass.division, subclass.group, subclass.subclass) == (
+            PKDLevel.SUBCLASS, "A", "01", "01.11", "Z"
+        )
+        assert hierarchy.get_by_symbol("01.11").level == PKDLevel.GROUP
+        assert hierarchy.get_by_symbol("05.1").section == "B"
+        assert hierarchy.get_by_symbol("05.1").division == "05"
+        # Dział nie przechodzi do nowej sekcji
+        assert hierarchy.get_by_symbol("07").section == "B"
+        assert hierarchy.get_by_symbol("07").division == "07"
+        
+        assert hierarchy.section_index["A"] == ["A", "01", "01.1", "01.11", "01.11.Z"]
+        # Powtarzające się symbole są internowane - jeden obiekt napisu dla wszystkich kodów
+        assert subclass.section is hierarchy.get_by_symbol("01").section
+        assert hierarchy.group_index["01.11"] == ["01.11", "01.11.Z"]
+        assert hierarchy.subclass_index == {"Z": ["01.11.Z"]}
+    
+    def test_parse_symbols_matches_parse_symbol(self, data_dir):
+        """Test zgodności wektorowego parsowania z _parse_symbol"""
+        loader = PKDDataLoader(data_dir)
+        symbols = ["A", "46", "46.1", "46.11", "46.11.A", "XX", "1.2.3.4"]
+        columns = loader._parse_symbols(pd.Series(symbols))
+        
+        for i, symbol in enumerate(symbols):
+            parsed = tuple(None if pd.isna(column[i]) else column[i] for column in columns)
+            assert parsed == loader._parse_symbol(symbol)
+    
     def test_parse_symbol_section(self, data_dir):
         """Test parsowania sekcji"""
         loader = PKDDataLoader(data_dir)
@@ -211,5 +530,249 @@ class TestPKDDataLoader:
         assert subclass == "A"
 
 
+class TestSnapshotCache:
+    """Testy dla binarnego snapshotu danych"""
+    
+    def test_snapshot_written_after_csv_load(self, tiny_data_dir):
+        """Test zapisu snapshotu po pierwszym wczytaniu CSV"""
+        data_dir = tiny_data_dir
+        loader = PKDDataLoader(data_dir)
+        loader.load_all()
+        
+        snapshots = list((data_dir / ".cache").glob("pkd_snapshot_*.pkl"))
+        assert len(snapshots) == len(COMPONENTS)
+    
+    def test_snapshot_skips_csv_parsing(self, tiny_data_dir, monkeypatch):
+        """Test wczytania danych ze snapshotu bez parsowania CSV"""
+        data_dir = tiny_data_dir
+        PKDDataLoader(data_dir).load_all()
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("CSV nie powinien być parsowany")
+        monkeypatch.setattr(PKDDataLoader, "_load_single_hierarchy", fail)
+        monkeypatch.setattr(PKDDataLoader, "_load_financial_data", fail)
+        
+        loader = PKDDataLoader(data_dir)
+        loader.load_all()
+        assert len(loader.hierarchy_2025) == 5
+        assert loader.get_financial_metrics("A")[2023].revenue == 110
+        assert loader.get_bankruptcy_count("0111Z", 2022) == 3
+        assert loader.mapper.translate("01", PKDVersion.VERSION_2007, PKDVersion.VERSION_2025) == "01"
+    
+    def test_snapshot_invalidated_by_changed_source(self, tiny_data_dir):
+        """Test unieważnienia snapshotu po zmianie pliku źródłowego"""
+        data_dir = tiny_data_dir
+        PKDDataLoader(data_dir).load_all()
+        
+        (data_dir / "krz_pkd.csv").write_text(
+            "rok;pkd;liczba_upadlosci\n2022;0111Z;7\n",
+            encoding="utf-8"
+        )
+        loader = PKDDataLoader(data_dir)
+        loader.load_all()
+        
+        assert loader.get_bankruptcy_count("0111Z", 2022) == 7
+        assert len(list((data_dir / ".cache").glob("pkd_snapshot_bankruptcy_data_*.pkl"))) == 1
+    
+    def test_snapshot_per_component(self, tiny_data_dir, monkeypatch):
+        """Test snapshotu tylko dla użytego komponentu i ponownego użycia pozostałych"""
+        data_dir = tiny_data_dir
+        PKDDataLoader(data_dir).load_all()
+        
+        (data_dir / "krz_pkd.csv").write_text(
+            "rok;pkd;liczba_upadlosci\n2022;0111Z;7\n",
+            encoding="utf-8"
+        )
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("CSV nie powinien być parsowany")
+        monkeypatch.setattr(PKDDataLoader, "_load_financial_data", fail)
+        
+        loader = PKDDataLoader(data_dir)
+        loader.load_all()
+        assert loader.get_bankruptcy_count("0111Z", 2022) == 7
+        assert loader.get_financial_metrics("A")[2023].revenue == 110
+    
+    def test_snapshot_disabled(self, tiny_data_dir):
+        """Test wyłączenia snapshotu"""
+        data_dir = tiny_data_dir
+        PKDDataLoader(data_dir, use_snapshot=False).load_all()
+        
+        assert not (data_dir / ".cache").exists()
+
+
+class TestLazyLoading:
+    """Testy dla ładowania komponentów przy pierwszym użyciu"""
+    
+    def test_components_loaded_on_first_access(self, tiny_data_dir):
+        """Test ładowania tylko tych komponentów, których użyto"""
+        data_dir = tiny_data_dir
+        loader = PKDDataLoader(data_dir, use_snapshot=False)
+        assert loader.loaded_components() == ()
+        
+        assert len(loader.get_hierarchy(PKDVersion.VERSION_2025)) == 5
+        assert loader.loaded_components() == ("hierarchy_2025",)
+        
+        assert loader.get_bankruptcy_count("0111Z", 2022) == 3
+        assert loader.loaded_components() == ("hierarchy_2025", "bankruptcy_data")
+        assert not loader._loaded
+    
+    def test_preload(self, tiny_data_dir):
+        """Test wczytania wskazanych komponentów z góry"""
+        data_dir = tiny_data_dir
+        loader = PKDDataLoader(data_dir, use_snapshot=False)
+        loader.preload(["mapper", "financial_data"])
+        
+        assert loader.loaded_components() == ("mapper", "financial_data")
+    
+    def test_preload_unknown_component(self, tiny_data_dir):
+        """Test odrzucenia nieznanej nazwy komponentu"""
+        loader = PKDDataLoader(tiny_data_dir)
+        
+        with pytest.raises(ValueError):
+            loader.preload(["hierarchy_2099"])
+    
+    def test_load_all_reports_timings(self, tiny_data_dir):
+        """Test czasów ładowania każdego źródła przy równoległym load_all()"""
+        data_dir = tiny_data_dir
+        loader = PKDDataLoader(data_dir)
+        loader.load_all()
+        
+        assert set(loader.load_timings) == set(COMPONENTS)
+        assert all(source == "csv" for source, _ in loader.load_timings.values())
+        
+        cached = PKDDataLoader(data_dir)
+        cached.load_all()
+        assert all(source == "snapshot" for source, _ in cached.load_timings.values())
+    
+    def test_load_all_propagates_errors(self, tiny_data_dir):
+        """Test zgłoszenia błędu komponentu ładowanego w puli wątków"""
+        data_dir = tiny_data_dir
+        (data_dir / "krz_pkd.csv").unlink()
+        loader = PKDDataLoader(data_dir, use_snapshot=False)
+        
+        with pytest.raises(FileNotFoundError):
+            loader.load_all()
+        assert "bankruptcy_data" not in loader.loaded_components()
+    
+    def test_missing_unused_source(self, tiny_data_dir):
+        """Test działania bez pliku komponentu, który nie jest używany"""
+        data_dir = tiny_data_dir
+        (data_dir / "PKD_2007.csv").unlink()
+        loader = PKDDataLoader(data_dir, use_snapshot=False)
+        
+        assert len(loader.get_hierarchy(PKDVersion.VERSION_2025)) == 5
+        with pytest.raises(FileNotFoundError):
+            loader.get_hierarchy(PKDVersion.VERSION_2007)
+
+
+class TestSharedDataset:
+    """Testy dla współdzielonego zbioru danych (mmap)"""
+    
+    def test_export_and_attach(self, tmp_path, monkeypatch, tiny_data_dir):
+        """Test podłączenia zbioru zbudowanego przez export_shared bez parsowania CSV"""
+        data_dir = tiny_data_dir
+        shared_dir = tmp_path / "shared"
+        PKDDataLoader(data_dir, use_snapshot=False).export_shared(shared_dir)
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("CSV nie powinien być parsowany")
+        monkeypatch.setattr(PKDDataLoader, "_load_single_hierarchy", fail)
+        
+        loader = PKDDataLoader(data_dir, use_snapshot=False, shared_dir=shared_dir)
+        loader.load_all()
+        
+        assert isinstance(loader.financial_data.values, np.memmap)
+        assert not loader.financial_data.values.flags.writeable
+        assert loader.get_financial_metrics("A")[2022].revenue == 100
+        assert loader.get_bankruptcy_count("0111Z", 2023) == 1
+        assert len(loader.hierarchy_2007) == 5
+    
+    def test_attach_converted_store(self, tmp_path, monkeypatch, tiny_data_dir):
+        """Test mapowania magazynu PKD 2025 z katalogu współdzielonego zamiast przeliczania w każdym workerze"""
+        data_dir = tiny_data_dir
+        shared_dir = tmp_path / "shared"
+        PKDDataLoader(data_dir, use_snapshot=False).export_shared(shared_dir)
+        expected = PKDDataLoader(data_dir, use_snapshot=False).get_financial_data(PKDVersion.VERSION_2025)
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("Magazyn nie powinien być przeliczany")
+        monkeypatch.setattr(FinancialStore, "convert", fail)
+        
+        loader = PKDDataLoader(data_dir, use_snapshot=False, shared_dir=shared_dir)
+        store = loader.get_financial_data(PKDVersion.VERSION_2025)
+        
+        assert isinstance(store.values, np.memmap)
+        assert not store.values.flags.writeable
+        assert store.codes == expected.codes
+        assert np.array_equal(store.values, expected.values, equal_nan=True)
+        assert loader.get_financial_data(PKDVersion.VERSION_2025) is store
+        assert "mapper" not in loader.loaded_components()
+    
+    def test_reexport_switches_atomically(self, tmp_path, tiny_data_dir):
+        """Test ponownego eksportu: podłączony loader czyta dalej swój eksport, nowy widzi nowy"""
+        data_dir = tiny_data_dir
+        shared_dir = tmp_path / "shared"
+        PKDDataLoader(data_dir, use_snapshot=False).export_shared(shared_dir)
+        
+        attached = PKDDataLoader(data_dir, use_snapshot=False, shared_dir=shared_dir)
+        assert attached.get_financial_metrics("A")[2022].revenue == 100
+        signature = attached.source_signature()
+        
+        (data_dir / "krz_pkd.csv").write_text("rok;pkd;liczba_upadlosci\n2022;0111Z;9\n", encoding="utf-8")
+        PKDDataLoader(data_dir, use_snapshot=False).export_shared(shared_dir)
+        assert attached.source_signature() != signature
+        
+        # Komponent wczytany po eksporcie pochodzi z eksportu, do którego loader się podłączył
+        assert attached.get_bankruptcy_count("0111Z", 2022) == 3
+        fresh = PKDDataLoader(data_dir, use_snapshot=False, shared_dir=shared_dir)
+        assert fresh.get_bankruptcy_count("0111Z", 2022) == 9
+        
+        # Bez czasu przechowania zostaje tylko bieżący i poprzedni eksport
+        PKDDataLoader(data_dir, use_snapshot=False).export_shared(shared_dir, retention=0)
+        versions = sorted(path.name for path in shared_dir.iterdir() if path.is_dir())
+        assert len(versions) == 2
+        assert fresh._shared_version_dir.name in versions
+        assert attached._shared_version_dir.name not in versions
+    
+    def test_lazy_attach_after_reexports(self, tmp_path, tiny_data_dir):
+        """Test doczytania komponentu z pierwszego eksportu po dwóch kolejnych eksportach"""
+        data_dir = tiny_data_dir
+        shared_dir = tmp_path / "shared"
+        PKDDataLoader(data_dir, use_snapshot=False).export_shared(shared_dir)
+        
+        attached = PKDDataLoader(data_dir, use_snapshot=False, shared_dir=shared_dir)
+        assert attached.get_financial_metrics("A")[2022].revenue == 100
+        
+        (data_dir / "krz_pkd.csv").write_text("rok;pkd;liczba_upadlosci\n2022;0111Z;9\n", encoding="utf-8")
+        for _ in range(2):
+            PKDDataLoader(data_dir, use_snapshot=False).export_shared(shared_dir)
+        
+        # Upadłości wczytywane dopiero teraz - z pierwszego eksportu, nie z CSV w data_dir
+        assert "bankruptcy_data" not in attached.loaded_components()
+        assert attached.get_bankruptcy_count("0111Z", 2022) == 3
+        assert attached.load_timings["bankruptcy_data"][0] == "shared"
+    
+    def test_attach_removed_export_raises(self, tmp_path, tiny_data_dir):
+        """Test błędu zamiast cichego wczytania CSV gdy eksport loadera został usunięty"""
+        data_dir = tiny_data_dir
+        shared_dir = tmp_path / "shared"
+        PKDDataLoader(data_dir, use_snapshot=False).export_shared(shared_dir)
+        
+        attached = PKDDataLoader(data_dir, use_snapshot=False, shared_dir=shared_dir)
+        assert attached.get_financial_metrics("A")[2022].revenue == 100
+        for _ in range(2):
+            PKDDataLoader(data_dir, use_snapshot=False).export_shared(shared_dir, retention=0)
+        
+        with pytest.raises(RuntimeError, match="bankruptcy_data"):
+            attached.get_bankruptcy_count("0111Z", 2022)
+    
+    def test_attach_missing_raises(self, tmp_path, tiny_data_dir):
+        """Test błędu gdy katalog współdzielony nie istnieje (bez cichego wczytania CSV)"""
+        loader = PKDDataLoader(tiny_data_dir, use_snapshot=False, shared_dir=tmp_path / "missing")
+        
+        with pytest.raises(RuntimeError, match="współdzielonego katalogu"):
+            loader.load_all()
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
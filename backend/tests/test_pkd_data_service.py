@@ -2,10 +2,12 @@
 Testy dla PKD Data Service
 """
 
+import time
 import pytest
 from pathlib import Path
 from classes.pkd_data_service import PKDDataService, IndustryData
-from classes.pkd_classification import PKDVersion
+from classes.pkd_rollup import RollupCube
+from classes.pkd_classification import PKDVersion, PKDLevel
 
 
 class TestIndustryData:
@@ -28,6 +30,34 @@ class TestIndustryData:
         data = IndustryData(pkd_codes=[code])
         assert len(data.pkd_codes) == 1
         assert data.version == PKDVersion.VERSION_2025
+    
+    def test_industry_data_from_dicts(self):
+        """Test danych podanych wprost (bez widoku na magazyny)"""
+        from classes.pkd_data_loader import FinancialMetrics
+        
+        data = IndustryData(
+            pkd_codes=(),
+            financial_data={"46.11": {2023: FinancialMetrics(year=2023), 2021: FinancialMetrics(year=2021)}}
+        )
+        assert data.get_all_years() == [2021, 2023]
+        assert data.bankruptcy_data == {}
+        assert str(data) == "IndustryData(codes=0, years=2021-2023, version=2025)"
+    
+    def test_aggregate_from_dicts(self):
+        """Test sum rok po roku dla danych podanych wprost (brak danych jako 0)"""
+        from classes.pkd_data_loader import FinancialMetrics
+        
+        data = IndustryData(
+            pkd_codes=(),
+            financial_data={
+                "46.11": {2022: FinancialMetrics(year=2022, revenue=10.0), 2023: FinancialMetrics(year=2023, revenue=4.0)},
+                "46.12": {2022: FinancialMetrics(year=2022, revenue=5.0, net_income=1.0)},
+            }
+        )
+        totals = data.aggregate(("revenue", "net_income"), year_to=2022)
+        assert list(totals) == [2022]
+        assert totals[2022].revenue == 15.0 and totals[2022].net_income == 1.0
+        assert totals[2022].unit_count is None
 
 
 class TestPKDDataService:
@@ -143,5 +173,286 @@ class TestPKDDataService:
             assert len(years) > 0
 
 
+class TestDataReload:
+    """Testy dla przeładowania danych bez restartu"""
+    
+    def test_reload_swaps_loader(self, tiny_service, tmp_path):
+        """Test atomowej podmiany loadera po zmianie danych"""
+        old_loader = tiny_service.loader
+        assert old_loader.get_bankruptcy_count("0111Z", 2022) == 3
+        (tmp_path / "krz_pkd.csv").write_text(
+            "rok;pkd;liczba_upadlosci\n2022;0111Z;9\n",
+            encoding="utf-8"
+        )
+        
+        assert tiny_service.reload()
+        assert tiny_service.dataset_version == 2
+        assert tiny_service.loader is not old_loader
+        assert tiny_service.loader.get_bankruptcy_count("0111Z", 2022) == 9
+        # Stary zbiór pozostaje spójny dla zapytań, które go już trzymają
+        assert old_loader.get_bankruptcy_count("0111Z", 2022) == 3
+    
+    def test_failed_reload_keeps_old_loader(self, tiny_service, tmp_path):
+        """Test zachowania starego zbioru gdy przeładowanie się nie powiedzie"""
+        tiny_service.loader.get_hierarchy(PKDVersion.VERSION_2025)
+        old_loader = tiny_service.loader
+        (tmp_path / "PKD_2025.csv").unlink()
+        
+        assert not tiny_service.reload()
+        assert tiny_service.loader is old_loader
+        assert tiny_service.dataset_version == 1
+        assert tiny_service.last_reload_error
+    
+    def test_failed_rollup_build_keeps_old_loader(self, tiny_service, monkeypatch):
+        """Test błędu budowy kostki agregatów przy przeładowaniu: stary zbiór zostaje, błąd zapisany"""
+        rollup = tiny_service.get_rollup()
+        old_loader = tiny_service.loader
+        
+        def fail(*args, **kwargs):
+            raise RuntimeError("kostka")
+        monkeypatch.setattr(RollupCube, "build", fail)
+        
+        assert not tiny_service.reload()
+        assert tiny_service.loader is old_loader
+        assert tiny_service.dataset_version == 1
+        assert tiny_service.last_reload_error == "kostka"
+        assert tiny_service.get_rollup() is rollup
+    
+    def test_watch_reloads_changed_files(self, tiny_service, tmp_path):
+        """Test przeładowania po wykryciu zmiany pliku przez obserwację"""
+        tiny_service.start_watching(interval=0.05)
+        try:
+            (tmp_path / "krz_pkd.csv").write_text(
+                "rok;pkd;liczba_upadlosci\n2022;0111Z;5\n",
+                encoding="utf-8"
+            )
+            deadline = time.monotonic() + 5
+            while tiny_service.dataset_version == 1 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            tiny_service.stop_watching()
+        
+        assert tiny_service.dataset_version == 2
+        assert tiny_service.loader.get_bankruptcy_count("0111Z", 2022) == 5
+    
+    def test_view_aggregates_own_dataset(self, tiny_service, tmp_path):
+        """Test sum widoku z jego własnego zbioru danych, także po przeładowaniu"""
+        data = tiny_service.get_data(section="A")
+        (tmp_path / "wsk_fin.csv").write_text(
+            "PKD;WSKAZNIK;2022;2023\nSEK_A;GS Przychody ogółem;500;510\n",
+            encoding="utf-8"
+        )
+        assert tiny_service.reload()
+        
+        totals = data.aggregate(("revenue",), year_from=2023)
+        assert {year: m.revenue for year, m in totals.items()} == {2023: 110.0}
+        assert tiny_service.get_data(section="A").aggregate(("revenue",))[2023].revenue == 510.0
+    
+    def test_pinned_loader_reads_one_dataset(self, tiny_service, tmp_path):
+        """Test zapytania na loaderze pobranym przed przeładowaniem: dane i kostka ze starego zbioru"""
+        loader = tiny_service.loader
+        tiny_service.get_rollup()  # stary zbiór wczytany przed zmianą pliku
+        (tmp_path / "krz_pkd.csv").write_text(
+            "rok;pkd;liczba_upadlosci\n2022;0111Z;9\n",
+            encoding="utf-8"
+        )
+        assert tiny_service.reload()
+        current_rollup = tiny_service.get_rollup()
+        
+        data = tiny_service.get_data(section="A", loader=loader)
+        assert data.bankruptcy_data == {"01.11.Z": {2022: 3, 2023: 1}}
+        rollup = tiny_service.get_rollup(PKDVersion.VERSION_2025, loader)
+        assert rollup.bankruptcies(PKDLevel.SECTION, "A") == {2022: 3, 2023: 1}
+        
+        # Kostka i indeks serii starego zbioru nie zastępują tych z bieżącego loadera
+        assert tiny_service.get_rollup() is current_rollup
+        assert tiny_service._series_index[PKDVersion.VERSION_2025][0] is tiny_service.loader
+    
+    def test_series_index_resolved_once_per_dataset(self, tiny_service, tmp_path):
+        """Test indeksu symbol → seria finansowa: budowany raz, przebudowany po przeładowaniu"""
+        data = tiny_service.get_data(section="A", division="01", group="01.11")
+        assert data.series_codes == {"01.11": "01.11"}
+        assert data.financial_data["01.11"][2022].revenue == 40.0
+        
+        series_index = tiny_service._get_series_index(tiny_service.loader, PKDVersion.VERSION_2025)
+        assert series_index == {"A": ("A", "A"), "01.11": ("01.11", "01.11"), "01.11.Z": ("01.11", "01.11")}
+        assert tiny_service._get_series_index(tiny_service.loader, PKDVersion.VERSION_2025) is series_index
+        
+        (tmp_path / "wsk_fin.csv").write_text(
+            "PKD;WSKAZNIK;2022\nSEK_A;GS Przychody ogółem;100\n01.1;GS Przychody ogółem;70\n",
+            encoding="utf-8"
+        )
+        assert tiny_service.reload()
+        data = tiny_service.get_data(section="A")
+        assert data.series_codes == {"A": "A", "01.1": "01.1", "01.11": "01.1"}
+    
+    def test_get_data_cached_until_reload(self, tiny_service, tmp_path):
+        """Test cache wyników get_data: ten sam selektor trafia, przeładowanie unieważnia"""
+        data = tiny_service.get_data(section="A", division="01")
+        assert tiny_service.get_data(section="A", division="01", version=PKDVersion.VERSION_2025) is data
+        assert tiny_service.get_data(section="A", division="01", year_from=2023) is not data
+        assert tiny_service.result_cache.stats()["hits"] == 1
+        
+        (tmp_path / "krz_pkd.csv").write_text(
+            "rok;pkd;liczba_upadlosci\n2022;0111Z;9\n",
+            encoding="utf-8"
+        )
+        assert tiny_service.reload()
+        
+        reloaded = tiny_service.get_data(section="A", division="01")
+        assert reloaded is not data
+        assert reloaded.bankruptcy_data == {"01.11.Z": {2022: 9}}
+    
+    def test_get_data_cache_key_canonical(self, tiny_service):
+        """Test klucza cache z kanonicznego selektora: skrócona grupa i błędna sekcja trafiają we wpis"""
+        data = tiny_service.get_data(section="A", division="01", group="01.11")
+        assert tiny_service.get_data(section="A", division="01", group="11") is data
+        assert tiny_service.get_data(section="X", division="01", group="11") is data
+        assert data.query_params["group"] == "01.11"
+        
+        # Nieznane kody - pusty wynik poza cache
+        assert tiny_service.get_data(section="X").pkd_codes == ()
+        assert tiny_service.get_data(section="A", division="99").pkd_codes == ()
+        assert len(tiny_service.result_cache) == 1
+    
+    def test_get_data_cache_disabled(self, tiny_data_dir):
+        """Test serwisu bez cache wyników"""
+        service = PKDDataService(tiny_data_dir, cache_size=0)
+        assert service.get_data(section="A") is not service.get_data(section="A")
+    
+    def test_reload_keeps_components_warm(self, tiny_service):
+        """Test wczytania w nowym loaderze komponentów używanych przez stary"""
+        tiny_service.loader.get_hierarchy(PKDVersion.VERSION_2025)
+        
+        assert tiny_service.reload()
+        assert tiny_service.loader.loaded_components() == ("hierarchy_2025",)
+
+
+@pytest.mark.parametrize("tiny_service", [{"cache_size": 0}], ids=["no_cache"], indirect=True)
+class TestGetMany:
+    """Testy dla pobierania wielu branż naraz"""
+    
+    def test_get_many_matches_get_data(self, tiny_service):
+        """Test zgodności wyników get_many z pojedynczymi wywołaniami get_data"""
+        selectors = [
+            {"section": "A"},
+            {"section": "A", "division": "01", "group": "01.11"},
+            {"section": "A", "division": "01", "group": "11", "subclass": "Z"},
+        ]
+        results = tiny_service.get_many(selectors, year_from=2022)
+        
+        assert len(results) == 3
+        for selector, data in zip(selectors, results):
+            expected = tiny_service.get_data(**selector, year_from=2022)
+            assert data.pkd_codes == expected.pkd_codes
+            assert data.financial_data == expected.financial_data
+            assert data.bankruptcy_data == expected.bankruptcy_data
+            assert data.query_params == expected.query_params
+    
+    def test_get_many_returns_lazy_views(self, tiny_service):
+        """Test widoków: dane kodów budowane dopiero przy pierwszym odczycie"""
+        section, division = tiny_service.get_many([{"section": "A"}, {"section": "A", "division": "01"}])
+        assert section._financial_data is None and section._bankruptcy_data is None
+        
+        assert section.get_all_years() == [2022, 2023]
+        assert section._financial_data is None
+        
+        assert section.financial_data is section.financial_data
+        assert section.series_codes == {"A": "A", "01.11": "01.11"}
+        assert division.bankruptcy_data == {"01.11.Z": {2022: 3, 2023: 1}}
+        assert division._financial_data is None
+    
+    def test_get_many_uses_bankruptcies_of_version(self, tiny_service):
+        """Test upadłości w kodach wersji zapytania (2025 - przeliczone przez crosswalk)"""
+        loader = tiny_service.loader
+        for version in PKDVersion:
+            data, = tiny_service.get_many([{"section": "A"}], version=version)
+            assert data._bankruptcies is loader.get_bankruptcy_data(version)
+    
+    def test_get_many_validates_all_selectors(self, tiny_service):
+        """Test walidacji wszystkich selektorów przed pobraniem danych"""
+        with pytest.raises(ValueError):
+            tiny_service.get_many([{"section": "A"}, {"division": "01"}])
+        assert tiny_service.loader.loaded_components() == ()
+
+
+class TestSummaryStatistics:
+    """Testy dla podsumowania statystyk IndustryData"""
+    
+    @pytest.fixture
+    def section(self, tiny_data_dir):
+        """Dane sekcji A z minimalnego zbioru"""
+        return PKDDataService(tiny_data_dir).get_data(section="A")
+    
+    def test_summary_totals(self, section):
+        """Test sum, średnich i median po seriach i latach"""
+        summary = section.get_summary_statistics()
+        
+        assert summary["total_revenue"] == 250.0
+        assert summary["total_bankruptcies"] == 4
+        assert summary["num_codes"] == 5
+        assert summary["num_series"] == 2
+        assert summary["years"] == [2022, 2023]
+        assert summary["totals"]["revenue"] == 250.0
+        assert summary["means"]["revenue"] == pytest.approx(250.0 / 3)
+        assert summary["medians"]["revenue"] == 100.0
+        assert summary["means"]["net_income"] is None
+        assert "per_year" not in summary
+    
+    def test_summary_single_year_and_breakdown(self, section):
+        """Test podsumowania jednego roku i rozbicia na lata"""
+        summary = section.get_summary_statistics(year=2023)
+        assert (summary["total_revenue"], summary["total_bankruptcies"], summary["num_series"]) == (110.0, 1, 1)
+        assert section.get_summary_statistics(year=2030)["total_revenue"] == 0.0
+        
+        per_year = section.get_summary_statistics(per_year=True)["per_year"]
+        assert list(per_year) == [2022, 2023]
+        assert per_year[2022]["totals"]["revenue"] == 140.0
+        assert per_year[2022]["bankruptcies"] == 3
+        assert per_year[2023]["num_series"] == 1
+    
+    def test_summary_from_dicts_matches_view(self, section):
+        """Test zgodności podsumowania danych podanych wprost z widokiem"""
+        data = IndustryData(
+            pkd_codes=section.pkd_codes,
+            financial_data=section.financial_data,
+            bankruptcy_data=section.bankruptcy_data
+        )
+        assert data.get_summary_statistics(per_year=True) == section.get_summary_statistics(per_year=True)
+    
+    def test_summary_counts_zeros(self):
+        """Test zer liczonych do średnich (brak danych pomijany)"""
+        from classes.pkd_data_loader import FinancialMetrics
+        
+        data = IndustryData(
+            pkd_codes=(),
+            financial_data={
+                "01": {2022: FinancialMetrics(year=2022, revenue=0.0), 2023: FinancialMetrics(year=2023, revenue=10.0)},
+                "02": {2023: FinancialMetrics(year=2023, unit_count=3.0)},
+            }
+        )
+        summary = data.get_summary_statistics()
+        assert summary["means"]["revenue"] == 5.0
+        assert summary["medians"]["unit_count"] == 3.0
+        assert summary["num_series"] == 2
+
+
+class TestPreload:
+    """Testy dla wczytywania komponentów przy starcie serwisu"""
+    
+    def test_service_lazy_by_default(self, tiny_data_dir):
+        """Test braku ładowania danych przy tworzeniu serwisu"""
+        service = PKDDataService(tiny_data_dir)
+        assert service.loader.loaded_components() == ()
+        
+        service.get_data(section="A")
+        assert "hierarchy_2007" not in service.loader.loaded_components()
+    
+    def test_service_preload(self, tiny_data_dir):
+        """Test wczytania wskazanych komponentów przy starcie"""
+        service = PKDDataService(tiny_data_dir, preload=["hierarchy_2025", "mapper"])
+        assert service.loader.loaded_components() == ("hierarchy_2025", "mapper")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
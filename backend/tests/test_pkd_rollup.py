@@ -0,0 +1,81 @@
+"""
+Testy dla kostki agregatów PKD
+"""
+
+import pytest
+from classes.pkd_classification import PKDVersion, PKDLevel
+from classes.pkd_rollup import RollupCube
+
+
+class TestRollupCube:
+    """Testy dla RollupCube"""
+    
+    def test_nodes_cover_hierarchy_levels(self, tiny_service):
+        """Test węzłów kostki: każda sekcja, dział i grupa hierarchii"""
+        rollup = tiny_service.get_rollup()
+        
+        assert isinstance(rollup, RollupCube)
+        assert rollup.nodes == [
+            (PKDLevel.SECTION, "A"),
+            (PKDLevel.DIVISION, "01"),
+            (PKDLevel.GROUP, "01.1"),
+            (PKDLevel.GROUP, "01.11"),
+        ]
+        assert (PKDLevel.SUBCLASS, "01.11.Z") not in rollup
+    
+    def test_financials_match_get_data(self, tiny_service):
+        """Test sum wskaźników węzła zgodnych z agregacją serii z get_data()"""
+        rollup = tiny_service.get_rollup()
+        store = tiny_service.loader.get_financial_data(PKDVersion.VERSION_2025)
+        
+        for level, key, query in [
+            (PKDLevel.SECTION, "A", {"section": "A"}),
+            (PKDLevel.DIVISION, "01", {"section": "A", "division": "01"}),
+            (PKDLevel.GROUP, "01.1", {"section": "A", "division": "01", "group": "01.1"}),
+            (PKDLevel.GROUP, "01.11", {"section": "A", "division": "01", "group": "01.11"}),
+        ]:
+            data = tiny_service.get_data(**query)
+            assert rollup.financials(level, key) == store.aggregate(data.series_codes.values())
+        
+        section = rollup.financials(PKDLevel.SECTION, "A", ("revenue",))
+        assert {year: m.revenue for year, m in section.items()} == {2022: 140.0, 2023: 110.0}
+        assert section[2022].net_income is None
+        # 2023 bez danych dla 01.11 - rok pominięty w węźle grupy
+        assert list(rollup.financials(PKDLevel.GROUP, "01.11")) == [2022]
+    
+    def test_year_bounds(self, tiny_service):
+        """Test zawężenia lat dla wskaźników i upadłości"""
+        rollup = tiny_service.get_rollup()
+        
+        assert list(rollup.financials(PKDLevel.SECTION, "A", year_from=2023)) == [2023]
+        assert rollup.bankruptcies(PKDLevel.SECTION, "A") == {2022: 3, 2023: 1}
+        assert rollup.bankruptcies(PKDLevel.GROUP, "01.11", year_to=2022) == {2022: 3}
+    
+    def test_unknown_node(self, tiny_service):
+        """Test nieznanego węzła - puste wyniki"""
+        rollup = tiny_service.get_rollup()
+        
+        assert rollup.financials(PKDLevel.DIVISION, "99") == {}
+        assert rollup.bankruptcies(PKDLevel.DIVISION, "99") == {}
+    
+    def test_built_once_per_dataset(self, tiny_service, tmp_path):
+        """Test kostki budowanej raz na zbiór danych i odbudowanej przy przeładowaniu"""
+        rollup = tiny_service.get_rollup()
+        assert tiny_service.get_rollup(PKDVersion.VERSION_2025) is rollup
+        
+        (tmp_path / "krz_pkd.csv").write_text(
+            "rok;pkd;liczba_upadlosci\n2022;0111Z;9\n",
+            encoding="utf-8"
+        )
+        assert tiny_service.reload()
+        
+        # Przeładowanie od razu buduje kostkę dla nowego loadera
+        cached_loader, reloaded = tiny_service._rollups[PKDVersion.VERSION_2025]
+        assert cached_loader is tiny_service.loader
+        assert tiny_service.get_rollup() is reloaded is not rollup
+        assert reloaded.bankruptcies(PKDLevel.SECTION, "A") == {2022: 9}
+        assert rollup.bankruptcies(PKDLevel.SECTION, "A") == {2022: 3, 2023: 1}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
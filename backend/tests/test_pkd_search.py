@@ -0,0 +1,87 @@
+"""
+Testy dla wyszukiwania pełnotekstowego kodów PKD
+"""
+
+import pytest
+from classes.pkd_classification import PKDCode, PKDHierarchy, PKDLevel, PKDVersion
+from classes.pkd_search import PKDTextIndex, analyze, fold, stem
+
+
+class TestTextAnalysis:
+    """Testy dla normalizacji tekstu"""
+    
+    def test_fold_diacritics_and_case(self):
+        """Test zwinięcia polskich znaków i wielkości liter"""
+        assert fold("Uprawa ZBÓŻ") == "uprawa zboz"
+        assert fold("Łódź, żółć, gęś") == "lodz, zolc, ges"
+    
+    def test_stem(self):
+        """Test obcinania końcówek fleksyjnych"""
+        assert stem("hurtowy") == stem("hurtowa") == stem("hurtowej") == "hurt"
+        assert stem("uprawa") == stem("uprawy") == "upraw"
+        assert stem("zboz") == stem("zboza") == "zboz"
+        # Krótkie słowa zostają bez zmian
+        assert stem("ryz") == "ryz"
+    
+    def test_analyze_skips_stopwords(self):
+        """Test pomijania spójników i przyimków"""
+        assert analyze("Chów i hodowla owiec i kóz") == ["chow", "hodowl", "owiec", "koz"]
+
+
+class TestPKDTextIndex:
+    """Testy dla indeksu odwróconego"""
+    
+    @pytest.fixture
+    def hierarchy(self):
+        """Fixture - hierarchia z nazwami do wyszukiwania"""
+        h = PKDHierarchy(PKDVersion.VERSION_2025)
+        for code in [
+            PKDCode("01.11", "Uprawa zbóż, roślin strączkowych i oleistych", PKDLevel.GROUP, section="A", division="01"),
+            PKDCode("10.61", "Wytwarzanie produktów przemiału zbóż", PKDLevel.GROUP, section="C", division="10"),
+            PKDCode("46", "HANDEL HURTOWY", PKDLevel.DIVISION, section="G", division="46"),
+            PKDCode("46.21", "Sprzedaż hurtowa zboża i nasion", PKDLevel.GROUP, section="G", division="46"),
+            PKDCode("47", "HANDEL DETALICZNY", PKDLevel.DIVISION, section="G", division="47"),
+        ]:
+            h.add_code(code)
+        return h
+    
+    def test_search_ranks_all_terms_first(self, hierarchy):
+        """Test rankingu: kody pasujące do wszystkich słów zapytania są pierwsze"""
+        symbols = [code.symbol for code, _ in hierarchy.search_text("uprawa zbóż")]
+        assert symbols[0] == "01.11"
+        assert set(symbols) == {"01.11", "10.61", "46.21"}
+    
+    def test_search_folding(self, hierarchy):
+        """Test wyszukiwania bez polskich znaków i wielkości liter"""
+        assert hierarchy.search_text("UPRAWA ZBOZ") == hierarchy.search_text("uprawa zbóż")
+    
+    def test_search_inflection_and_prefix(self, hierarchy):
+        """Test dopasowania innych form słowa i niedokończonych słów"""
+        assert [code.symbol for code, _ in hierarchy.search_text("handel hurtowa")][0] == "46"
+        assert {code.symbol for code, _ in hierarchy.search_text("hurt")} == {"46", "46.21"}
+        assert [code.symbol for code, _ in hierarchy.search_text("przemia")] == ["10.61"]
+    
+    def test_search_no_match(self, hierarchy):
+        """Test braku wyników"""
+        assert hierarchy.search_text("górnictwo") == []
+        assert hierarchy.search_text("i w z") == []
+    
+    def test_search_limit(self, hierarchy):
+        """Test limitu wyników"""
+        assert len(hierarchy.search_text("handel", limit=1)) == 1
+    
+    def test_index_rebuilt_after_add(self, hierarchy):
+        """Test przebudowy indeksu po dodaniu kodu"""
+        assert hierarchy.search_text("górnictwo") == []
+        hierarchy.add_code(PKDCode("B", "GÓRNICTWO I WYDOBYWANIE", PKDLevel.SECTION, section="B"))
+        assert [code.symbol for code, _ in hierarchy.search_text("gornictwo")] == ["B"]
+    
+    def test_empty_index(self):
+        """Test pustego indeksu"""
+        index = PKDTextIndex([])
+        assert len(index) == 0
+        assert index.search("handel") == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
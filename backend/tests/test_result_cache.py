@@ -0,0 +1,81 @@
+"""
+Testy dla cache wyników zapytań
+"""
+
+import pytest
+from classes.result_cache import ResultCache
+
+
+class FakeClock:
+    """Zegar sterowany ręcznie"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestResultCache:
+    """Testy dla ResultCache"""
+    
+    def test_hit_and_miss(self):
+        """Test trafienia i chybienia z licznikami"""
+        cache = ResultCache(max_size=2)
+        assert cache.get("a") is None
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+    
+    def test_lru_eviction(self):
+        """Test usunięcia najdawniej używanego wpisu po przekroczeniu rozmiaru"""
+        cache = ResultCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+    
+    def test_ttl_expiration(self):
+        """Test wygaśnięcia wpisu po czasie życia"""
+        clock = FakeClock()
+        cache = ResultCache(max_size=4, ttl=10.0, clock=clock)
+        cache.put("a", 1)
+        
+        clock.now = 9.9
+        assert cache.get("a") == 1
+        clock.now = 10.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+        assert cache.stats()["expirations"] == 1
+    
+    def test_clear_keeps_counters(self):
+        """Test unieważnienia wpisów z zachowaniem liczników"""
+        cache = ResultCache()
+        cache.put("a", 1)
+        cache.get("a")
+        cache.clear()
+        
+        assert cache.get("a") is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["invalidations"], stats["size"]) == (1, 1, 0)
+    
+    def test_disabled(self):
+        """Test wyłączonego cache (max_size=0)"""
+        cache = ResultCache(max_size=0)
+        cache.put("a", 1)
+        assert cache.get("a") is None
+        
+        with pytest.raises(ValueError):
+            ResultCache(max_size=-1)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,58 @@
+"""
+Testy dla endpointu /api/search/codes
+"""
+
+from fastapi.testclient import TestClient
+from app import app
+
+client = TestClient(app)
+
+
+def test_search_codes_prefix():
+    resp = client.get("/api/search/codes?prefix=46.1&limit=5")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["version"] == "2025"
+    assert 0 < data["count"] <= 5
+    assert data["count"] == len(data["results"])
+    for code in data["results"]:
+        assert code["symbol"].startswith("46.1")
+        for key in ("symbol", "name", "level", "section", "division"):
+            assert key in code
+
+
+def test_search_codes_section_prefix():
+    resp = client.get("/api/search/codes?prefix=C29&limit=3")
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert results
+    assert all(code["section"] == "C" and code["symbol"].startswith("29") for code in results)
+
+
+def test_search_codes_validation():
+    assert client.get("/api/search/codes").status_code == 422
+    assert client.get("/api/search/codes?prefix=01&limit=0").status_code == 422
+    assert client.get("/api/search/codes?prefix=01&limit=101").status_code == 422
+
+
+def test_search_full_text():
+    resp = client.get("/api/search?q=handel hurtowy&limit=5")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["version"] == "2025"
+    assert 0 < data["count"] <= 5
+    top = data["results"][0]
+    assert "HANDEL HURTOWY" in top["name"].upper()
+    scores = [r["score"] for r in data["results"]]
+    assert scores[0] >= scores[-1]
+
+
+def test_search_full_text_without_diacritics():
+    with_marks = client.get("/api/search?q=uprawa zbóż&limit=3").json()
+    without = client.get("/api/search?q=UPRAWA ZBOZ&limit=3").json()
+    assert [r["symbol"] for r in with_marks["results"]] == [r["symbol"] for r in without["results"]]
+
+
+def test_search_full_text_validation():
+    assert client.get("/api/search").status_code == 422
+    assert client.get("/api/search?q=handel&limit=0").status_code == 422
@@ -0,0 +1,47 @@
+"""
+Testy dla endpointu /api/translate/batch
+"""
+
+from fastapi.testclient import TestClient
+from app import app
+
+client = TestClient(app)
+
+
+def test_translate_batch_matches_single():
+    codes = ["01", "01.11", "03.11"]
+    resp = client.post("/api/translate/batch", json={
+        "codes": codes,
+        "from_version": "2007",
+        "to_version": "2025"
+    })
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total"] == len(codes)
+    assert [r["original_code"] for r in data["results"]] == codes
+    
+    for result in data["results"]:
+        single = client.get(
+            f"/api/translate?code={result['original_code']}&from_version=2007&to_version=2025"
+        )
+        assert single.status_code == 200
+        assert single.json()["translated_code"] == result["translated_code"]
+        assert result["translated_code"] == result["translated_codes"][0]
+
+
+def test_translate_batch_unmapped():
+    resp = client.post("/api/translate/batch", json={
+        "codes": ["01", "99.99", "99.99"],
+        "from_version": "2007",
+        "to_version": "2025"
+    })
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["unmapped"] == ["99.99"]
+    assert data["results"][1]["translated_code"] is None
+    assert data["results"][2]["translated_codes"] == []
+
+
+def test_translate_batch_validation():
+    resp = client.post("/api/translate/batch", json={"codes": ["01"]})
+    assert resp.status_code == 422